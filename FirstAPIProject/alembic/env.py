@@ -10,13 +10,24 @@ import sys
 
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
-from database import Base
+from config import get_settings
+from database import Base, sync_url
 from database import Student, Course, Enrollment
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
 config = context.config
 
+# Без sqlalchemy.url в alembic.ini берем DATABASE_URL, как и приложение.
+# Значение проходит интерполяцию configparser: % (например, из пароля в
+# URL-кодировке) удваивается
+if not config.get_main_option("sqlalchemy.url"):
+    url = sync_url(get_settings().database_url)
+    config.set_main_option(
+        "sqlalchemy.url",
+        url.render_as_string(hide_password=False).replace("%", "%%"),
+    )
+
 # Interpret the config file for Python logging.
 # This line sets up loggers basically.
 if config.config_file_name is not None:
@@ -0,0 +1,43 @@
+"""Enrollment indexes and unique student/course pair
+
+Revision ID: 3c9e41d7a2b6
+Revises: 8fbb9fdad5b1
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "3c9e41d7a2b6"
+down_revision: Union[str, Sequence[str], None] = "8fbb9fdad5b1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Перед созданием UNIQUE убираем накопившиеся дубли, оставляя первую запись
+    op.execute(
+        sa.text(
+            "DELETE FROM enrollment WHERE id NOT IN "
+            "(SELECT MIN(id) FROM enrollment GROUP BY student_id, course_id)"
+        )
+    )
+    # batch-режим нужен для SQLite: ограничение добавляется пересозданием таблицы
+    with op.batch_alter_table("enrollment") as batch_op:
+        batch_op.create_unique_constraint(
+            "uq_enrollment_student_course", ["student_id", "course_id"]
+        )
+        batch_op.create_index("ix_enrollment_course_id", ["course_id"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("enrollment") as batch_op:
+        batch_op.drop_index("ix_enrollment_course_id")
+        batch_op.drop_constraint("uq_enrollment_student_course", type_="unique")
@@ -0,0 +1,180 @@
+"""Stats counters maintained by triggers
+
+Revision ID: 5b2f7c1e9a40
+Revises: 3c9e41d7a2b6
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5b2f7c1e9a40"
+down_revision: Union[str, Sequence[str], None] = "3c9e41d7a2b6"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TRIGGERS = [
+    "stats_student_insert",
+    "stats_student_delete",
+    "stats_student_update",
+    "stats_course_insert",
+    "stats_course_delete",
+    "stats_course_update",
+    "stats_enrollment_insert",
+    "stats_enrollment_delete",
+    "stats_enrollment_update",
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "stats_totals",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("students", sa.Integer(), nullable=False),
+        sa.Column("active_students", sa.Integer(), nullable=False),
+        sa.Column("age_sum", sa.Integer(), nullable=False),
+        sa.Column("courses", sa.Integer(), nullable=False),
+        sa.Column("enrollments", sa.Integer(), nullable=False),
+        sa.Column("revenue", sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_table(
+        "course_stats",
+        sa.Column("course_id", sa.Integer(), nullable=False),
+        sa.Column("enrollments", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("course_id"),
+    )
+    # Заполнение счетчиков и триггеры - те же, что database.STATS_DDL
+    # выполняет при create_all; на других СУБД /api/stats считает агрегатами
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    op.execute(
+        """INSERT OR IGNORE INTO stats_totals
+            (id, students, active_students, age_sum, courses, enrollments, revenue)
+        SELECT 1,
+            (SELECT COUNT(*) FROM student),
+            (SELECT COUNT(*) FROM student WHERE is_active),
+            (SELECT COALESCE(SUM(age), 0) FROM student),
+            (SELECT COUNT(*) FROM course),
+            (SELECT COUNT(*) FROM enrollment),
+            (SELECT COALESCE(SUM(course.price), 0) FROM enrollment
+                JOIN course ON course.id = enrollment.course_id)"""
+    )
+    op.execute(
+        """INSERT OR IGNORE INTO course_stats (course_id, enrollments)
+        SELECT course.id, COUNT(enrollment.id) FROM course
+            LEFT JOIN enrollment ON enrollment.course_id = course.id
+        GROUP BY course.id"""
+    )
+    op.execute(
+        """CREATE TRIGGER IF NOT EXISTS stats_student_insert AFTER INSERT ON student
+        BEGIN
+            UPDATE stats_totals SET students = students + 1,
+                active_students = active_students + NEW.is_active,
+                age_sum = age_sum + NEW.age
+            WHERE id = 1;
+        END"""
+    )
+    op.execute(
+        """CREATE TRIGGER IF NOT EXISTS stats_student_delete AFTER DELETE ON student
+        BEGIN
+            UPDATE stats_totals SET students = students - 1,
+                active_students = active_students - OLD.is_active,
+                age_sum = age_sum - OLD.age
+            WHERE id = 1;
+        END"""
+    )
+    op.execute(
+        """CREATE TRIGGER IF NOT EXISTS stats_student_update
+        AFTER UPDATE OF age, is_active ON student
+        BEGIN
+            UPDATE stats_totals SET
+                active_students = active_students + NEW.is_active - OLD.is_active,
+                age_sum = age_sum + NEW.age - OLD.age
+            WHERE id = 1;
+        END"""
+    )
+    op.execute(
+        """CREATE TRIGGER IF NOT EXISTS stats_course_insert AFTER INSERT ON course
+        BEGIN
+            INSERT OR REPLACE INTO course_stats (course_id, enrollments)
+            SELECT NEW.id, COUNT(*) FROM enrollment WHERE course_id = NEW.id;
+            UPDATE stats_totals SET courses = courses + 1,
+                revenue = revenue + NEW.price * (SELECT enrollments
+                    FROM course_stats WHERE course_id = NEW.id)
+            WHERE id = 1;
+        END"""
+    )
+    op.execute(
+        """CREATE TRIGGER IF NOT EXISTS stats_course_delete AFTER DELETE ON course
+        BEGIN
+            UPDATE stats_totals SET courses = courses - 1,
+                revenue = revenue - OLD.price * COALESCE((SELECT enrollments
+                    FROM course_stats WHERE course_id = OLD.id), 0)
+            WHERE id = 1;
+            DELETE FROM course_stats WHERE course_id = OLD.id;
+        END"""
+    )
+    op.execute(
+        """CREATE TRIGGER IF NOT EXISTS stats_course_update
+        AFTER UPDATE OF price ON course
+        BEGIN
+            UPDATE stats_totals SET
+                revenue = revenue + (NEW.price - OLD.price) * COALESCE((SELECT
+                    enrollments FROM course_stats WHERE course_id = NEW.id), 0)
+            WHERE id = 1;
+        END"""
+    )
+    op.execute(
+        """CREATE TRIGGER IF NOT EXISTS stats_enrollment_insert
+        AFTER INSERT ON enrollment
+        BEGIN
+            UPDATE stats_totals SET enrollments = enrollments + 1,
+                revenue = revenue + COALESCE((SELECT price FROM course
+                    WHERE id = NEW.course_id), 0)
+            WHERE id = 1;
+            UPDATE course_stats SET enrollments = enrollments + 1
+            WHERE course_id = NEW.course_id;
+        END"""
+    )
+    op.execute(
+        """CREATE TRIGGER IF NOT EXISTS stats_enrollment_delete
+        AFTER DELETE ON enrollment
+        BEGIN
+            UPDATE stats_totals SET enrollments = enrollments - 1,
+                revenue = revenue - COALESCE((SELECT price FROM course
+                    WHERE id = OLD.course_id), 0)
+            WHERE id = 1;
+            UPDATE course_stats SET enrollments = enrollments - 1
+            WHERE course_id = OLD.course_id;
+        END"""
+    )
+    op.execute(
+        """CREATE TRIGGER IF NOT EXISTS stats_enrollment_update
+        AFTER UPDATE OF course_id ON enrollment
+        BEGIN
+            UPDATE stats_totals SET revenue = revenue
+                - COALESCE((SELECT price FROM course WHERE id = OLD.course_id), 0)
+                + COALESCE((SELECT price FROM course WHERE id = NEW.course_id), 0)
+            WHERE id = 1;
+            UPDATE course_stats SET enrollments = enrollments - 1
+            WHERE course_id = OLD.course_id;
+            UPDATE course_stats SET enrollments = enrollments + 1
+            WHERE course_id = NEW.course_id;
+        END"""
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == "sqlite":
+        for trigger in TRIGGERS:
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    op.drop_table("course_stats")
+    op.drop_table("stats_totals")
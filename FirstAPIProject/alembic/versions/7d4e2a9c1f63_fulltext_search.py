@@ -0,0 +1,75 @@
+"""Full-text search indexes for students and courses
+
+Revision ID: 7d4e2a9c1f63
+Revises: 5b2f7c1e9a40
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "7d4e2a9c1f63"
+down_revision: Union[str, Sequence[str], None] = "5b2f7c1e9a40"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Таблица -> (столбцы индекса, веса bm25), как database.SEARCH_INDEXES
+INDEXES = {
+    "student": (("first_name", "last_name", "email"), "bm25(10.0, 10.0, 1.0)"),
+    "course": (("title", "description"), "bm25(10.0, 1.0)"),
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # FTS5 есть только в SQLite; на других СУБД поиск идет по подстроке
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    for table, (columns, weights) in INDEXES.items():
+        fts = f"{table}_fts"
+        names = ", ".join(columns)
+        new = ", ".join(f"NEW.{column}" for column in columns)
+        old = ", ".join(f"OLD.{column}" for column in columns)
+        op.execute(
+            f"""CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({names},
+            content='{table}', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3')"""
+        )
+        op.execute(f"INSERT INTO {fts}({fts}, rank) VALUES('rank', '{weights}')")
+        op.execute(f"INSERT INTO {fts}({fts}) VALUES('rebuild')")
+        op.execute(
+            f"""CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON {table}
+            BEGIN
+                INSERT INTO {fts}(rowid, {names}) VALUES (NEW.id, {new});
+            END"""
+        )
+        op.execute(
+            f"""CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON {table}
+            BEGIN
+                INSERT INTO {fts}({fts}, rowid, {names})
+                VALUES ('delete', OLD.id, {old});
+            END"""
+        )
+        op.execute(
+            f"""CREATE TRIGGER IF NOT EXISTS {fts}_update
+            AFTER UPDATE OF {names} ON {table}
+            BEGIN
+                INSERT INTO {fts}({fts}, rowid, {names})
+                VALUES ('delete', OLD.id, {old});
+                INSERT INTO {fts}(rowid, {names}) VALUES (NEW.id, {new});
+            END"""
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    for table in INDEXES:
+        for action in ("insert", "delete", "update"):
+            op.execute(f"DROP TRIGGER IF EXISTS {table}_fts_{action}")
+        op.execute(f"DROP TABLE IF EXISTS {table}_fts")
@@ -0,0 +1,35 @@
+"""Covering index for course rosters
+
+Revision ID: a4c8e3f5b217
+Revises: 7d4e2a9c1f63
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a4c8e3f5b217"
+down_revision: Union[str, Sequence[str], None] = "7d4e2a9c1f63"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Без batch-режима: пересоздание таблицы удалило бы триггеры счетчиков.
+    # (course_id, student_id) покрывает список студентов курса, а старый
+    # индекс по course_id становится его префиксом и больше не нужен
+    op.create_index(
+        "ix_enrollment_course_student", "enrollment", ["course_id", "student_id"]
+    )
+    op.drop_index("ix_enrollment_course_id", table_name="enrollment")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index("ix_enrollment_course_id", "enrollment", ["course_id"])
+    op.drop_index("ix_enrollment_course_student", table_name="enrollment")
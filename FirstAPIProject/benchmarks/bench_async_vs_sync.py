@@ -0,0 +1,138 @@
+"""Сравнение асинхронного слоя данных с прежним синхронным
+
+Прежний путь воспроизводится отдельным приложением: async-обработчики
+вызывают синхронную Session, как это было до перехода на aiosqlite.
+
+Запуск: python benchmarks/bench_async_vs_sync.py --students 5000 --concurrency 64
+"""
+
+import argparse
+import asyncio
+import random
+
+# utils добавляет корень проекта в sys.path, поэтому импортируется первым
+from utils import print_table, run_load, temp_database
+
+import httpx
+from fastapi import Depends, FastAPI, HTTPException
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from database import Base, Student, get_async_db
+from main import app as async_app
+from models import Student as StudentSchema, StudentCreate
+
+
+def build_sync_app(session_factory) -> FastAPI:
+    """Приложение со старой схемой: блокирующие запросы внутри async def"""
+    sync_app = FastAPI()
+
+    def get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    @sync_app.get("/api/students/{student_id}", response_model=StudentSchema)
+    async def get_student(student_id: int, db: Session = Depends(get_db)):
+        student = db.get(Student, student_id)
+        if not student:
+            raise HTTPException(status_code=404, detail="Student not found")
+        return student
+
+    @sync_app.post("/api/students/", response_model=StudentSchema)
+    async def create_student(student: StudentCreate, db: Session = Depends(get_db)):
+        db_student = Student(**student.model_dump())
+        db.add(db_student)
+        db.commit()
+        db.refresh(db_student)
+        return db_student
+
+    return sync_app
+
+
+def seed(sync_engine, students: int):
+    Base.metadata.create_all(sync_engine)
+    with sync_engine.begin() as conn:
+        conn.execute(
+            insert(Student),
+            [
+                {
+                    "first_name": "Bench",
+                    "last_name": f"Student{i}",
+                    "age": 18 + i % 40,
+                    "email": f"student{i}@bench.local",
+                    "is_active": True,
+                }
+                for i in range(students)
+            ],
+        )
+        return conn.execute(select(Student.id)).scalars().all()
+
+
+async def bench_app(app, ids: list[int], requests: int, concurrency: int):
+    # Ошибки приложения (например, "database is locked") считаем, а не падаем
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    rnd = random.Random(42)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as c:
+        reads = await run_load(
+            lambda i: c.get(f"/api/students/{rnd.choice(ids)}"), requests, concurrency
+        )
+        writes = await run_load(
+            lambda i: c.post(
+                "/api/students/",
+                json={"first_name": "Load", "last_name": "Test", "age": 20},
+            ),
+            requests // 4,
+            concurrency,
+        )
+    return reads, writes
+
+
+async def main(args):
+    with temp_database() as path:
+        # Пул не меньше параллелизма: иначе синхронный путь упирается в
+        # блокирующее ожидание соединения прямо в event loop
+        pool = {"pool_size": args.concurrency, "max_overflow": 0}
+        sync_engine = create_engine(f"sqlite:///{path}", **pool)
+        ids = seed(sync_engine, args.students)
+
+        async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}", **pool)
+        async_sessions = async_sessionmaker(bind=async_engine, expire_on_commit=False)
+
+        async def override_get_db():
+            async with async_sessions() as db:
+                yield db
+
+        async_app.dependency_overrides[get_async_db] = override_get_db
+        sync_app = build_sync_app(sessionmaker(bind=sync_engine))
+
+        sync_reads, sync_writes = await bench_app(
+            sync_app, ids, args.requests, args.concurrency
+        )
+        async_reads, async_writes = await bench_app(
+            async_app, ids, args.requests, args.concurrency
+        )
+
+        async_app.dependency_overrides.clear()
+        await async_engine.dispose()
+        sync_engine.dispose()
+
+    print_table(
+        [
+            ("sync  GET /api/students/{id}", sync_reads),
+            ("async GET /api/students/{id}", async_reads),
+            ("sync  POST /api/students/", sync_writes),
+            ("async POST /api/students/", async_writes),
+        ]
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--students", type=int, default=5000)
+    parser.add_argument("--requests", type=int, default=4000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,81 @@
+"""Пакетная загрузка против цикла одиночных POST-запросов
+
+Запуск: python benchmarks/bench_bulk.py --students 5000
+"""
+
+import argparse
+import asyncio
+import time
+
+# utils добавляет корень проекта в sys.path, поэтому импортируется первым
+from utils import temp_database
+
+import httpx
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from database import Base, get_async_db
+from main import app
+
+
+def make_students(count: int) -> list[dict]:
+    return [
+        {"first_name": "Bulk", "last_name": "Student", "age": 18 + i % 40}
+        for i in range(count)
+    ]
+
+
+async def timed(coro) -> float:
+    started = time.perf_counter()
+    await coro
+    return time.perf_counter() - started
+
+
+async def main(args):
+    with temp_database() as path:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        sessions = async_sessionmaker(bind=engine, expire_on_commit=False)
+
+        async def override_get_db():
+            async with sessions() as db:
+                yield db
+
+        app.dependency_overrides[get_async_db] = override_get_db
+        transport = httpx.ASGITransport(app=app)
+        students = make_students(args.students)
+
+        async with httpx.AsyncClient(transport=transport, base_url="http://b") as c:
+
+            async def single_loop():
+                for student in students:
+                    response = await c.post("/api/students/", json=student)
+                    response.raise_for_status()
+
+            async def bulk():
+                for start in range(0, len(students), args.batch):
+                    batch = students[start : start + args.batch]
+                    response = await c.post("/api/students/bulk", json=batch)
+                    response.raise_for_status()
+
+            single_seconds = await timed(single_loop())
+            bulk_seconds = await timed(bulk())
+
+        app.dependency_overrides.clear()
+        await engine.dispose()
+
+    print(f"студентов: {args.students}, размер пакета: {args.batch}")
+    print(f"{'способ':<24}{'секунд':>10}{'строк/с':>12}")
+    for name, seconds in (
+        ("POST /api/students/", single_seconds),
+        ("POST /api/students/bulk", bulk_seconds),
+    ):
+        print(f"{name:<24}{seconds:>10.2f}{args.students / seconds:>12.0f}")
+    print(f"ускорение: x{single_seconds / bulk_seconds:.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--students", type=int, default=5000)
+    parser.add_argument("--batch", type=int, default=5000)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,88 @@
+"""Сжатие ответов: байты в сети и время CPU по размеру ответа
+
+Тело - страница /api/enrollments/detailed/ из --rows записей (синтетические
+студенты и курсы, сериализация той же моделью EnrollmentDetailPage). Для
+каждой кодировки из compress.ENCODERS с уровнями из Settings печатаются
+размер, степень сжатия и время сжатия одного ответа; строка "кэш" - цена
+повторного ответа с тем же ETag (чтение из LRU сжатых форм).
+
+Запуск: python benchmarks/bench_compression.py --rows 10 100 1000 10000
+"""
+
+import argparse
+import random
+import timeit
+
+# utils добавляет корень проекта в sys.path, поэтому импортируется первым
+import utils  # noqa: F401
+
+from cache import LRUCache
+from compress import ENCODERS, compression_levels
+from config import get_settings
+from models import EnrollmentDetailPage
+
+FIRST_NAMES = ["Ivan", "Anna", "Petr", "Maria", "Oleg", "Elena", "Sergey", "Olga"]
+LAST_NAMES = ["Smirnov", "Ivanova", "Kuznetsov", "Popova", "Sokolov", "Lebedeva"]
+TITLES = ["Python", "FastAPI", "SQL", "Algorithms", "Networks", "Statistics"]
+
+
+def detailed_page(rows: int) -> bytes:
+    rng = random.Random(rows)
+    items = []
+    for i in range(1, rows + 1):
+        course_id = rng.randint(1, 50)
+        items.append(
+            {
+                "enrollment": {"id": i, "course_id": course_id, "student_id": i},
+                "student": {
+                    "id": i,
+                    "first_name": rng.choice(FIRST_NAMES),
+                    "last_name": rng.choice(LAST_NAMES),
+                    "age": rng.randint(18, 60),
+                    "email": f"student{i}@example.com",
+                },
+                "course": {
+                    "id": course_id,
+                    "title": f"{TITLES[course_id % len(TITLES)]} {course_id}",
+                    "description": "Учебный курс для бенчмарка",
+                    "duration_hours": 36,
+                    "price": 1000.0 + course_id,
+                },
+            }
+        )
+    page = EnrollmentDetailPage(enrollments=items, next_cursor=rows)
+    return page.model_dump_json().encode()
+
+
+def measure(number: int, func) -> float:
+    """Лучшее время одного вызова из трех серий, в мс"""
+    return min(timeit.repeat(func, number=number, repeat=3)) / number * 1000
+
+
+def main(args):
+    levels = compression_levels(get_settings())
+    cache = LRUCache()
+    cache.set("key", b"compressed")
+    print(
+        f"{'записей':>8}{'кодировка':>11}{'уровень':>9}{'байт':>11}{'сжатие':>8}{'мс':>9}"
+    )
+    for rows in args.rows:
+        body = detailed_page(rows)
+        number = max(1, 20_000 // rows)
+        print(f"{rows:>8}{'identity':>11}{'-':>9}{len(body):>11}{1:>8.1f}{0:>9.3f}")
+        for encoding, (compress, _) in ENCODERS.items():
+            level = levels[encoding]
+            size = len(compress(body, level))
+            elapsed = measure(number, lambda: compress(body, level))
+            print(
+                f"{rows:>8}{encoding:>11}{level:>9}{size:>11}"
+                f"{len(body) / size:>8.1f}{elapsed:>9.3f}"
+            )
+        elapsed = measure(number, lambda: cache.get("key"))
+        print(f"{rows:>8}{'кэш':>11}{'-':>9}{'-':>11}{'-':>8}{elapsed:>9.4f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    main(parser.parse_args())
@@ -0,0 +1,144 @@
+"""Пропускная способность записи на курс при большом числе записей
+
+Сравниваются две схемы таблицы enrollment с одинаковыми данными:
+- legacy: без индексов, дубликат ищется SELECT-ом перед INSERT;
+- indexed: UNIQUE(student_id, course_id) + индекс по course_id,
+  дубликат ловится как IntegrityError (crud.create_enrollment).
+
+Запуск: python benchmarks/bench_enroll.py --enrollments 1000000 --ops 500
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+# utils добавляет корень проекта в sys.path, поэтому импортируется первым
+from utils import percentile, temp_database
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+import crud
+from database import Base, Course, Enrollment, Student
+from models import EnrollmentCreate
+
+LEGACY_ENROLLMENT_DDL = (
+    "CREATE TABLE enrollment (id INTEGER PRIMARY KEY, "
+    "course_id INTEGER REFERENCES course(id), "
+    "student_id INTEGER REFERENCES student(id))"
+)
+
+
+def seed(path: str, legacy: bool, enrollments: int, courses: int, extra: int):
+    """Каждый студент записан на все курсы: enrollments / courses студентов"""
+    engine = create_engine(f"sqlite:///{path}")
+    # Без таблиц счетчиков /api/stats: их триггеры на enrollment были бы
+    # только в схеме indexed и исказили бы сравнение
+    Base.metadata.create_all(engine, tables=[Student.__table__, Course.__table__])
+    if legacy:
+        with engine.begin() as conn:
+            conn.exec_driver_sql(LEGACY_ENROLLMENT_DDL)
+    else:
+        Base.metadata.create_all(engine, tables=[Enrollment.__table__])
+
+    students = enrollments // courses
+    with engine.begin() as conn:
+        conn.execute(
+            insert(Course),
+            [
+                {"title": f"Course {i}", "duration_hours": 10, "price": 100.0}
+                for i in range(courses)
+            ],
+        )
+        conn.execute(
+            insert(Student),
+            [
+                {"first_name": "Bench", "last_name": "Student", "age": 20}
+                for _ in range(students + extra)
+            ],
+        )
+        chunk = []
+        for student_id in range(1, students + 1):
+            for course_id in range(1, courses + 1):
+                chunk.append({"student_id": student_id, "course_id": course_id})
+            if len(chunk) >= 50_000:
+                conn.execute(insert(Enrollment), chunk)
+                chunk = []
+        if chunk:
+            conn.execute(insert(Enrollment), chunk)
+    engine.dispose()
+    return students
+
+
+async def legacy_create_enrollment(db: AsyncSession, enrollment: EnrollmentCreate):
+    """Прежняя реализация: проверка дубликата SELECT-ом без индекса"""
+    await db.get(Student, enrollment.student_id)
+    await db.get(Course, enrollment.course_id)
+    existing = (
+        await db.execute(
+            select(Enrollment).where(
+                (Enrollment.student_id == enrollment.student_id)
+                & (Enrollment.course_id == enrollment.course_id)
+            )
+        )
+    ).scalar_one_or_none()
+    if existing:
+        raise ValueError("Enrollment already exists")
+    db.add(Enrollment(**enrollment.model_dump()))
+    await db.commit()
+
+
+async def measure(path: str, create, first_new_student: int, courses: int, ops: int):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    sessions = async_sessionmaker(bind=engine, expire_on_commit=False)
+    rnd = random.Random(42)
+    latencies = []
+
+    started = time.perf_counter()
+    for i in range(ops):
+        enrollment = EnrollmentCreate(
+            student_id=first_new_student + i, course_id=rnd.randint(1, courses)
+        )
+        op_started = time.perf_counter()
+        async with sessions() as db:
+            await create(db, enrollment)
+        latencies.append(time.perf_counter() - op_started)
+    elapsed = time.perf_counter() - started
+
+    await engine.dispose()
+    return {
+        "ops_per_sec": ops / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+async def main(args):
+    results = []
+    for name, legacy, create in (
+        ("legacy (SELECT + INSERT)", True, legacy_create_enrollment),
+        ("indexed (UNIQUE)", False, crud.create_enrollment),
+    ):
+        with temp_database() as path:
+            seed_started = time.perf_counter()
+            students = seed(path, legacy, args.enrollments, args.courses, args.ops)
+            print(f"{name}: заполнено за {time.perf_counter() - seed_started:.1f} с")
+            stats = await measure(path, create, students + 1, args.courses, args.ops)
+            results.append((name, stats))
+
+    print(f"\nзаписей в таблице: {args.enrollments}, операций: {args.ops}")
+    print(f"{'схема':<28}{'ops/s':>10}{'p50, мс':>10}{'p99, мс':>10}")
+    for name, stats in results:
+        print(
+            f"{name:<28}{stats['ops_per_sec']:>10.1f}"
+            f"{stats['p50_ms']:>10.2f}{stats['p99_ms']:>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--enrollments", type=int, default=1_000_000)
+    parser.add_argument("--courses", type=int, default=100)
+    parser.add_argument("--ops", type=int, default=500)
+    asyncio.run(main(parser.parse_args()))
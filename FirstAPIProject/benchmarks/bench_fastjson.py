@@ -0,0 +1,116 @@
+"""Сериализация списков: response_model против быстрого пути fastjson
+
+- response_model: ORM-объекты из crud.get_all_students, валидация и
+  сериализация тем же полем ответа, что у GET /api/students/
+  (fastapi.routing.serialize_response), затем JSONResponse;
+- fastjson: кортежи столбцов (as_rows=True) и fastjson.page_response (orjson).
+
+Через API страница ограничена MAX_PAGE_LIMIT, поэтому большие объемы
+меряются на уровне обработчика, без HTTP.
+
+Запуск: python benchmarks/bench_fastjson.py --rows 10000 100000
+"""
+
+import argparse
+import asyncio
+import time
+
+# utils добавляет корень проекта в sys.path, поэтому импортируется первым
+from utils import temp_database
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from sqlalchemy import create_engine, insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+import crud
+import fastjson
+from database import Base, Student
+from main import app
+from models import Student as StudentSchema
+
+
+def seed(path: str, students: int):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(
+            insert(Student),
+            [
+                {
+                    "first_name": "Bench",
+                    "last_name": "Student",
+                    "age": 18 + i % 50,
+                    "email": f"student{i}@example.com",
+                }
+                for i in range(students)
+            ],
+        )
+    engine.dispose()
+
+
+def list_route():
+    return next(
+        route
+        for route in app.routes
+        if getattr(route, "path", None) == "/api/students/" and "GET" in route.methods
+    )
+
+
+async def response_model_path(db, rows: int) -> tuple[float, float, int]:
+    started = time.perf_counter()
+    students, next_cursor = await crud.get_all_students(db, limit=rows)
+    queried = time.perf_counter()
+    content = await serialize_response(
+        field=list_route().response_field,
+        response_content={"items": students, "next_cursor": next_cursor},
+    )
+    body = JSONResponse(content).body
+    return queried - started, time.perf_counter() - queried, len(body)
+
+
+async def fastjson_path(db, rows: int) -> tuple[float, float, int]:
+    started = time.perf_counter()
+    result, next_cursor = await crud.get_all_students(db, limit=rows, as_rows=True)
+    queried = time.perf_counter()
+    body = fastjson.page_response(Student, StudentSchema, result, next_cursor).body
+    return queried - started, time.perf_counter() - queried, len(body)
+
+
+async def run(path: str, args):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+    print(
+        f"{'строк':>8}{'путь':>16}{'запрос, мс':>12}{'JSON, мс':>10}{'всего, мс':>11}{'байт':>11}"
+    )
+    for rows in args.rows:
+        for name, scenario in (
+            ("response_model", response_model_path),
+            ("fastjson", fastjson_path),
+        ):
+            best = None
+            for _ in range(args.repeat):
+                # Новая сессия: identity map не должна ускорять повторы
+                async with sessions() as db:
+                    timing = await scenario(db, rows)
+                if best is None or sum(timing[:2]) < sum(best[:2]):
+                    best = timing
+            query, serialize, size = best
+            print(
+                f"{rows:>8}{name:>16}{query * 1000:>12.1f}{serialize * 1000:>10.1f}"
+                f"{(query + serialize) * 1000:>11.1f}{size:>11}"
+            )
+    await engine.dispose()
+
+
+def main(args):
+    with temp_database() as path:
+        seed(path, max(args.rows))
+        asyncio.run(run(path, args))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    main(parser.parse_args())
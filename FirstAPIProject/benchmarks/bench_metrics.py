@@ -0,0 +1,164 @@
+"""Цена метрик: те же запросы к приложению с MetricsMiddleware и без него
+
+Варианты отличаются только слоем metrics.py: middleware (гистограммы,
+Server-Timing) и слушателями SQL на движке. Запросы идут через
+httpx.ASGITransport без сети, поэтому доля накладных расходов здесь -
+оценка сверху: в реальном сервере к каждому запросу добавляются разбор
+HTTP и сокет. Варианты чередуются --rounds раз, берется лучший прогон.
+
+Разница rps между прогонами шумит на несколько процентов, поэтому цена
+слоя меряется и отдельно: middleware вокруг пустого приложения плюс пара
+слушателей SQL на запрос. Доля от времени запроса считается по rps без
+метрик (event loop один, на запрос уходит 1/rps секунды CPU).
+
+Запуск: python benchmarks/bench_metrics.py --requests 3000 --concurrency 16
+"""
+
+import argparse
+import asyncio
+import logging
+import random
+import time
+
+# utils добавляет корень проекта в sys.path, поэтому импортируется первым
+from utils import run_load, temp_database
+
+import httpx
+from sqlalchemy import create_engine, insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from database import Base, Student, get_async_db
+from main import create_app
+from metrics import (
+    Metrics,
+    MetricsMiddleware,
+    _after_cursor_execute,
+    _before_cursor_execute,
+    instrument_engine,
+)
+
+SCENARIOS = {
+    "GET /api/students/{id}": lambda rnd, ids: f"/api/students/{rnd.choice(ids)}",
+    "GET /api/students/?limit=50": lambda rnd, ids: "/api/students/?limit=50",
+}
+
+
+def seed(path: str, students: int) -> list[int]:
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(
+            insert(Student),
+            [
+                {"first_name": "Bench", "last_name": f"Student{i}", "age": 20}
+                for i in range(students)
+            ],
+        )
+    engine.dispose()
+    return list(range(1, students + 1))
+
+
+def build_app(path: str, with_metrics: bool):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    if with_metrics:
+        instrument_engine(engine.sync_engine)
+    sessions = async_sessionmaker(bind=engine, expire_on_commit=False)
+
+    async def override_get_db():
+        async with sessions() as db:
+            yield db
+
+    app = create_app()
+    if not with_metrics:
+        # Стек middleware строится при первом запросе, до него слой можно убрать
+        app.user_middleware = [
+            middleware
+            for middleware in app.user_middleware
+            if middleware.cls is not MetricsMiddleware
+        ]
+    app.dependency_overrides[get_async_db] = override_get_db
+    return app, engine
+
+
+async def measure(app, url, ids: list[int], args) -> dict:
+    transport = httpx.ASGITransport(app=app)
+    rnd = random.Random(42)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as c:
+        return await run_load(
+            lambda i: c.get(url(rnd, ids)), args.requests, args.concurrency
+        )
+
+
+async def layer_cost(number: int = 100_000) -> float:
+    """Цена слоя на один запрос с одним SQL-запросом, в секундах"""
+
+    class Route:
+        path = "/api/students/{student_id}"
+
+    class Connection:
+        info = {}
+
+    async def endpoint(scope, receive, send):
+        scope["route"] = Route
+        _before_cursor_execute(Connection, None, "SELECT 1", (), None, False)
+        _after_cursor_execute(Connection, None, "SELECT 1", (), None, False)
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"{}"})
+
+    async def bare(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"{}"})
+
+    async def noop(message):
+        pass
+
+    timings = []
+    for app in (bare, MetricsMiddleware(endpoint, Metrics())):
+        started = time.perf_counter()
+        for _ in range(number):
+            await app({"type": "http", "method": "GET"}, None, noop)
+        timings.append((time.perf_counter() - started) / number)
+    return timings[1] - timings[0]
+
+
+async def main(args):
+    # При параллельной нагрузке запросы ждут соединение дольше SLOW_QUERY_MS,
+    # строки лога здесь только мешают
+    logging.getLogger("metrics").setLevel(logging.ERROR)
+    with temp_database() as path:
+        ids = seed(path, args.students)
+        apps = {
+            "без метрик": build_app(path, False),
+            "с метриками": build_app(path, True),
+        }
+        cost = await layer_cost()
+        print(f"цена слоя метрик: {cost * 1e6:.1f} мкс на запрос")
+        print(
+            f"{'сценарий':<30}{'вариант':<14}{'rps':>10}{'p50, мс':>10}{'p99, мс':>10}"
+        )
+        for scenario, url in SCENARIOS.items():
+            best = {}
+            for _ in range(args.rounds):
+                for name, (app, _) in apps.items():
+                    stats = await measure(app, url, ids, args)
+                    if name not in best or stats["rps"] > best[name]["rps"]:
+                        best[name] = stats
+            for name, stats in best.items():
+                print(
+                    f"{scenario:<30}{name:<14}{stats['rps']:>10.1f}"
+                    f"{stats['p50_ms']:>10.2f}{stats['p99_ms']:>10.2f}"
+                )
+            base, measured = best["без метрик"]["rps"], best["с метриками"]["rps"]
+            print(f"{'':<30}{'по rps':<14}{(base - measured) / base:>10.1%}")
+            print(f"{'':<30}{'цена слоя':<14}{cost * base:>10.1%}")
+        for _, engine in apps.values():
+            await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--students", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--rounds", type=int, default=5)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,62 @@
+"""Стоимость отдачи HTML-страницы: чтение с диска на каждый запрос
+против страницы из памяти с заранее сжатыми вариантами
+
+- disk: как раньше - open() и read() шаблона внутри обработчика;
+- memory: pages.page_store.response() для клиента без сжатия, с gzip и с br.
+
+Замер - время одного вызова обработчика без HTTP-сервера, плюс размер
+тела ответа в байтах.
+
+Запуск: python benchmarks/bench_pages.py --repeat 20000
+"""
+
+import argparse
+import os
+import timeit
+
+# utils добавляет корень проекта в sys.path, поэтому импортируется первым
+from utils import project_root
+
+from fastapi.responses import HTMLResponse
+from starlette.requests import Request
+
+from pages import PAGES, TEMPLATES_DIR, page_store
+
+
+def disk_page(name: str) -> HTMLResponse:
+    """Обработчик страницы до загрузки в память"""
+    try:
+        with open(os.path.join(TEMPLATES_DIR, f"{name}.html"), encoding="utf-8") as f:
+            return HTMLResponse(content=f.read())
+    except FileNotFoundError:
+        return HTMLResponse(content=PAGES[name])
+
+
+def make_request(accept_encoding: str) -> Request:
+    headers = [(b"accept-encoding", accept_encoding.encode())]
+    return Request({"type": "http", "method": "GET", "headers": headers})
+
+
+def main(args):
+    page_store.load_all()
+    print(
+        f"шаблоны: {os.path.relpath(TEMPLATES_DIR, project_root)}, {args.repeat} вызовов"
+    )
+    print(f"{'страница':<14}{'вариант':<10}{'мкс/запрос':>12}{'байт':>10}")
+    for name in PAGES:
+        scenarios = [("disk", lambda: disk_page(name))]
+        for encoding in ("identity", "gzip", "br"):
+            request = make_request(encoding)
+            scenarios.append((encoding, lambda r=request: page_store.response(name, r)))
+        for label, handler in scenarios:
+            seconds = min(timeit.repeat(handler, number=args.repeat, repeat=3))
+            size = len(handler().body)
+            print(
+                f"{name:<14}{label:<10}{seconds / args.repeat * 1e6:>12.2f}{size:>10}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20_000)
+    main(parser.parse_args())
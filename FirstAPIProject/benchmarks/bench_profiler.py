@@ -0,0 +1,100 @@
+"""Цена профилирования: нагрузка на приложение с работающим сэмплером и без
+
+Сэмплер profiler.py снимает стек потока event loop, в котором идут
+запросы (как GET /api/admin/profile под нагрузкой). Интервалы --intervals
+в мс; "без профайлера" - тот же прогон без сэмплера. Варианты чередуются
+--rounds раз, берется лучший прогон. В конце печатаются самые частые
+стеки последнего профиля.
+
+Запуск: python benchmarks/bench_profiler.py --requests 2000 --intervals 5 1
+"""
+
+import argparse
+import asyncio
+import logging
+import threading
+
+# utils добавляет корень проекта в sys.path, поэтому импортируется первым
+from utils import print_table, run_load, temp_database
+
+import httpx
+from sqlalchemy import create_engine, insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+import profiler
+from database import Base, Student, get_async_db
+from main import app
+
+
+def seed(path: str, students: int):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(
+            insert(Student),
+            [
+                {"first_name": "Bench", "last_name": f"Student{i}", "age": 20}
+                for i in range(students)
+            ],
+        )
+    engine.dispose()
+
+
+async def measure(client, interval: float | None, args):
+    sampler = None
+    if interval is not None:
+        sampler = profiler.Sampler(threading.get_ident(), interval)
+        sampler.start()
+    try:
+        stats = await run_load(
+            lambda i: client.get("/api/students/?limit=50"),
+            args.requests,
+            args.concurrency,
+        )
+    finally:
+        if sampler is not None:
+            sampler.stop()
+    return stats, sampler
+
+
+async def main(args):
+    # Медленные запросы под параллельной нагрузкой здесь ожидаемы
+    logging.getLogger("metrics").setLevel(logging.ERROR)
+    with temp_database() as path:
+        seed(path, args.students)
+        engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+        sessions = async_sessionmaker(bind=engine, expire_on_commit=False)
+
+        async def override_get_db():
+            async with sessions() as db:
+                yield db
+
+        app.dependency_overrides[get_async_db] = override_get_db
+        variants = [("без профайлера", None)] + [
+            (f"сэмплер {ms:g} мс", ms / 1000) for ms in args.intervals
+        ]
+        best: dict[str, dict] = {}
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://b") as c:
+            for _ in range(args.rounds):
+                for name, interval in variants:
+                    stats, sampler = await measure(c, interval, args)
+                    if name not in best or stats["rps"] > best[name]["rps"]:
+                        best[name] = stats
+        app.dependency_overrides.clear()
+        await engine.dispose()
+
+    print_table([(name, best[name]) for name, _ in variants])
+    print(f"\nснимков в последнем профиле: {sampler.samples}")
+    for stack, count in sampler.stacks.most_common(3):
+        print(f"{count:>6}  ...{stack[-150:]}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--students", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--intervals", type=float, nargs="+", default=[5.0, 1.0])
+    parser.add_argument("--rounds", type=int, default=3)
+    asyncio.run(main(parser.parse_args()))
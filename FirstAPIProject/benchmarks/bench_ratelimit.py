@@ -0,0 +1,132 @@
+"""Всплеск записей на курсы с допуском к БД (ratelimit.py) и без него
+
+server.py на копии данных datagen принимает --requests запросов
+POST /api/enroll/ с --concurrency одновременных соединений. Без допуска
+все запросы сразу идут к пулу и блокировке записи SQLite, и время ответа
+растет у всех вместе. С допуском лишние запросы ждут в короткой очереди
+или сразу получают 503: время принятых запросов остается ограниченным.
+
+Кроме времени у клиента печатается время в сервере и в SQL из заголовка
+Server-Timing (metrics.py): на машине с малым числом ядер генератор
+нагрузки делит CPU с сервером, и время у клиента во многом его собственное.
+
+Запуск: python benchmarks/bench_ratelimit.py --requests 2000 --concurrency 64
+"""
+
+import argparse
+import asyncio
+import os
+import re
+import shutil
+import time
+
+# utils добавляет корень проекта в sys.path, поэтому импортируется первым
+from utils import free_port, percentile, start_server, temp_database
+
+import httpx
+
+from datagen import SPARE_PER_POOL, Dataset, cached_database
+
+SERVER_TIMING = re.compile(r"app;dur=([\d.]+), db;dur=([\d.]+)")
+
+CONFIGS = {
+    "без допуска": {"ADMISSION_CONCURRENCY": "0"},
+    "по умолчанию (пул)": {},
+    "enrollments.write=1": {
+        "ADMISSION_LIMITS": "enrollments.write=1",
+        "ADMISSION_QUEUE": "16",
+        "ADMISSION_QUEUE_TIMEOUT_MS": "500",
+    },
+}
+
+
+async def burst(port: int, dataset: Dataset, total: int, concurrency: int) -> dict:
+    latencies, app, db, statuses = [], [], [], {}
+    counter = iter(range(total))
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(
+        base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=60
+    ) as client:
+
+        async def worker():
+            for i in counter:
+                # Пары (запасной студент, курс) не повторяются
+                payload = {
+                    "student_id": dataset.spare_student("enroll", i % SPARE_PER_POOL),
+                    "course_id": i // SPARE_PER_POOL + 1,
+                }
+                started = time.perf_counter()
+                response = await client.post("/api/enroll/", json=payload)
+                status = response.status_code
+                statuses[status] = statuses.get(status, 0) + 1
+                if status < 400:
+                    latencies.append(time.perf_counter() - started)
+                    timing = SERVER_TIMING.search(response.headers["server-timing"])
+                    app.append(float(timing.group(1)))
+                    db.append(float(timing.group(2)))
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    shed = statuses.get(429, 0) + statuses.get(503, 0)
+    return {
+        "ok_rps": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "app_p50_ms": percentile(app, 50),
+        "app_p99_ms": percentile(app, 99),
+        "db_p99_ms": percentile(db, 99),
+        "shed": shed,
+        "errors": total - len(latencies) - shed,
+    }
+
+
+def main(args):
+    dataset = Dataset.for_scale(args.scale)
+    assert args.requests <= SPARE_PER_POOL * dataset.courses
+    source = cached_database(dataset)
+    results = []
+    for name, env in CONFIGS.items():
+        with temp_database() as path:
+            shutil.copyfile(source, path)
+            saved = dict(os.environ)
+            os.environ.update(env)
+            try:
+                port = free_port()
+                server = start_server(path, 1, port)
+            finally:
+                os.environ.clear()
+                os.environ.update(saved)
+            try:
+                stats = asyncio.run(
+                    burst(port, dataset, args.requests, args.concurrency)
+                )
+            finally:
+                server.terminate()
+                server.wait(timeout=60)
+        results.append((name, stats))
+
+    print(
+        f"{args.requests} x POST /api/enroll/, {args.concurrency} соединений, "
+        f"данные {args.scale}"
+    )
+    print("время, мс: у клиента / в сервере (app) / в SQL (db)")
+    print(
+        f"{'режим':<22}{'ok rps':>8}{'p50':>8}{'p99':>8}{'app p50':>9}"
+        f"{'app p99':>9}{'db p99':>8}{'отказ':>7}{'ошибки':>8}"
+    )
+    for name, stats in results:
+        print(
+            f"{name:<22}{stats['ok_rps']:>8.1f}{stats['p50_ms']:>8.0f}"
+            f"{stats['p99_ms']:>8.0f}{stats['app_p50_ms']:>9.0f}"
+            f"{stats['app_p99_ms']:>9.0f}{stats['db_p99_ms']:>8.1f}"
+            f"{stats['shed']:>7}{stats['errors']:>8}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", default="10k")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    main(parser.parse_args())
@@ -0,0 +1,181 @@
+"""Студенты курса и курсы студента на большой таблице записей
+
+БД заполняется --enrollments записями: --courses курсов, на каждый записаны
+все студенты (студентов = enrollments / courses). Триггеры счетчиков на время
+заполнения удаляются - они не участвуют в чтении, а вставку замедляют.
+Для случайных курсов/студентов и случайного курсора печатаются p50 и p99
+страницы (limit=50): сам SQL-запрос (sqlite3) и вызов crud целиком
+(aiosqlite + ORM), а также план запроса.
+
+Запуск: python benchmarks/bench_roster.py --enrollments 10000000
+"""
+
+import argparse
+import asyncio
+import random
+import sqlite3
+import time
+
+# utils добавляет корень проекта в sys.path, поэтому импортируется первым
+from utils import percentile, temp_database
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+import crud
+from database import Base, Course, Enrollment, Student
+
+LIMIT = 50
+
+
+def seed(path: str, students: int, courses: int) -> float:
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    engine.dispose()
+    conn = sqlite3.connect(path)
+    for (name,) in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'stats_%'"
+    ).fetchall():
+        conn.execute(f"DROP TRIGGER {name}")
+    started = time.perf_counter()
+    with conn:
+        conn.execute(
+            """WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n
+                WHERE i < ?)
+            INSERT INTO student (id, first_name, last_name, age, email, is_active)
+            SELECT i, 'Bench', 'Student', 18 + i % 50, 'student' || i || '@example.com', 1
+            FROM n""",
+            (students,),
+        )
+        conn.execute(
+            """WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n
+                WHERE i < ?)
+            INSERT INTO course (id, title, description, duration_hours, price)
+            SELECT i, 'Course ' || i, 'Bench course', 10, 100 FROM n""",
+            (courses,),
+        )
+        # Вставка по студентам: записи одного студента идут подряд, как в жизни
+        conn.execute(
+            """WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n
+                WHERE i < ?)
+            INSERT INTO enrollment (student_id, course_id)
+            SELECT student.i, course.id FROM n AS student, course""",
+            (students,),
+        )
+    conn.execute("ANALYZE")
+    conn.close()
+    return time.perf_counter() - started
+
+
+def roster_sql(course_id: int, after: int) -> str:
+    query = (
+        select(Student)
+        .join(Student.enrollments)
+        .where(Enrollment.course_id == course_id, Enrollment.student_id > after)
+        .order_by(Enrollment.student_id)
+        .limit(LIMIT + 1)
+    )
+    return str(
+        query.compile(dialect=sqlite.dialect(), compile_kwargs={"literal_binds": True})
+    )
+
+
+def schedule_sql(student_id: int, after: int) -> str:
+    query = (
+        select(Course)
+        .join(Course.enrollments)
+        .where(Enrollment.student_id == student_id, Enrollment.course_id > after)
+        .order_by(Enrollment.course_id)
+        .limit(LIMIT + 1)
+    )
+    return str(
+        query.compile(dialect=sqlite.dialect(), compile_kwargs={"literal_binds": True})
+    )
+
+
+def raw_timings(path: str, statements: list[str]) -> list[float]:
+    conn = sqlite3.connect(path)
+    timings = []
+    for statement in statements:
+        started = time.perf_counter()
+        conn.execute(statement).fetchall()
+        timings.append((time.perf_counter() - started) * 1000)
+    conn.close()
+    return timings
+
+
+async def crud_timings(path: str, calls: list) -> list[float]:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+    timings = []
+    async with sessions() as db:
+        for function, entity_id, after in calls:
+            started = time.perf_counter()
+            await function(db, entity_id, limit=LIMIT, after=after)
+            timings.append((time.perf_counter() - started) * 1000)
+            db.expunge_all()
+    await engine.dispose()
+    return timings
+
+
+def main(args):
+    rng = random.Random(0)
+    students = args.enrollments // args.courses
+    with temp_database() as path:
+        elapsed = seed(path, students, args.courses)
+        print(
+            f"записей: {students * args.courses}, студентов: {students}, "
+            f"курсов: {args.courses}, заполнение: {elapsed:.1f} с"
+        )
+        roster = [
+            (rng.randint(1, args.courses), rng.randint(0, students - LIMIT))
+            for _ in range(args.samples)
+        ]
+        schedule = [
+            (rng.randint(1, students), rng.randint(0, args.courses // 2))
+            for _ in range(args.samples)
+        ]
+        conn = sqlite3.connect(path)
+        for statement in (roster_sql(*roster[0]), schedule_sql(*schedule[0])):
+            plan = conn.execute("EXPLAIN QUERY PLAN " + statement).fetchall()
+            print("план:", " | ".join(row[3] for row in plan))
+        conn.close()
+
+        print(f"{'запрос':<28}{'p50, мс':>10}{'p99, мс':>10}")
+        for name, timings in (
+            (
+                "студенты курса, SQL",
+                raw_timings(path, [roster_sql(*c) for c in roster]),
+            ),
+            (
+                "студенты курса, crud",
+                asyncio.run(
+                    crud_timings(path, [(crud.get_course_students, *c) for c in roster])
+                ),
+            ),
+            (
+                "курсы студента, SQL",
+                raw_timings(path, [schedule_sql(*c) for c in schedule]),
+            ),
+            (
+                "курсы студента, crud",
+                asyncio.run(
+                    crud_timings(
+                        path, [(crud.get_student_courses, *c) for c in schedule]
+                    )
+                ),
+            ),
+        ):
+            print(
+                f"{name:<28}{percentile(timings, 50):>10.3f}"
+                f"{percentile(timings, 99):>10.3f}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--enrollments", type=int, default=10_000_000)
+    parser.add_argument("--courses", type=int, default=100)
+    parser.add_argument("--samples", type=int, default=1000)
+    main(parser.parse_args())
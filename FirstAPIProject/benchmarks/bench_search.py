@@ -0,0 +1,128 @@
+"""Поиск студентов: FTS5 (crud.search_students) против LIKE '%term%'
+
+БД заполняется --students студентами со случайными именами и email,
+индекс FTS5 ведут триггеры из database.py. Для каждого запроса печатается
+время первой страницы (limit=50) обоими способами и число совпадений.
+LIKE - прежний способ без индекса: полный просмотр трех столбцов.
+
+Запуск: python benchmarks/bench_search.py --students 1000000
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import time
+
+# utils добавляет корень проекта в sys.path, поэтому импортируется первым
+from utils import temp_database
+
+from sqlalchemy import create_engine, func, insert, or_, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+import crud
+from database import Base, Student
+
+FIRST_NAMES = ["Ivan", "Anna", "Petr", "Maria", "Oleg", "Elena", "Sergey", "Olga"]
+LAST_NAMES = ["Smirnov", "Ivanova", "Kuznetsov", "Popova", "Sokolov", "Lebedeva"]
+# Частое слово, редкое слово, префикс и два слова
+QUERIES = ["ivanova", "student123456", "kuzn", "olga popova"]
+LIMIT = 50
+
+
+def seed(path: str, students: int) -> float:
+    rng = random.Random(0)
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    started = time.perf_counter()
+    with engine.begin() as conn:
+        for start in range(0, students, 50_000):
+            conn.execute(
+                insert(Student),
+                [
+                    {
+                        "first_name": rng.choice(FIRST_NAMES),
+                        "last_name": rng.choice(LAST_NAMES),
+                        "age": rng.randint(18, 60),
+                        "email": f"student{i}@example.com",
+                    }
+                    for i in range(start, min(start + 50_000, students))
+                ],
+            )
+    engine.dispose()
+    return time.perf_counter() - started
+
+
+def like_statement(text: str):
+    """Подстрока в любом из столбцов; все слова обязательны"""
+    statement = select(Student)
+    for word in text.split():
+        pattern = f"%{word}%"
+        statement = statement.where(
+            or_(
+                Student.first_name.like(pattern),
+                Student.last_name.like(pattern),
+                Student.email.like(pattern),
+            )
+        )
+    return statement
+
+
+async def timed(coro) -> tuple[float, object]:
+    started = time.perf_counter()
+    result = await coro
+    return (time.perf_counter() - started) * 1000, result
+
+
+async def run(path: str, repeat: int):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+    print(
+        f"{'запрос':<16}{'FTS5, мс':>10}{'LIKE, мс':>10}"
+        f"{'FTS5 всего':>12}{'LIKE всего':>12}"
+    )
+    async with sessions() as db:
+        for text in QUERIES:
+            fts_ms = like_ms = float("inf")
+            for _ in range(repeat):
+                elapsed, _ = await timed(crud.search_students(db, text, LIMIT))
+                fts_ms = min(fts_ms, elapsed)
+                statement = like_statement(text).order_by(Student.id).limit(LIMIT)
+                elapsed, _ = await timed(db.execute(statement))
+                like_ms = min(like_ms, elapsed)
+                db.expunge_all()
+            fts_total = await db.scalar(
+                select(func.count()).select_from(
+                    crud.search_statement(Student, text).subquery()
+                )
+            )
+            like_total = await db.scalar(
+                select(func.count()).select_from(like_statement(text).subquery())
+            )
+            print(
+                f"{text:<16}{fts_ms:>10.2f}{like_ms:>10.2f}"
+                f"{fts_total:>12}{like_total:>12}"
+            )
+    await engine.dispose()
+
+
+def main(args):
+    with temp_database() as path:
+        elapsed = seed(path, args.students)
+        size = sum(
+            os.path.getsize(path + suffix)
+            for suffix in ("", "-wal")
+            if os.path.exists(path + suffix)
+        )
+        print(
+            f"студентов: {args.students}, вставка с индексом: {elapsed:.1f} с, "
+            f"размер БД: {size / 2**20:.0f} МБ"
+        )
+        asyncio.run(run(path, args.repeat))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--students", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    main(parser.parse_args())
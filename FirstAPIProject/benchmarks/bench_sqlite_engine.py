@@ -0,0 +1,123 @@
+"""Конкурентные запись и чтение: движок по умолчанию против настроенного
+
+- default: create_async_engine без настроек (rollback journal,
+  synchronous=FULL, кэш 2 МБ) - так движок создавался раньше;
+- tuned: database.create_async_db_engine (WAL, synchronous=NORMAL,
+  cache_size, mmap_size, busy_timeout, пул по Settings).
+
+Писатели создают студентов по одному (commit на каждую запись), читатели
+параллельно запрашивают первую страницу списка студентов.
+
+Запуск: python benchmarks/bench_sqlite_engine.py --seconds 10 --writers 8 --readers 8
+"""
+
+import argparse
+import asyncio
+import time
+
+# utils добавляет корень проекта в sys.path, поэтому импортируется первым
+from utils import percentile, temp_database
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+import crud
+from config import Settings
+from database import Base, Student, create_async_db_engine
+from models import StudentCreate
+
+
+def seed(path: str, students: int):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(
+            insert(Student),
+            [
+                {"first_name": "Bench", "last_name": "Student", "age": 20}
+                for _ in range(students)
+            ],
+        )
+    engine.dispose()
+
+
+async def measure(engine, seconds: float, writers: int, readers: int) -> dict:
+    sessions = async_sessionmaker(bind=engine, expire_on_commit=False)
+    student = StudentCreate(first_name="Bench", last_name="Writer", age=30)
+    stats = {name: {"latencies": [], "errors": 0} for name in ("write", "read")}
+    deadline = time.perf_counter() + seconds
+
+    async def loop(name, operation):
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                async with sessions() as db:
+                    await operation(db)
+            except Exception:
+                stats[name]["errors"] += 1
+                continue
+            stats[name]["latencies"].append(time.perf_counter() - started)
+
+    async def write(db):
+        await crud.create_student(db, student)
+
+    async def read(db):
+        await crud.get_all_students(db, limit=50)
+
+    started = time.perf_counter()
+    await asyncio.gather(
+        *(loop("write", write) for _ in range(writers)),
+        *(loop("read", read) for _ in range(readers)),
+    )
+    elapsed = time.perf_counter() - started
+    await engine.dispose()
+    return {
+        name: {
+            "ops_per_sec": len(item["latencies"]) / elapsed,
+            "p50_ms": percentile(item["latencies"], 50) * 1000,
+            "p99_ms": percentile(item["latencies"], 99) * 1000,
+            "errors": item["errors"],
+        }
+        for name, item in stats.items()
+    }
+
+
+async def main(args):
+    results = []
+    for name in ("default", "tuned"):
+        with temp_database() as path:
+            seed(path, args.students)
+            if name == "default":
+                engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+            else:
+                settings = Settings(
+                    database_url=f"sqlite:///{path}",
+                    db_pool_size=args.writers + args.readers,
+                )
+                engine = create_async_db_engine(settings)
+            stats = await measure(engine, args.seconds, args.writers, args.readers)
+            results.append((name, stats))
+
+    print(
+        f"\nписателей: {args.writers}, читателей: {args.readers}, "
+        f"{args.seconds} с, студентов в таблице: {args.students}"
+    )
+    print(
+        f"{'движок':<10}{'операция':<10}{'ops/s':>10}{'p50, мс':>10}"
+        f"{'p99, мс':>10}{'ошибки':>8}"
+    )
+    for name, stats in results:
+        for operation, item in stats.items():
+            print(
+                f"{name:<10}{operation:<10}{item['ops_per_sec']:>10.1f}"
+                f"{item['p50_ms']:>10.2f}{item['p99_ms']:>10.2f}{item['errors']:>8}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--students", type=int, default=100_000)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,298 @@
+"""Набор бенчмарков API: все маршруты на синтетических данных, итог в JSON
+
+run - генерирует (или берет из кэша) данные datagen нужного масштаба,
+прогоняет сценарии scenarios.py по копии БД и пишет результат в JSON:
+rps, p50/p95/p99, ошибки, SQL-запросов на запрос (из Server-Timing,
+metrics.py) и пиковый RSS процесса приложения к концу сценария.
+- --mode asgi: приложение в этом же процессе через httpx.ASGITransport;
+- --mode uvicorn: server.py (uvicorn) отдельным процессом, запросы по TCP.
+
+compare - сравнивает два JSON (базовый и новый) и завершается с кодом 1,
+если rps упал или p95 вырос больше --threshold, SQL-запросов на запрос
+стало больше или появились ошибки. run --baseline сравнивает сразу.
+Базовый JSON имеет смысл снимать на той же машине и том же масштабе.
+
+Запуск:
+  python benchmarks/bench_suite.py run --scale 100k --output base.json
+  python benchmarks/bench_suite.py run --scale 100k --baseline base.json
+  python benchmarks/bench_suite.py compare base.json new.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import re
+import resource
+import shutil
+import sys
+import time
+from dataclasses import asdict
+
+# utils добавляет корень проекта в sys.path, поэтому импортируется первым
+from utils import free_port, run_load, start_server, temp_database
+
+import httpx
+
+from config import SCHEMA_READY_ENV, Settings
+from datagen import SCALES, Dataset, cached_database
+from scenarios import SCENARIOS, Scenario, uncovered_routes
+
+# Схема в копии БД уже есть: lifespan не создает таблицы в файле проекта
+os.environ.setdefault(SCHEMA_READY_ENV, "1")
+
+import database  # noqa: E402
+from main import app  # noqa: E402
+
+SERVER_TIMING_QUERIES = re.compile(r'desc="queries=(\d+)"')
+WARMUP_REQUESTS = 10
+
+
+def select_scenarios(only: list[str] | None) -> list[Scenario]:
+    if not only:
+        return SCENARIOS
+    return [s for s in SCENARIOS if any(s.name.startswith(p) for p in only)]
+
+
+def self_peak_rss_mb() -> float:
+    # ru_maxrss в Linux - КБ
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def server_peak_rss_mb(pid: int) -> float | None:
+    """Сумма VmHWM процесса сервера и его воркеров (только Linux)"""
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            pids = [pid, *map(int, f.read().split())]
+        total = 0
+        for process in pids:
+            with open(f"/proc/{process}/status") as f:
+                for line in f:
+                    if line.startswith("VmHWM:"):
+                        total += int(line.split()[1])
+        return total / 1024
+    except OSError:
+        return None
+
+
+async def run_scenario(
+    client: httpx.AsyncClient, scenario: Scenario, dataset: Dataset, args
+) -> dict:
+    total = args.requests
+    if scenario.max_requests is not None:
+        total = min(total, scenario.max_requests)
+    # Свой генератор на сценарий: последовательность запросов не зависит
+    # от набора и порядка остальных сценариев
+    rng = random.Random(f"{args.seed}:{scenario.name}")
+
+    def send(i: int):
+        return client.request(scenario.method, **scenario.build(i, rng, dataset))
+
+    if not scenario.write:
+        warmup = random.Random(f"warmup:{scenario.name}")
+        for i in range(min(WARMUP_REQUESTS, total)):
+            await client.request(scenario.method, **scenario.build(i, warmup, dataset))
+
+    queries = []
+
+    def count_queries(response: httpx.Response):
+        match = SERVER_TIMING_QUERIES.search(response.headers.get("server-timing", ""))
+        if match:
+            queries.append(int(match.group(1)))
+
+    stats = await run_load(send, total, args.concurrency, count_queries)
+    stats["queries_per_request"] = sum(queries) / len(queries) if queries else None
+    return stats
+
+
+async def run_all(client, scenarios, dataset, args, peak_rss) -> dict:
+    results = {}
+    for scenario in scenarios:
+        stats = await run_scenario(client, scenario, dataset, args)
+        stats["peak_rss_mb"] = peak_rss()
+        results[scenario.name] = stats
+        print(
+            f"{scenario.name:<24}{stats['rps']:>10.1f}{stats['p50_ms']:>10.2f}"
+            f"{stats['p95_ms']:>10.2f}{stats['p99_ms']:>10.2f}"
+            f"{_format(stats['queries_per_request']):>9}{stats['errors']:>8}",
+            flush=True,
+        )
+    return results
+
+
+async def run_asgi(path: str, scenarios, dataset, args) -> dict:
+    engine = database.create_async_db_engine(Settings(database_url=f"sqlite:///{path}"))
+    # get_async_db берет сессии отсюда: тот же путь, что и в приложении
+    database.AsyncSessionLocal = database.create_sessionmaker(engine)
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with app.router.lifespan_context(app):
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://bench", timeout=None
+            ) as client:
+                return await run_all(client, scenarios, dataset, args, self_peak_rss_mb)
+    finally:
+        await engine.dispose()
+
+
+async def run_uvicorn(path: str, scenarios, dataset, args) -> dict:
+    port = free_port()
+    server = start_server(path, args.workers, port)
+    limits = httpx.Limits(max_connections=args.concurrency)
+    try:
+        async with httpx.AsyncClient(
+            base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=None
+        ) as client:
+            return await run_all(
+                client,
+                scenarios,
+                dataset,
+                args,
+                lambda: server_peak_rss_mb(server.pid),
+            )
+    finally:
+        server.terminate()
+        server.wait(timeout=60)
+
+
+def run(args) -> int:
+    # Медленные запросы под параллельной нагрузкой здесь ожидаемы
+    logging.getLogger("metrics").setLevel(logging.ERROR)
+    missing = uncovered_routes(app)
+    if missing:
+        print("нет сценария для: " + ", ".join(missing), file=sys.stderr)
+
+    dataset = Dataset.for_scale(args.scale, args.seed)
+    source = cached_database(dataset, fresh=args.fresh)
+    scenarios = select_scenarios(args.only)
+    print(
+        f"{'сценарий':<24}{'rps':>10}{'p50, мс':>10}{'p95, мс':>10}"
+        f"{'p99, мс':>10}{'SQL/зап':>9}{'ошибки':>8}"
+    )
+    with temp_database() as path:
+        shutil.copyfile(source, path)
+        runner = run_asgi if args.mode == "asgi" else run_uvicorn
+        results = asyncio.run(runner(path, scenarios, dataset, args))
+
+    report = {
+        "meta": {
+            "mode": args.mode,
+            "scale": args.scale,
+            "seed": args.seed,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "workers": args.workers if args.mode == "uvicorn" else None,
+            "dataset": asdict(dataset),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        },
+        "scenarios": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\nрезультат: {args.output}")
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        print()
+        return 1 if compare(baseline, report, args.threshold) else 0
+    return 0
+
+
+def _format(value: float | None) -> str:
+    return "-" if value is None else f"{value:.1f}"
+
+
+def _change(old: float, new: float) -> float:
+    return (new - old) / old if old else 0.0
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> list[str]:
+    """Печатает сравнение и возвращает список регрессий"""
+    for key in ("mode", "scale", "concurrency"):
+        if baseline["meta"].get(key) != current["meta"].get(key):
+            print(
+                f"внимание: {key} различается: {baseline['meta'].get(key)} "
+                f"и {current['meta'].get(key)}"
+            )
+    regressions = []
+    print(
+        f"{'сценарий':<24}{'rps':>10}{'Δ rps':>9}{'p95, мс':>10}{'Δ p95':>10}"
+        f"{'SQL/зап':>13}  итог"
+    )
+    for name, new in current["scenarios"].items():
+        old = baseline["scenarios"].get(name)
+        if old is None:
+            print(f"{name:<24}{new['rps']:>10.1f}{'новый':>9}")
+            continue
+        rps_change = _change(old["rps"], new["rps"])
+        p95_change = _change(old["p95_ms"], new["p95_ms"])
+        problems = []
+        if rps_change < -threshold:
+            problems.append(f"rps {rps_change:+.0%}")
+        if p95_change > threshold:
+            problems.append(f"p95 {p95_change:+.0%}")
+        old_queries, new_queries = (
+            old["queries_per_request"],
+            new["queries_per_request"],
+        )
+        if old_queries is not None and new_queries is not None:
+            if new_queries > old_queries + 0.01:
+                problems.append(f"SQL {old_queries:.1f} -> {new_queries:.1f}")
+        if new["errors"] > old["errors"]:
+            problems.append(f"ошибки {old['errors']} -> {new['errors']}")
+        queries = f"{_format(old_queries)} -> {_format(new_queries)}"
+        print(
+            f"{name:<24}{new['rps']:>10.1f}{rps_change:>+9.1%}{new['p95_ms']:>10.2f}"
+            f"{p95_change:>+10.1%}{queries:>13}  {'; '.join(problems) or 'ok'}"
+        )
+        regressions.extend(f"{name}: {problem}" for problem in problems)
+    print(f"\nрегрессий: {len(regressions)} (порог {threshold:.0%})")
+    return regressions
+
+
+def compare_files(args) -> int:
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    with open(args.current, encoding="utf-8") as f:
+        current = json.load(f)
+    return 1 if compare(baseline, current, args.threshold) else 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="прогнать сценарии")
+    run_parser.add_argument("--scale", choices=SCALES, default="10k")
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--mode", choices=["asgi", "uvicorn"], default="asgi")
+    run_parser.add_argument("--workers", type=int, default=1)
+    run_parser.add_argument("--requests", type=int, default=200)
+    run_parser.add_argument("--concurrency", type=int, default=16)
+    run_parser.add_argument(
+        "--only", nargs="+", help="префиксы имен сценариев, например students. stats"
+    )
+    run_parser.add_argument("--fresh", action="store_true", help="пересоздать данные")
+    run_parser.add_argument("--output", help="куда записать JSON")
+    run_parser.add_argument("--baseline", help="JSON для сравнения")
+    run_parser.add_argument("--threshold", type=float, default=0.10)
+    run_parser.set_defaults(handler=run)
+
+    compare_parser = commands.add_parser("compare", help="сравнить два JSON")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.10)
+    compare_parser.set_defaults(handler=compare_files)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    sys.exit(args.handler(args))
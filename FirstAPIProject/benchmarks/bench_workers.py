@@ -0,0 +1,133 @@
+"""Масштабирование RPS по числу воркеров server.py
+
+Для каждого числа воркеров от 1 до --max-workers поднимается server.py
+на временной БД с одними и теми же данными, затем --clients процессов
+нагрузки в течение --seconds шлют GET-запросы (страница студентов,
+студент по id, статистика) с --concurrency соединениями каждый.
+Генератор нагрузки сам занимает ядра: на машине с малым числом ядер
+рост RPS упрется в него раньше, чем в сервер.
+
+Запуск: python benchmarks/bench_workers.py --max-workers 4 --seconds 10
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import time
+
+# utils добавляет корень проекта в sys.path, поэтому импортируется первым
+from utils import free_port, percentile, start_server, temp_database
+
+import httpx
+from sqlalchemy import create_engine, insert
+
+from database import Base, Student
+
+STUDENTS = 10_000
+
+
+def seed(path: str):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(
+            insert(Student),
+            [
+                {"first_name": "Bench", "last_name": "Student", "age": 20 + i % 50}
+                for i in range(STUDENTS)
+            ],
+        )
+    engine.dispose()
+
+
+async def client_load(port: int, seconds: float, concurrency: int, seed_id: int):
+    paths = [
+        "/api/students/?limit=50",
+        "/api/stats",
+        *(f"/api/students/{1 + (seed_id * 7919 + i) % STUDENTS}" for i in range(8)),
+    ]
+    latencies, errors = [], 0
+    deadline = time.perf_counter() + seconds
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(
+        base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=30
+    ) as client:
+
+        async def worker(offset: int):
+            nonlocal errors
+            i = offset
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                response = await client.get(paths[i % len(paths)])
+                latencies.append(time.perf_counter() - started)
+                if response.status_code >= 400:
+                    errors += 1
+                i += 1
+
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    return latencies, errors
+
+
+def run_client(args) -> tuple[list[float], int]:
+    return asyncio.run(client_load(*args))
+
+
+def measure(port: int, seconds: float, clients: int, concurrency: int) -> dict:
+    # Прогрев: кэши воркеров и соединения
+    run_client((port, 1, concurrency, 0))
+    with multiprocessing.Pool(clients) as pool:
+        started = time.perf_counter()
+        results = pool.map(
+            run_client, [(port, seconds, concurrency, i) for i in range(clients)]
+        )
+        elapsed = time.perf_counter() - started
+    latencies = [value for result, _ in results for value in result]
+    return {
+        "rps": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "errors": sum(errors for _, errors in results),
+    }
+
+
+def main(args):
+    results = []
+    with temp_database() as path:
+        seed(path)
+        for workers in range(1, args.max_workers + 1):
+            port = free_port()
+            server = start_server(path, workers, port)
+            try:
+                stats = measure(port, args.seconds, args.clients, args.concurrency)
+            finally:
+                server.terminate()
+                server.wait(timeout=60)
+            results.append((workers, stats))
+            print(f"воркеров: {workers}, rps: {stats['rps']:.0f}")
+
+    base = results[0][1]["rps"] or 1
+    print(
+        f"\nядер: {os.cpu_count()}, процессов нагрузки: {args.clients} "
+        f"x {args.concurrency} соединений, {args.seconds} с на замер"
+    )
+    print(
+        f"{'воркеров':<10}{'rps':>10}{'x к 1':>8}{'p50, мс':>10}"
+        f"{'p99, мс':>10}{'ошибки':>8}"
+    )
+    for workers, stats in results:
+        print(
+            f"{workers:<10}{stats['rps']:>10.1f}{stats['rps'] / base:>8.2f}"
+            f"{stats['p50_ms']:>10.2f}{stats['p99_ms']:>10.2f}{stats['errors']:>8}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument(
+        "--clients", type=int, default=max(1, (os.cpu_count() or 1) // 2)
+    )
+    parser.add_argument("--concurrency", type=int, default=16)
+    main(parser.parse_args())
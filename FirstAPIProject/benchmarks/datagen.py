@@ -0,0 +1,198 @@
+"""Синтетические данные для бенчмарков: student, course, enrollment
+
+Данные детерминированы (--seed) и заданы масштабом - числом записей на
+курсы, от 1k до 10m. На каждого студента приходится ENROLLMENTS_PER_STUDENT
+записей на разные курсы. Сверх этого создаются запасные студенты и курсы
+без записей: сценарии записи удаляют и записывают их, не трогая основные
+данные.
+
+Заполнение идет пачками через executemany без триггеров; затем
+database.SQLITE_DDL заново пересчитывает счетчики /api/stats, строит
+индексы поиска и возвращает триггеры. Готовая БД кэшируется во временном
+каталоге по масштабу, seed и схеме; бенчмарк работает с ее копией.
+
+Запуск: python benchmarks/datagen.py --scale 1m
+"""
+
+import argparse
+import hashlib
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from dataclasses import dataclass
+
+# utils добавляет корень проекта в sys.path, поэтому импортируется первым
+import utils  # noqa: F401
+
+from sqlalchemy import create_engine
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+from database import SQLITE_DDL, Base
+
+# Масштаб -> число записей на курсы
+SCALES = {
+    "1k": 1_000,
+    "10k": 10_000,
+    "100k": 100_000,
+    "1m": 1_000_000,
+    "10m": 10_000_000,
+}
+ENROLLMENTS_PER_STUDENT = 5
+# Запасные студенты и курсы для каждого пула сценариев записи
+SPARE_PER_POOL = 500
+SPARE_POOLS = ("delete", "enroll", "enroll_bulk", "enroll_update")
+CHUNK_SIZE = 50_000
+CACHE_DIR = os.path.join(tempfile.gettempdir(), "fastapi-bench-data")
+
+FIRST_NAMES = ["Ivan", "Anna", "Petr", "Maria", "Oleg", "Elena", "Sergey", "Olga"]
+LAST_NAMES = ["Smirnov", "Ivanova", "Kuznetsov", "Popova", "Sokolov", "Lebedeva"]
+TOPICS = ["Python", "FastAPI", "SQL", "Algorithms", "Networks", "Statistics"]
+LEVELS = ["Intro", "Practice", "Advanced"]
+WORDS = ["course", "about", "data", "systems", "design", "hands-on", "projects"]
+
+
+@dataclass(frozen=True)
+class Dataset:
+    """Размеры сгенерированных данных: основные id идут с 1, запасные -
+    сразу за ними, по SPARE_PER_POOL на каждый пул"""
+
+    scale: str
+    seed: int
+    students: int
+    courses: int
+    enrollments: int
+
+    @classmethod
+    def for_scale(cls, scale: str, seed: int = 0) -> "Dataset":
+        enrollments = SCALES[scale]
+        students = enrollments // ENROLLMENTS_PER_STUDENT
+        courses = max(20, enrollments // 2000)
+        return cls(scale, seed, students, courses, students * ENROLLMENTS_PER_STUDENT)
+
+    def spare_student(self, pool: str, i: int) -> int:
+        return self.students + SPARE_POOLS.index(pool) * SPARE_PER_POOL + i + 1
+
+    def spare_course(self, pool: str, i: int) -> int:
+        return self.courses + SPARE_POOLS.index(pool) * SPARE_PER_POOL + i + 1
+
+
+def schema_fingerprint() -> str:
+    """Хэш DDL таблиц и индексов: кэш БД устаревает вместе со схемой"""
+    dialect = sqlite.dialect()
+    statements = []
+    for table in Base.metadata.sorted_tables:
+        statements.append(str(CreateTable(table).compile(dialect=dialect)))
+        for index in sorted(table.indexes, key=lambda index: index.name):
+            statements.append(str(CreateIndex(index).compile(dialect=dialect)))
+    statements.extend(SQLITE_DDL)
+    return hashlib.sha1("\n".join(statements).encode()).hexdigest()[:12]
+
+
+def _chunks(rows, size: int = CHUNK_SIZE):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _students(rng: random.Random, count: int):
+    for i in range(1, count + 1):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        email = f"{first}.{last}{i}@example.com".lower()
+        yield (i, first, last, rng.randint(18, 60), email, rng.random() < 0.9)
+
+
+def _courses(rng: random.Random, count: int):
+    for i in range(1, count + 1):
+        title = f"{rng.choice(TOPICS)} {rng.choice(LEVELS)} {i}"
+        description = " ".join(rng.choices(WORDS, k=8))
+        yield (i, title, description, rng.choice([12, 24, 36, 72]), rng.randint(0, 500))
+
+
+def _enrollments(rng: random.Random, dataset: Dataset):
+    courses = range(1, dataset.courses + 1)
+    for student_id in range(1, dataset.students + 1):
+        for course_id in rng.sample(courses, ENROLLMENTS_PER_STUDENT):
+            yield (student_id, course_id)
+
+
+def generate(path: str, dataset: Dataset) -> float:
+    """Создает БД path с данными dataset; возвращает время заполнения, с"""
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    engine.dispose()
+
+    rng = random.Random(dataset.seed)
+    spare = len(SPARE_POOLS) * SPARE_PER_POOL
+    started = time.perf_counter()
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=OFF")
+    with conn:
+        for (name,) in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger'"
+        ).fetchall():
+            conn.execute(f"DROP TRIGGER {name}")
+        conn.execute("DELETE FROM stats_totals")
+        conn.execute("DELETE FROM course_stats")
+        for chunk in _chunks(_students(rng, dataset.students + spare)):
+            conn.executemany(
+                "INSERT INTO student (id, first_name, last_name, age, email,"
+                " is_active) VALUES (?, ?, ?, ?, ?, ?)",
+                chunk,
+            )
+        for chunk in _chunks(_courses(rng, dataset.courses + spare)):
+            conn.executemany(
+                "INSERT INTO course (id, title, description, duration_hours, price)"
+                " VALUES (?, ?, ?, ?, ?)",
+                chunk,
+            )
+        for chunk in _chunks(_enrollments(rng, dataset)):
+            conn.executemany(
+                "INSERT INTO enrollment (student_id, course_id) VALUES (?, ?)", chunk
+            )
+        for statement in SQLITE_DDL:
+            conn.execute(statement)
+    conn.execute("ANALYZE")
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conn.close()
+    return time.perf_counter() - started
+
+
+def cached_database(dataset: Dataset, fresh: bool = False) -> str:
+    """Путь к готовой БД для dataset (генерируется при первом обращении)"""
+    name = f"{dataset.scale}-seed{dataset.seed}-{schema_fingerprint()}.db"
+    path = os.path.join(CACHE_DIR, name)
+    if fresh or not os.path.exists(path):
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        partial = path + ".partial"
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(partial + suffix):
+                os.remove(partial + suffix)
+        elapsed = generate(partial, dataset)
+        os.replace(partial, path)
+        print(f"данные {name}: {dataset.enrollments} записей за {elapsed:.1f} с")
+    return path
+
+
+def main(args):
+    dataset = Dataset.for_scale(args.scale, args.seed)
+    path = cached_database(dataset, fresh=True)
+    print(
+        f"{path}: студентов {dataset.students}, курсов {dataset.courses}, "
+        f"записей {dataset.enrollments}, {os.path.getsize(path) / 2**20:.0f} МБ"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", choices=SCALES, default="10k")
+    parser.add_argument("--seed", type=int, default=0)
+    main(parser.parse_args())
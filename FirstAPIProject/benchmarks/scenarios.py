@@ -0,0 +1,368 @@
+"""Сценарии нагрузки для bench_suite.py: по сценарию на каждый маршрут API
+
+Сценарий строит i-й запрос из генератора случайных чисел и размеров
+данных (datagen.Dataset). Сначала идут чтения по исходным данным, затем
+записи: удаления и записи на курсы берут запасных студентов и курсы
+datagen, поэтому не конфликтуют друг с другом и не дают 404/409.
+"""
+
+import json
+import random
+from dataclasses import dataclass
+from typing import Callable
+
+from datagen import (
+    FIRST_NAMES,
+    LAST_NAMES,
+    LEVELS,
+    SPARE_PER_POOL,
+    TOPICS,
+    Dataset,
+)
+
+PAGE_LIMIT = 50
+BULK_SIZE = 100
+IMPORT_SIZE = 100
+
+
+@dataclass(frozen=True)
+class Scenario:
+    name: str
+    method: str
+    # Шаблон маршрута FastAPI: по нему проверяется покрытие API
+    route: str
+    # (i, rng, dataset) -> аргументы httpx.AsyncClient.request кроме метода
+    build: Callable[[int, random.Random, Dataset], dict]
+    # Потолок числа запросов (выгрузки тяжелые, запасных данных конечное число)
+    max_requests: int | None = None
+    write: bool = False
+
+
+def _student(rng: random.Random) -> dict:
+    return {
+        "first_name": rng.choice(FIRST_NAMES),
+        "last_name": rng.choice(LAST_NAMES),
+        "age": rng.randint(18, 60),
+        "email": f"bench{rng.randrange(10**9)}@example.com",
+    }
+
+
+def _course(rng: random.Random) -> dict:
+    return {
+        "title": f"{rng.choice(TOPICS)} {rng.choice(LEVELS)}",
+        "description": "Benchmark course",
+        "duration_hours": rng.choice([12, 24, 36]),
+        "price": rng.randint(0, 500),
+    }
+
+
+def _ndjson(rows: list[dict]) -> bytes:
+    return "".join(json.dumps(row) + "\n" for row in rows).encode()
+
+
+def _after(rng: random.Random, count: int) -> int:
+    return rng.randint(0, max(0, count - PAGE_LIMIT))
+
+
+def _get(url: Callable[[int, random.Random, Dataset], str]):
+    return lambda i, rng, d: {"url": url(i, rng, d)}
+
+
+def _student_id(rng, d):
+    return rng.randint(1, d.students)
+
+
+def _course_id(rng, d):
+    return rng.randint(1, d.courses)
+
+
+READS = [
+    Scenario(
+        "students.list",
+        "GET",
+        "/api/students/",
+        _get(lambda i, rng, d: f"/api/students/?after={_after(rng, d.students)}"),
+    ),
+    Scenario(
+        "students.get",
+        "GET",
+        "/api/students/{student_id}",
+        _get(lambda i, rng, d: f"/api/students/{_student_id(rng, d)}"),
+    ),
+    Scenario(
+        "students.search",
+        "GET",
+        "/api/students/search",
+        _get(lambda i, rng, d: f"/api/students/search?q={rng.choice(LAST_NAMES)[:4]}"),
+    ),
+    Scenario(
+        "students.courses",
+        "GET",
+        "/api/students/{student_id}/courses",
+        _get(lambda i, rng, d: f"/api/students/{_student_id(rng, d)}/courses"),
+    ),
+    Scenario(
+        "students.export",
+        "GET",
+        "/api/students/export",
+        _get(lambda i, rng, d: "/api/students/export"),
+        max_requests=3,
+    ),
+    Scenario(
+        "courses.list",
+        "GET",
+        "/api/courses/",
+        _get(lambda i, rng, d: f"/api/courses/?after={_after(rng, d.courses)}"),
+    ),
+    Scenario(
+        "courses.get",
+        "GET",
+        "/api/courses/{course_id}",
+        _get(lambda i, rng, d: f"/api/courses/{_course_id(rng, d)}"),
+    ),
+    Scenario(
+        "courses.search",
+        "GET",
+        "/api/courses/search",
+        _get(lambda i, rng, d: f"/api/courses/search?q={rng.choice(TOPICS)}"),
+    ),
+    Scenario(
+        "courses.students",
+        "GET",
+        "/api/courses/{course_id}/students",
+        _get(
+            lambda i, rng, d: f"/api/courses/{_course_id(rng, d)}/students"
+            f"?after={_after(rng, d.students)}"
+        ),
+    ),
+    Scenario(
+        "courses.export",
+        "GET",
+        "/api/courses/export",
+        _get(lambda i, rng, d: "/api/courses/export"),
+        max_requests=3,
+    ),
+    Scenario(
+        "enrollments.list",
+        "GET",
+        "/api/enrollments/",
+        _get(lambda i, rng, d: f"/api/enrollments/?after={_after(rng, d.enrollments)}"),
+    ),
+    Scenario(
+        "enrollments.detailed",
+        "GET",
+        "/api/enrollments/detailed/",
+        _get(
+            lambda i, rng, d: "/api/enrollments/detailed/"
+            f"?after={_after(rng, d.enrollments)}"
+        ),
+    ),
+    Scenario(
+        "enrollments.export",
+        "GET",
+        "/api/enrollments/export",
+        _get(lambda i, rng, d: "/api/enrollments/export"),
+        max_requests=3,
+    ),
+    Scenario("stats", "GET", "/api/stats", _get(lambda i, rng, d: "/api/stats")),
+    Scenario("health", "GET", "/api/health", _get(lambda i, rng, d: "/api/health")),
+    Scenario(
+        "health.live",
+        "GET",
+        "/api/health/live",
+        _get(lambda i, rng, d: "/api/health/live"),
+    ),
+    Scenario(
+        "health.ready",
+        "GET",
+        "/api/health/ready",
+        _get(lambda i, rng, d: "/api/health/ready"),
+    ),
+    Scenario("api.root", "GET", "/api/", _get(lambda i, rng, d: "/api/")),
+    Scenario(
+        "cache.stats",
+        "GET",
+        "/api/cache/stats",
+        _get(lambda i, rng, d: "/api/cache/stats"),
+    ),
+    Scenario("metrics", "GET", "/metrics", _get(lambda i, rng, d: "/metrics")),
+    Scenario("page.index", "GET", "/", _get(lambda i, rng, d: "/")),
+    Scenario(
+        "page.students", "GET", "/students/", _get(lambda i, rng, d: "/students/")
+    ),
+    Scenario("page.courses", "GET", "/courses/", _get(lambda i, rng, d: "/courses/")),
+    Scenario(
+        "page.enrollments",
+        "GET",
+        "/enrollments/",
+        _get(lambda i, rng, d: "/enrollments/"),
+    ),
+]
+
+WRITES = [
+    Scenario(
+        "students.create",
+        "POST",
+        "/api/students/",
+        lambda i, rng, d: {"url": "/api/students/", "json": _student(rng)},
+        write=True,
+    ),
+    Scenario(
+        "students.bulk",
+        "POST",
+        "/api/students/bulk",
+        lambda i, rng, d: {
+            "url": "/api/students/bulk",
+            "json": [_student(rng) for _ in range(BULK_SIZE)],
+        },
+        write=True,
+    ),
+    Scenario(
+        "students.import",
+        "POST",
+        "/api/students/import",
+        lambda i, rng, d: {
+            "url": f"/api/students/import?format=ndjson&import_id=bench-{i}",
+            "content": _ndjson([_student(rng) for _ in range(IMPORT_SIZE)]),
+        },
+        write=True,
+    ),
+    # После импорта: отчет bench-0 уже есть
+    Scenario(
+        "imports.progress",
+        "GET",
+        "/api/imports/{import_id}",
+        _get(lambda i, rng, d: "/api/imports/bench-0"),
+    ),
+    Scenario(
+        "students.update",
+        "PUT",
+        "/api/students/{student_id}",
+        lambda i, rng, d: {
+            "url": f"/api/students/{_student_id(rng, d)}",
+            "json": _student(rng),
+        },
+        write=True,
+    ),
+    Scenario(
+        "students.delete",
+        "DELETE",
+        "/api/students/{student_id}",
+        lambda i, rng, d: {"url": f"/api/students/{d.spare_student('delete', i)}"},
+        max_requests=SPARE_PER_POOL,
+        write=True,
+    ),
+    Scenario(
+        "courses.create",
+        "POST",
+        "/api/courses/",
+        lambda i, rng, d: {"url": "/api/courses/", "json": _course(rng)},
+        write=True,
+    ),
+    Scenario(
+        "courses.bulk",
+        "POST",
+        "/api/courses/bulk",
+        lambda i, rng, d: {
+            "url": "/api/courses/bulk",
+            "json": [_course(rng) for _ in range(BULK_SIZE)],
+        },
+        write=True,
+    ),
+    Scenario(
+        "courses.import",
+        "POST",
+        "/api/courses/import",
+        lambda i, rng, d: {
+            "url": "/api/courses/import?format=ndjson",
+            "content": _ndjson([_course(rng) for _ in range(IMPORT_SIZE)]),
+        },
+        write=True,
+    ),
+    Scenario(
+        "courses.update",
+        "PUT",
+        "/api/courses/{course_id}",
+        lambda i, rng, d: {
+            "url": f"/api/courses/{_course_id(rng, d)}",
+            "json": _course(rng),
+        },
+        write=True,
+    ),
+    Scenario(
+        "courses.delete",
+        "DELETE",
+        "/api/courses/{course_id}",
+        lambda i, rng, d: {"url": f"/api/courses/{d.spare_course('delete', i)}"},
+        max_requests=SPARE_PER_POOL,
+        write=True,
+    ),
+    Scenario(
+        "enrollments.create",
+        "POST",
+        "/api/enroll/",
+        lambda i, rng, d: {
+            "url": "/api/enroll/",
+            "json": {
+                "student_id": d.spare_student("enroll", i),
+                "course_id": _course_id(rng, d),
+            },
+        },
+        max_requests=SPARE_PER_POOL,
+        write=True,
+    ),
+    Scenario(
+        "enrollments.bulk",
+        "POST",
+        "/api/enroll/bulk",
+        lambda i, rng, d: {
+            "url": "/api/enroll/bulk",
+            "json": [
+                {"student_id": d.spare_student("enroll_bulk", i), "course_id": course}
+                for course in rng.sample(range(1, d.courses + 1), 5)
+            ],
+        },
+        max_requests=SPARE_PER_POOL,
+        write=True,
+    ),
+    # Изменяются записи с конца основного диапазона, удаляются - перед ними
+    Scenario(
+        "enrollments.update",
+        "PUT",
+        "/api/enrollments/{enrollment_id}/",
+        lambda i, rng, d: {
+            "url": f"/api/enrollments/{d.enrollments - i}/",
+            "json": {
+                "student_id": d.spare_student("enroll_update", i),
+                "course_id": _course_id(rng, d),
+            },
+        },
+        max_requests=SPARE_PER_POOL,
+        write=True,
+    ),
+    Scenario(
+        "enrollments.delete",
+        "DELETE",
+        "/api/enrollments/{enrollment_id}",
+        lambda i, rng, d: {
+            "url": f"/api/enrollments/{d.enrollments - SPARE_PER_POOL - i}"
+        },
+        max_requests=SPARE_PER_POOL,
+        write=True,
+    ),
+]
+
+SCENARIOS = READS + WRITES
+
+
+def uncovered_routes(app) -> list[str]:
+    """Маршруты из схемы API, для которых нет сценария"""
+    covered = {(scenario.method, scenario.route) for scenario in SCENARIOS}
+    missing = []
+    for route in app.routes:
+        if not getattr(route, "include_in_schema", False):
+            continue
+        for method in sorted(route.methods - {"HEAD"}):
+            if (method, route.path) not in covered:
+                missing.append(f"{method} {route.path}")
+    return missing
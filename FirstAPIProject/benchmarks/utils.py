@@ -0,0 +1,117 @@
+"""Общие помощники для нагрузочных бенчмарков"""
+
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+import httpx
+
+# Бенчмарки запускаются как скрипты, поэтому добавляем корень проекта в путь
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+
+def percentile(values: list[float], p: float) -> float:
+    """Перцентиль методом ближайшего ранга (p от 0 до 100)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, round(p / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+@contextmanager
+def temp_database():
+    """Путь к временному файлу SQLite, который удаляется после бенчмарка"""
+    directory = tempfile.mkdtemp(prefix="bench_")
+    path = os.path.join(directory, "bench.db")
+    try:
+        yield path
+    finally:
+        for suffix in ("", "-wal", "-shm", "-journal"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+        os.rmdir(directory)
+
+
+async def run_load(send, total: int, concurrency: int, on_response=None) -> dict:
+    """Выполняет total запросов с заданным параллелизмом
+
+    send(i) - корутина, возвращающая httpx.Response для i-го запроса;
+    on_response(response) вызывается для каждого ответа.
+    """
+    latencies: list[float] = []
+    errors = 0
+    counter = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            started = time.perf_counter()
+            response = await send(i)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+            if on_response is not None:
+                on_response(response)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "requests": total,
+        "errors": errors,
+        "rps": total / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(path: str, workers: int, port: int) -> subprocess.Popen:
+    """server.py (uvicorn) на БД path; возвращается, когда сервер отвечает"""
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{path}",
+        "WEB_CONCURRENCY": str(workers),
+        "HOST": "127.0.0.1",
+        "PORT": str(port),
+    }
+    server = subprocess.Popen(
+        [sys.executable, "server.py"],
+        cwd=project_root,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/api/health/live", timeout=1)
+            return server
+        except httpx.TransportError:
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError("server.py не запустился за 30 с")
+
+
+def print_table(rows: list[tuple[str, dict]]):
+    print(f"{'сценарий':<32}{'rps':>10}{'p50, мс':>10}{'p99, мс':>10}{'ошибки':>8}")
+    for name, stats in rows:
+        print(
+            f"{name:<32}{stats['rps']:>10.1f}{stats['p50_ms']:>10.2f}"
+            f"{stats['p99_ms']:>10.2f}{stats['errors']:>8}"
+        )
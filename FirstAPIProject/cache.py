@@ -0,0 +1,102 @@
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Callable
+
+# Сколько сущностей держит кэш и сколько секунд запись считается свежей
+CACHE_MAX_ITEMS = 10_000
+CACHE_TTL_SECONDS = 60.0
+
+
+class CacheBackend(ABC):
+    """Интерфейс хранилища кэша: строковые ключи, как в Redis,
+    чтобы локальный кэш можно было заменить на внешний"""
+
+    @abstractmethod
+    def get(self, key: str) -> Any | None: ...
+
+    @abstractmethod
+    def set(self, key: str, value: Any) -> None: ...
+
+    @abstractmethod
+    def delete(self, key: str) -> None: ...
+
+    @abstractmethod
+    def clear(self) -> None: ...
+
+    @abstractmethod
+    def stats(self) -> dict: ...
+
+
+class LRUCache(CacheBackend):
+    """Ограниченный LRU-кэш в памяти процесса с TTL на запись.
+
+    Кэш у каждого воркера свой: записи из других процессов его не
+    инвалидируют, устаревание ограничено TTL.
+    """
+
+    def __init__(
+        self,
+        max_items: int = CACHE_MAX_ITEMS,
+        ttl: float = CACHE_TTL_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_items = max_items
+        self.ttl = ttl
+        self.clock = clock
+        self._items: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> Any | None:
+        item = self._items.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+        expires_at, value = item
+        if expires_at <= self.clock():
+            del self._items[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._items.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        self._items[key] = (self.clock() + self.ttl, value)
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_items:
+            self._items.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        self._items.pop(key, None)
+
+    def clear(self) -> None:
+        self._items.clear()
+        self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def stats(self) -> dict:
+        return {
+            "backend": "lru",
+            "size": len(self._items),
+            "max_items": self.max_items,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+def entity_key(entity: str, entity_id: int, version: int = 0) -> str:
+    """Ключ с версией таблицы: после записи старые ключи перестают
+    совпадать и вытесняются сами, в том числе в других воркерах"""
+    return f"{entity}:{version}:{entity_id}"
+
+
+# Кэш сущностей для GET по id; crud инвалидирует его при записи
+entity_cache: CacheBackend = LRUCache()
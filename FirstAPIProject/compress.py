@@ -0,0 +1,230 @@
+"""Сжатие ответов: gzip, brotli и zstd по Accept-Encoding клиента.
+
+brotli и zstandard необязательны: без пакета кодировка просто не
+предлагается. Ответы меньше порога и уже сжатые (страницы из pages.py)
+пропускаются как есть. Большие тела сжимаются в потоке-исполнителе, чтобы
+не блокировать event loop, а сжатые формы ответов с ETag кэшируются.
+"""
+
+import asyncio
+import gzip
+import zlib
+from typing import Callable
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from cache import CacheBackend, LRUCache
+from config import Settings, get_settings
+
+try:
+    import brotli
+except ImportError:  # brotli необязателен
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # zstandard необязателен
+    zstandard = None
+
+# Тела не меньше этого размера сжимаются в отдельном потоке
+THREAD_THRESHOLD = 64 * 1024
+# Сжатые ответы с ETag: ключ - кодировка, уровень, ETag и адрес
+COMPRESSED_CACHE_ITEMS = 256
+COMPRESSED_CACHE_TTL_SECONDS = 300.0
+
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/x-ndjson", "xml")
+
+
+class _BrotliStream:
+    """Потоковый brotli с тем же интерфейсом, что у zlib.compressobj"""
+
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.finish()
+
+
+# Кодировка -> (сжатие тела целиком, потоковый компрессор) по уровню
+ENCODERS: dict[str, tuple[Callable, Callable]] = {
+    "gzip": (
+        lambda body, level: gzip.compress(body, compresslevel=level, mtime=0),
+        lambda level: zlib.compressobj(level, zlib.DEFLATED, 31),
+    ),
+}
+if brotli is not None:
+    ENCODERS["br"] = (
+        lambda body, level: brotli.compress(body, quality=level),
+        _BrotliStream,
+    )
+if zstandard is not None:
+    ENCODERS["zstd"] = (
+        lambda body, level: zstandard.ZstdCompressor(level=level).compress(body),
+        lambda level: zstandard.ZstdCompressor(level=level).compressobj(),
+    )
+
+# Порядок предпочтения сервера среди кодировок, которые принимает клиент
+PREFERRED = ("zstd", "br", "gzip")
+
+
+def accepted_encodings(header: str) -> set[str]:
+    """Кодировки из Accept-Encoding, кроме явно запрещенных q=0"""
+    encodings = set()
+    for item in header.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = params.strip().removeprefix("q=").strip()
+        if name and quality not in ("0", "0.0", "0.00", "0.000"):
+            encodings.add(name.strip().lower())
+    return encodings
+
+
+def choose_encoding(header: str, available=ENCODERS) -> str | None:
+    """Предпочтительная для сервера кодировка из принятых клиентом"""
+    accepted = accepted_encodings(header)
+    return next(
+        (e for e in PREFERRED if e in accepted and e in available and e in ENCODERS),
+        None,
+    )
+
+
+def compression_levels(settings: Settings) -> dict[str, int]:
+    return {
+        "gzip": settings.compression_gzip_level,
+        "br": settings.compression_brotli_quality,
+        "zstd": settings.compression_zstd_level,
+    }
+
+
+async def compress_body(body: bytes, encoding: str, level: int) -> bytes:
+    compress = ENCODERS[encoding][0]
+    if len(body) >= THREAD_THRESHOLD:
+        return await asyncio.to_thread(compress, body, level)
+    return compress(body, level)
+
+
+class CompressionMiddleware:
+    """ASGI-middleware сжатия ответов"""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        settings: Settings | None = None,
+        cache: CacheBackend | None = None,
+    ):
+        settings = settings or get_settings()
+        self.app = app
+        self.minimum_size = settings.compression_minimum_size
+        self.levels = compression_levels(settings)
+        self.cache = cache or LRUCache(
+            COMPRESSED_CACHE_ITEMS, COMPRESSED_CACHE_TTL_SECONDS
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        responder = _CompressionResponder(self, scope, send, encoding)
+        await self.app(scope, receive, responder)
+
+
+class _CompressionResponder:
+    """Обертка send одного ответа: решает по первому куску тела,
+    сжимать ли ответ, и сжимает его целиком или потоком"""
+
+    def __init__(self, middleware, scope: Scope, send: Send, encoding: str):
+        self.middleware = middleware
+        self.scope = scope
+        self.send = send
+        self.encoding = encoding
+        self.level = middleware.levels[encoding]
+        self.start: Message | None = None
+        self.stream = None
+        self.passthrough = False
+
+    async def __call__(self, message: Message):
+        if message["type"] == "http.response.start":
+            self.start = message
+            return
+        if message["type"] != "http.response.body":
+            await self.send(message)
+            return
+        if self.passthrough:
+            await self.send(message)
+        elif self.stream is not None:
+            await self._send_chunk(message)
+        else:
+            await self._first_body(message)
+
+    def _compressible(self, headers: MutableHeaders) -> bool:
+        content_type = headers.get("content-type", "")
+        return (
+            self.start["status"] == 200
+            and "content-encoding" not in headers
+            and any(kind in content_type for kind in COMPRESSIBLE_TYPES)
+        )
+
+    async def _first_body(self, message: Message):
+        headers = MutableHeaders(raw=self.start["headers"])
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if not self._compressible(headers) or (
+            not more_body and len(body) < self.middleware.minimum_size
+        ):
+            self.passthrough = True
+            await self.send(self.start)
+            await self.send(message)
+            return
+
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        # Сжатый ответ - другие байты: ETag становится слабым, и If-None-Match
+        # с ним по-прежнему совпадает (сравнение без учета W/)
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            headers["ETag"] = f"W/{etag}"
+
+        if more_body:
+            # Потоковый ответ (выгрузки): длина заранее неизвестна
+            del headers["Content-Length"]
+            self.stream = ENCODERS[self.encoding][1](self.level)
+            await self.send(self.start)
+            await self._send_chunk(message)
+            return
+
+        compressed = await self._compress(body, etag)
+        headers["Content-Length"] = str(len(compressed))
+        await self.send(self.start)
+        await self.send({"type": "http.response.body", "body": compressed})
+
+    async def _compress(self, body: bytes, etag: str | None) -> bytes:
+        if not etag:
+            return await compress_body(body, self.encoding, self.level)
+        query = self.scope.get("query_string", b"").decode()
+        key = f"{self.encoding}:{self.level}:{etag}:{self.scope['path']}?{query}"
+        compressed = self.middleware.cache.get(key)
+        if compressed is None:
+            compressed = await compress_body(body, self.encoding, self.level)
+            self.middleware.cache.set(key, compressed)
+        return compressed
+
+    async def _send_chunk(self, message: Message):
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if len(body) >= THREAD_THRESHOLD:
+            data = await asyncio.to_thread(self.stream.compress, body)
+        else:
+            data = self.stream.compress(body)
+        if not more_body:
+            data += self.stream.flush()
+        if data or not more_body:
+            await self.send(
+                {"type": "http.response.body", "body": data, "more_body": more_body}
+            )
@@ -0,0 +1,140 @@
+import mmap
+import os
+import struct
+import tempfile
+import time
+import uuid
+import zlib
+from email.utils import formatdate, parsedate_to_datetime
+
+from fastapi import Depends, HTTPException, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import get_async_db, reads_replica
+
+# Файл с версиями таблиц, общий для воркеров (создает server.py до fork)
+VERSIONS_FILE_ENV = "APP_VERSIONS_FILE"
+# Число ячеек под версии; таблицы, попавшие в одну ячейку, просто
+# инвалидируют друг друга чаще, чем нужно
+VERSION_SLOTS = 64
+_SLOT = struct.Struct("<Q")
+
+
+def create_versions_file() -> str:
+    """Файл для общих версий таблиц, который отображают в память воркеры"""
+    fd, path = tempfile.mkstemp(prefix="app_versions_")
+    with os.fdopen(fd, "wb") as f:
+        f.write(bytes(VERSION_SLOTS * _SLOT.size))
+    return path
+
+
+class TableVersions:
+    """Версии таблиц: crud обновляет их при каждой записи, по ним строятся
+    ETag, Last-Modified и ключи кэша сущностей без обращения к БД.
+
+    Версия - время последней записи в наносекундах (строго растет).
+    Без path версии живут в памяти процесса, а в ETag входит метка запуска,
+    чтобы ETag одного процесса не совпал с ETag другого. С path (файл из
+    create_versions_file) версии общие для всех воркеров: запись в одном
+    сразу меняет ETag и ключи кэша во всех.
+    """
+
+    def __init__(self, path: str | None = None):
+        self._started = time.time()
+        if path:
+            with open(path, "r+b") as f:
+                self._slots = mmap.mmap(f.fileno(), VERSION_SLOTS * _SLOT.size)
+            self.boot_id = format(zlib.crc32(path.encode()), "08x")
+        else:
+            self._slots = bytearray(VERSION_SLOTS * _SLOT.size)
+            self.boot_id = uuid.uuid4().hex[:8]
+
+    def _offset(self, table: str) -> int:
+        return zlib.crc32(table.encode()) % VERSION_SLOTS * _SLOT.size
+
+    def bump(self, *tables: str):
+        for table in tables:
+            offset = self._offset(table)
+            (current,) = _SLOT.unpack_from(self._slots, offset)
+            _SLOT.pack_into(self._slots, offset, max(current + 1, time.time_ns()))
+
+    def version(self, table: str) -> int:
+        return _SLOT.unpack_from(self._slots, self._offset(table))[0]
+
+    def etag(self, tables: tuple[str, ...]) -> str:
+        versions = "-".join(format(self.version(table), "x") for table in tables)
+        return f'"{self.boot_id}-{versions}"'
+
+    def last_modified(self, tables: tuple[str, ...]) -> float:
+        return max(self.version(table) / 1e9 or self._started for table in tables)
+
+
+table_versions = TableVersions(os.getenv(VERSIONS_FILE_ENV))
+
+
+def etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    # If-None-Match сравнивается слабо: префикс W/ не учитывается
+    tags = (tag.strip().removeprefix("W/") for tag in header.split(","))
+    return etag in tags
+
+
+def _not_modified_since(header: str, last_modified: float) -> bool:
+    try:
+        since = parsedate_to_datetime(header).timestamp()
+    except (TypeError, ValueError):
+        return False
+    # Last-Modified передается с точностью до секунды
+    return int(last_modified) <= since
+
+
+def conditional(*tables: str):
+    """Зависимость для GET-эндпоинтов, ответ которых зависит от таблиц
+    tables: выставляет ETag и Last-Modified, а на совпавший If-None-Match
+    (или If-Modified-Since без него) отвечает 304 до обращения к БД.
+
+    Подключается через dependencies=[...] в декораторе маршрута, такие
+    зависимости выполняются раньше параметров эндпоинта. Эндпоинты,
+    возвращающие Response напрямую, берут заголовки из результата
+    зависимости: FastAPI не переносит их в такой ответ сам.
+
+    Версии - это записи в основную БД. Если запрос читает с реплики, тело
+    может отставать от них, поэтому ETag и Last-Modified не выставляются
+    и 304 не отдается (без ETag и сжатая форма не кэшируется).
+    """
+
+    def check(
+        request: Request,
+        response: Response,
+        db: AsyncSession = Depends(get_async_db),
+    ):
+        if reads_replica(db):
+            headers = {"Cache-Control": "no-cache"}
+            response.headers.update(headers)
+            return headers
+        etag = table_versions.etag(tables)
+        headers = {
+            "ETag": etag,
+            "Last-Modified": formatdate(
+                table_versions.last_modified(tables), usegmt=True
+            ),
+            # Браузер хранит ответ, но каждый раз перепроверяет его
+            "Cache-Control": "no-cache",
+        }
+        if_none_match = request.headers.get("if-none-match")
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_none_match is not None:
+            not_modified = etag_matches(if_none_match, etag)
+        elif if_modified_since is not None:
+            not_modified = _not_modified_since(
+                if_modified_since, table_versions.last_modified(tables)
+            )
+        else:
+            not_modified = False
+        if not_modified:
+            raise HTTPException(status_code=304, headers=headers)
+        response.headers.update(headers)
+        return headers
+
+    return check
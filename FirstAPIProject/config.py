@@ -0,0 +1,175 @@
+import os
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+# Таблицы уже созданы (server.py до запуска воркеров): lifespan приложения
+# пропускает create_all
+SCHEMA_READY_ENV = "APP_SCHEMA_READY"
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+def _env_limits(name: str) -> dict[str, tuple[float, ...]]:
+    """ "a=20/40,b=5" -> {"a": (20.0, 40.0), "b": (5.0,)}"""
+    limits = {}
+    for item in os.getenv(name, "").split(","):
+        key, _, values = item.partition("=")
+        if key.strip():
+            limits[key.strip()] = tuple(float(value) for value in values.split("/"))
+    return limits
+
+
+def _rate_limits() -> dict[str, tuple[float, int]]:
+    # Без размера всплеска корзина вмещает секунду запросов
+    return {
+        key: (values[0], int(values[1] if len(values) > 1 else max(1, values[0])))
+        for key, values in _env_limits("RATE_LIMITS").items()
+    }
+
+
+@dataclass(frozen=True)
+class Settings:
+    """Настройки приложения из переменных окружения (значения по умолчанию
+    подходят для локального запуска с файлом SQLite рядом с проектом)"""
+
+    database_url: str = field(
+        default_factory=lambda: os.getenv(
+            "DATABASE_URL", "sqlite:///student_management.db"
+        )
+    )
+    # Реплики только для чтения, через запятую; пусто - все идет в основную БД
+    database_replica_urls: tuple[str, ...] = field(
+        default_factory=lambda: tuple(
+            url.strip()
+            for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",")
+            if url.strip()
+        )
+    )
+    # Сколько секунд после записи клиент читает из основной БД
+    db_replica_sticky_seconds: int = field(
+        default_factory=lambda: _env_int("DB_REPLICA_STICKY_SECONDS", 5)
+    )
+    # Логировать каждый SQL-запрос (медленно, только для отладки)
+    db_echo: bool = field(default_factory=lambda: _env_bool("DB_ECHO", False))
+    # Пул соединений (для файловой SQLite и серверных СУБД)
+    db_pool_size: int = field(default_factory=lambda: _env_int("DB_POOL_SIZE", 5))
+    db_max_overflow: int = field(
+        default_factory=lambda: _env_int("DB_MAX_OVERFLOW", 10)
+    )
+    db_pool_timeout: int = field(
+        default_factory=lambda: _env_int("DB_POOL_TIMEOUT", 30)
+    )
+    db_pool_recycle: int = field(
+        default_factory=lambda: _env_int("DB_POOL_RECYCLE", 1800)
+    )
+    # PRAGMA для SQLite, выполняются на каждом новом соединении
+    sqlite_journal_mode: str = field(
+        default_factory=lambda: os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+    )
+    sqlite_synchronous: str = field(
+        default_factory=lambda: os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+    )
+    sqlite_cache_size_kb: int = field(
+        default_factory=lambda: _env_int("SQLITE_CACHE_SIZE_KB", 64 * 1024)
+    )
+    sqlite_mmap_size: int = field(
+        default_factory=lambda: _env_int("SQLITE_MMAP_SIZE", 256 * 1024 * 1024)
+    )
+    sqlite_busy_timeout_ms: int = field(
+        default_factory=lambda: _env_int("SQLITE_BUSY_TIMEOUT_MS", 5000)
+    )
+
+    # Сервер (server.py). Воркеров по умолчанию - по числу ядер
+    host: str = field(default_factory=lambda: os.getenv("HOST", "0.0.0.0"))
+    port: int = field(default_factory=lambda: _env_int("PORT", 8000))
+    workers: int = field(
+        default_factory=lambda: _env_int("WEB_CONCURRENCY", os.cpu_count() or 1)
+    )
+    keep_alive_seconds: int = field(
+        default_factory=lambda: _env_int("KEEP_ALIVE_SECONDS", 15)
+    )
+    backlog: int = field(default_factory=lambda: _env_int("BACKLOG", 2048))
+    # Сверх этого числа соединений на воркер сервер отвечает 503
+    limit_concurrency: int = field(
+        default_factory=lambda: _env_int("LIMIT_CONCURRENCY", 1000)
+    )
+    graceful_shutdown_seconds: int = field(
+        default_factory=lambda: _env_int("GRACEFUL_SHUTDOWN_SECONDS", 30)
+    )
+    # Строка лога на каждый запрос заметно снижает RPS
+    access_log: bool = field(default_factory=lambda: _env_bool("ACCESS_LOG", False))
+    # Сжатие ответов (compress.py): ответы меньше порога идут как есть
+    compression_minimum_size: int = field(
+        default_factory=lambda: _env_int("COMPRESSION_MINIMUM_SIZE", 1024)
+    )
+    # Уровни подобраны под сжатие на каждый запрос: быстрее максимальных
+    compression_gzip_level: int = field(
+        default_factory=lambda: _env_int("COMPRESSION_GZIP_LEVEL", 6)
+    )
+    compression_brotli_quality: int = field(
+        default_factory=lambda: _env_int("COMPRESSION_BROTLI_QUALITY", 4)
+    )
+    compression_zstd_level: int = field(
+        default_factory=lambda: _env_int("COMPRESSION_ZSTD_LEVEL", 3)
+    )
+    # Списки через fastjson: строки выборки сразу в orjson, без валидации
+    # каждой записи через response_model
+    fast_json: bool = field(default_factory=lambda: _env_bool("FAST_JSON", False))
+    # Метрики запросов и SQL (metrics.py, GET /metrics) и заголовок Server-Timing
+    metrics_enabled: bool = field(default_factory=lambda: _env_bool("METRICS", True))
+    # SQL-запросы дольше порога пишутся в лог
+    slow_query_ms: int = field(default_factory=lambda: _env_int("SLOW_QUERY_MS", 100))
+    # Профайлер (profiler.py, /api/admin/profile): пустой токен - выключен
+    profiler_token: str = field(default_factory=lambda: os.getenv("PROFILER_TOKEN", ""))
+    # Проверка готовности (health.py): таймаут ping БД и время жизни отчета
+    health_db_timeout_ms: int = field(
+        default_factory=lambda: _env_int("HEALTH_DB_TIMEOUT_MS", 1000)
+    )
+    health_cache_ms: int = field(
+        default_factory=lambda: _env_int("HEALTH_CACHE_MS", 2000)
+    )
+    # Лимит частоты на клиента и маршрут (ratelimit.py): "группа=rps/всплеск"
+    # через запятую, группа - роутер (students, courses, enrollments, stats),
+    # "группа.read"/"группа.write" - только чтение или запись
+    rate_limits: dict[str, tuple[float, int]] = field(default_factory=_rate_limits)
+    # Одновременных запросов к БД на воркер: по умолчанию столько, сколько
+    # соединений может выдать пул; 0 - без лимита
+    admission_concurrency: int = field(
+        default_factory=lambda: _env_int(
+            "ADMISSION_CONCURRENCY",
+            _env_int("DB_POOL_SIZE", 5) + _env_int("DB_MAX_OVERFLOW", 10),
+        )
+    )
+    # Лимиты групп: "группа=N" через запятую, ключи как в RATE_LIMITS
+    admission_limits: dict[str, int] = field(
+        default_factory=lambda: {
+            key: int(values[0])
+            for key, values in _env_limits("ADMISSION_LIMITS").items()
+        }
+    )
+    # Сколько запросов сверх лимита ждут место и сколько миллисекунд
+    admission_queue: int = field(
+        default_factory=lambda: _env_int("ADMISSION_QUEUE", 64)
+    )
+    admission_queue_timeout_ms: int = field(
+        default_factory=lambda: _env_int("ADMISSION_QUEUE_TIMEOUT_MS", 2000)
+    )
+    # Режим разработки: перечитывать templates/*.html при изменении
+    templates_watch: bool = field(
+        default_factory=lambda: _env_bool("TEMPLATES_WATCH", False)
+    )
+
+
+@lru_cache
+def get_settings() -> Settings:
+    return Settings()
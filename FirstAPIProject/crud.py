@@ -1,12 +1,106 @@
-from http.client import HTTPException
-
-from sqlalchemy.orm import Session
-from sqlalchemy import select
-from database import Student, Course, Enrollment, get_db
+import re
+
+from sqlalchemy import (
+    Select,
+    and_,
+    column,
+    func,
+    insert,
+    literal_column,
+    or_,
+    select,
+    table,
+)
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import Student, Course, Enrollment, StatsTotals, CourseStats
+from database import replica_read, SEARCH_INDEXES
 from models import StudentCreate, CourseCreate, EnrollmentCreate
+from models import Student as StudentSchema, Course as CourseSchema
+from models import Enrollment as EnrollmentSchema
+from cache import entity_cache, entity_key
+from conditional import table_versions
+from fastjson import schema_columns
+
+# Сколько строк уходит в один executemany при пакетной вставке
+BULK_CHUNK_SIZE = 1000
+# Сколько строк за раз читает серверный курсор при выгрузке
+EXPORT_BATCH_SIZE = 1000
+
+
+async def _paginate(
+    db: AsyncSession, query: Select, id_column, limit: int, after: int | None
+) -> tuple[list, int | None]:
+    """Keyset-пагинация по id: выбираем limit + 1 строк после курсора,
+    лишняя строка лишь сообщает, что есть следующая страница.
+
+    Для запроса из одной сущности возвращает объекты, иначе - кортежи,
+    в которых первой идёт сущность (или сам id при выборке столбцов),
+    по id которой строится курсор.
+    """
+    if after is not None:
+        query = query.where(id_column > after)
+    result = await db.execute(query.order_by(id_column).limit(limit + 1))
+    rows = result.all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        first = rows[-1][0]
+        next_cursor = first if isinstance(first, int) else first.id
+    # Одна сущность (select(Student)) - объекты; выборка столбцов для
+    # fastjson остается кортежами, даже если столбец один
+    expressions = [d["expr"] for d in query.column_descriptions]
+    if len(expressions) == 1 and isinstance(expressions[0], type):
+        rows = [row[0] for row in rows]
+    return rows, next_cursor
+
+
+def _chunks(items: list, size: int = BULK_CHUNK_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+async def _bulk_insert(db: AsyncSession, model, rows: list[dict]) -> list[int]:
+    """Вставляет строки пачками в текущей транзакции, id - в порядке rows.
+
+    sort_by_parameter_order не используется: без столбца-сентинела SQLite
+    откатывается на INSERT по одной строке. Id внутри одного многострочного
+    INSERT выдаются по возрастанию в порядке VALUES, поэтому достаточно
+    отсортировать RETURNING.
+    """
+    ids = []
+    query = insert(model).returning(model.id)
+    for chunk in _chunks(rows):
+        result = await db.execute(query, chunk)
+        ids.extend(sorted(result.scalars().all()))
+    return ids
+
+
+@replica_read
+async def stream_rows(db: AsyncSession, model, batch_size: int = EXPORT_BATCH_SIZE):
+    """Обходит таблицу модели серверным курсором и отдает пачки строк
+    (словари колонка -> значение), не держа в памяти больше одной пачки"""
+    query = (
+        select(*model.__table__.columns)
+        .order_by(model.id)
+        .execution_options(yield_per=batch_size)
+    )
+    result = await db.stream(query)
+    async for partition in result.mappings().partitions():
+        yield partition
+
 
+def _changed(model, entity_id: int | None = None):
+    """Вызывается после коммита записи в таблицу модели: меняет версию
+    таблицы (ETag и ключи кэша) и сразу убирает измененную сущность"""
+    table = model.__tablename__
+    if entity_id is not None:
+        version = table_versions.version(table)
+        entity_cache.delete(entity_key(table, entity_id, version))
+    table_versions.bump(table)
 
-def create_student(db: Session, student: StudentCreate) -> Student:
+
+async def create_student(db: AsyncSession, student: StudentCreate) -> Student:
     db_student = Student(
         first_name=student.first_name,
         last_name=student.last_name,
@@ -15,44 +109,102 @@ def create_student(db: Session, student: StudentCreate) -> Student:
         is_active=student.is_active,
     )
     db.add(db_student)
-    db.commit()
-    db.refresh(db_student)
+    await db.commit()
+    _changed(Student)
+    await db.refresh(db_student)
     return db_student
 
 
-def get_student(db: Session, student_id: int) -> Student | None:
-    return db.get(Student, student_id)
-
-
-def get_all_students(db: Session) -> list[Student]:
-    result = db.execute(select(Student))
-    return result.scalars().all()
-
-
-def update_student(
-    db: Session, student_id: int, student_data: StudentCreate
-) -> Student:
-    db_student = db.get(db, student_id)
+async def bulk_create_students(
+    db: AsyncSession, students: list[StudentCreate]
+) -> list[int]:
+    ids = await _bulk_insert(db, Student, [s.model_dump() for s in students])
+    await db.commit()
+    _changed(Student)
+    return ids
+
+
+async def _cached_get(db: AsyncSession, model, schema, entity_id: int):
+    """Чтение сущности по id через кэш: при попадании сессия не обращается
+    к БД (соединение не берется из пула), при промахе в кэш кладется
+    pydantic-схема, а не ORM-объект, привязанный к сессии"""
+    # Версия берется до чтения: запись, закоммиченная во время чтения,
+    # сменит версию, и прочитанная копия окажется под устаревшим ключом
+    table = model.__tablename__
+    key = entity_key(table, entity_id, table_versions.version(table))
+    cached = entity_cache.get(key)
+    if cached is not None:
+        return cached
+    obj = await db.get(model, entity_id)
+    if obj is None:
+        return None
+    cached = schema.model_validate(obj)
+    # Копия с реплики может отставать от версии в ключе: в кэше она
+    # вернулась бы и клиенту, который только что писал (info["primary"])
+    if "replica" not in db.info:
+        entity_cache.set(key, cached)
+    return cached
+
+
+@replica_read
+async def get_student(db: AsyncSession, student_id: int) -> StudentSchema | None:
+    return await _cached_get(db, Student, StudentSchema, student_id)
+
+
+@replica_read
+async def get_all_students(
+    db: AsyncSession,
+    limit: int,
+    after: int | None = None,
+    is_active: bool | None = None,
+    min_age: int | None = None,
+    max_age: int | None = None,
+    as_rows: bool = False,
+    fields: list[str] | None = None,
+) -> tuple[list[Student], int | None]:
+    # as_rows: кортежи столбцов схемы (или только fields) для fastjson
+    query = (
+        select(*schema_columns(Student, StudentSchema, fields))
+        if as_rows
+        else select(Student)
+    )
+    if is_active is not None:
+        query = query.where(Student.is_active == is_active)
+    if min_age is not None:
+        query = query.where(Student.age >= min_age)
+    if max_age is not None:
+        query = query.where(Student.age <= max_age)
+    return await _paginate(db, query, Student.id, limit, after)
+
+
+async def update_student(
+    db: AsyncSession, student_id: int, student_data: StudentCreate
+) -> Student | None:
+    db_student = await db.get(Student, student_id)
+    if not db_student:
+        return None
     db_student.first_name = student_data.first_name
     db_student.last_name = student_data.last_name
     db_student.age = student_data.age
     db_student.email = student_data.email
     db_student.is_active = student_data.is_active
-    db.commit()
-    db.refresh(db_student)
+    await db.commit()
+    _changed(Student, student_id)
+    await db.refresh(db_student)
     return db_student
 
 
-def delete_student(db: Session, student_id: int) -> bool:
-    student = db.get(Student, student_id)
+async def delete_student(db: AsyncSession, student_id: int) -> bool:
+    student = await db.get(Student, student_id)
     if student:
-        db.delete(student)
-        db.commit()
+        await db.delete(student)
+        await db.commit()
+        _changed(Student, student_id)
         return True
     return False
 
 
-def create_course(db: Session, course: CourseCreate) -> Course:
+async def create_course(db: AsyncSession, course: CourseCreate) -> Course:
     db_course = Course(
         title=course.title,
         description=course.description,
@@ -60,111 +212,413 @@ def create_course(db: Session, course: CourseCreate) -> Course:
         price=course.price,
     )
     db.add(db_course)
-    db.commit()
-    db.refresh(db_course)
+    await db.commit()
+    _changed(Course)
+    await db.refresh(db_course)
     return db_course
 
 
-def get_course(db: Session, course_id: int) -> Course | None:
-    return db.get(Course, course_id)
-
-
-def get_all_courses(db: Session) -> list[Course]:
-    result = db.execute(select(Course))
-    return result.scalars().all()
-
-
-def update_course(db: Session, course_id: int, course_data: CourseCreate) -> Course:
-    db_course = db.get(Course, course_id)
+async def bulk_create_courses(
+    db: AsyncSession, courses: list[CourseCreate]
+) -> list[int]:
+    ids = await _bulk_insert(db, Course, [c.model_dump() for c in courses])
+    await db.commit()
+    _changed(Course)
+    return ids
+
+
+@replica_read
+async def get_course(db: AsyncSession, course_id: int) -> CourseSchema | None:
+    return await _cached_get(db, Course, CourseSchema, course_id)
+
+
+@replica_read
+async def get_all_courses(
+    db: AsyncSession,
+    limit: int,
+    after: int | None = None,
+    min_price: float | None = None,
+    max_price: float | None = None,
+    as_rows: bool = False,
+    fields: list[str] | None = None,
+) -> tuple[list[Course], int | None]:
+    # as_rows: кортежи столбцов схемы (или только fields) для fastjson
+    query = (
+        select(*schema_columns(Course, CourseSchema, fields))
+        if as_rows
+        else select(Course)
+    )
+    if min_price is not None:
+        query = query.where(Course.price >= min_price)
+    if max_price is not None:
+        query = query.where(Course.price <= max_price)
+    return await _paginate(db, query, Course.id, limit, after)
+
+
+async def update_course(
+    db: AsyncSession, course_id: int, course_data: CourseCreate
+) -> Course | None:
+    db_course = await db.get(Course, course_id)
+    if not db_course:
+        return None
     db_course.title = course_data.title
     db_course.description = course_data.description
     db_course.duration_hours = course_data.duration_hours
     db_course.price = course_data.price
-    db.commit()
-    db.refresh(db_course)
+    await db.commit()
+    _changed(Course, course_id)
+    await db.refresh(db_course)
     return db_course
 
 
-def delete_course(db: Session, course_id: int) -> bool:
-    course = db.get(Course, course_id)
+async def delete_course(db: AsyncSession, course_id: int) -> bool:
+    course = await db.get(Course, course_id)
     if course:
-        db.delete(course)
-        db.commit()
+        await db.delete(course)
+        await db.commit()
+        _changed(Course, course_id)
         return True
     return False
 
 
-def create_enrollment(db: Session, enrollment: EnrollmentCreate) -> Enrollment:
-    student = db.get(Student, enrollment.student_id)
-    course = db.get(Course, enrollment.course_id)
+async def create_enrollment(
+    db: AsyncSession, enrollment: EnrollmentCreate
+) -> Enrollment:
+    student = await db.get(Student, enrollment.student_id)
+    course = await db.get(Course, enrollment.course_id)
 
     if not student:
         raise ValueError("Student not found")
     if not course:
         raise ValueError("Course not found")
 
-    existing = db.execute(
-        select(Enrollment).where(
-            (Enrollment.student_id == enrollment.student_id)
-            & (Enrollment.course_id == enrollment.course_id)
-        )
-    ).scalar_one_or_none()
-
-    if existing:
-        raise ValueError("Enrollment already exists")
-
+    # Дубликаты отсекает UNIQUE(student_id, course_id): отдельный SELECT
+    # был бы медленнее и не спасал от гонки параллельных запросов
     db_enrollment = Enrollment(
         student_id=enrollment.student_id,
         course_id=enrollment.course_id,
     )
     db.add(db_enrollment)
-    db.commit()
-    db.refresh(db_enrollment)
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise ValueError("Enrollment already exists")
+    _changed(Enrollment)
+    await db.refresh(db_enrollment)
     return db_enrollment
 
 
-def get_enrollment(db: Session, enrollment_id: int) -> Enrollment | None:
-    return db.get(Enrollment, enrollment_id)
-
-
-def get_all_enrollments(db: Session) -> list[Enrollment]:
-    result = db.execute(select(Enrollment))
-    return result.scalars().all()
-
-
-def get_detailed_enrollments(db: Session) -> list[dict]:
-    enrollments = get_all_enrollments(db)
-    detailed = []
-
-    for enrollment in enrollments:
-        detailed.append(
-            {
-                "enrollment": enrollment,
-                "student": enrollment.student,
-                "course": enrollment.course,
-            }
+async def _existing_ids(db: AsyncSession, id_column, ids: set[int]) -> set[int]:
+    found = set()
+    for chunk in _chunks(list(ids)):
+        result = await db.execute(select(id_column).where(id_column.in_(chunk)))
+        found.update(result.scalars().all())
+    return found
+
+
+def _insert_ignoring_conflicts(db: AsyncSession, model):
+    """INSERT ... ON CONFLICT DO NOTHING для SQLite и PostgreSQL"""
+    # Диалекты импортируются по месту: пакет postgresql тянет все драйверы
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects import postgresql
+
+        return postgresql.insert(model).on_conflict_do_nothing()
+    if dialect == "sqlite":
+        from sqlalchemy.dialects import sqlite
+
+        return sqlite.insert(model).on_conflict_do_nothing()
+    return insert(model)
+
+
+async def bulk_create_enrollments(
+    db: AsyncSession, enrollments: list[EnrollmentCreate]
+) -> tuple[list[int | None], dict[int, str]]:
+    """Пакетная запись на курсы: возвращает id по позициям входного списка
+    (None для отклоненных) и ошибки по тем же позициям.
+
+    Пары, уже существующие в БД или повторяющиеся в пакете, отклоняются,
+    остальные вставляются одной транзакцией.
+    """
+    students = await _existing_ids(db, Student.id, {e.student_id for e in enrollments})
+    courses = await _existing_ids(db, Course.id, {e.course_id for e in enrollments})
+    taken = set()
+    for chunk in _chunks(list(students)):
+        result = await db.execute(
+            select(Enrollment.student_id, Enrollment.course_id).where(
+                Enrollment.student_id.in_(chunk)
+            )
         )
-    return detailed
+        taken.update(result.tuples().all())
+
+    errors = {}
+    pending = {}
+    for position, enrollment in enumerate(enrollments):
+        pair = (enrollment.student_id, enrollment.course_id)
+        if enrollment.student_id not in students:
+            errors[position] = "Student not found"
+        elif enrollment.course_id not in courses:
+            errors[position] = "Course not found"
+        elif pair in taken or pair in pending:
+            errors[position] = "Enrollment already exists"
+        else:
+            pending[pair] = position
+
+    # Пары, вставленные параллельным запросом между проверкой и INSERT,
+    # молча пропускаются СУБД и не попадают в RETURNING
+    created = {}
+    query = _insert_ignoring_conflicts(db, Enrollment).returning(
+        Enrollment.id, Enrollment.student_id, Enrollment.course_id
+    )
+    rows = [{"student_id": s, "course_id": c} for s, c in pending]
+    for chunk in _chunks(rows):
+        result = await db.execute(query, chunk)
+        for enrollment_id, student_id, course_id in result.tuples():
+            created[(student_id, course_id)] = enrollment_id
+    await db.commit()
+    _changed(Enrollment)
+
+    ids = [None] * len(enrollments)
+    for pair, position in pending.items():
+        if pair in created:
+            ids[position] = created[pair]
+        else:
+            errors[position] = "Enrollment already exists"
+    return ids, errors
+
+
+@replica_read
+async def get_enrollment(db: AsyncSession, enrollment_id: int) -> Enrollment | None:
+    return await db.get(Enrollment, enrollment_id)
+
+
+@replica_read
+async def get_all_enrollments(
+    db: AsyncSession,
+    limit: int,
+    after: int | None = None,
+    student_id: int | None = None,
+    course_id: int | None = None,
+    as_rows: bool = False,
+    fields: list[str] | None = None,
+) -> tuple[list[Enrollment], int | None]:
+    # as_rows: кортежи столбцов схемы (или только fields) для fastjson
+    query = (
+        select(*schema_columns(Enrollment, EnrollmentSchema, fields))
+        if as_rows
+        else select(Enrollment)
+    )
+    if student_id is not None:
+        query = query.where(Enrollment.student_id == student_id)
+    if course_id is not None:
+        query = query.where(Enrollment.course_id == course_id)
+    return await _paginate(db, query, Enrollment.id, limit, after)
+
+
+@replica_read
+async def get_detailed_enrollments(
+    db: AsyncSession, limit: int, after: int | None = None
+) -> tuple[list[tuple[Enrollment, Student, Course]], int | None]:
+    # Один JOIN-запрос вместо ленивой загрузки student/course для каждой записи
+    query = (
+        select(Enrollment, Student, Course)
+        .join(Enrollment.student)
+        .join(Enrollment.course)
+    )
+    return await _paginate(db, query, Enrollment.id, limit, after)
+
+
+@replica_read
+async def get_course_students(
+    db: AsyncSession, course_id: int, limit: int, after: int | None = None
+) -> tuple[list[Student], int | None]:
+    # Курсор по Enrollment.student_id: диапазон идет по покрывающему индексу
+    # (course_id, student_id) в порядке id, студенты берутся по первичному ключу
+    query = (
+        select(Student)
+        .join(Student.enrollments)
+        .where(Enrollment.course_id == course_id)
+    )
+    return await _paginate(db, query, Enrollment.student_id, limit, after)
+
+
+@replica_read
+async def get_student_courses(
+    db: AsyncSession, student_id: int, limit: int, after: int | None = None
+) -> tuple[list[Course], int | None]:
+    # Симметрично: уникальный индекс (student_id, course_id)
+    query = (
+        select(Course)
+        .join(Course.enrollments)
+        .where(Enrollment.student_id == student_id)
+    )
+    return await _paginate(db, query, Enrollment.course_id, limit, after)
 
 
-def update_enrollment(
-    db: Session, enrollment_id: int, enrollment_data: EnrollmentCreate
-) -> Enrollment:
-    db_enrollment = db.get(Enrollment, enrollment_id)
+async def update_enrollment(
+    db: AsyncSession, enrollment_id: int, enrollment_data: EnrollmentCreate
+) -> Enrollment | None:
+    db_enrollment = await db.get(Enrollment, enrollment_id)
+    if not db_enrollment:
+        return None
     db_enrollment.student_id = enrollment_data.student_id
     db_enrollment.course_id = enrollment_data.course_id
-    db.commit()
-    db.refresh(db_enrollment)
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise ValueError("Enrollment already exists")
+    _changed(Enrollment)
+    await db.refresh(db_enrollment)
     return db_enrollment
 
 
-def delete_enrollment(db: Session, enrollment_id: int) -> bool:
-    enrollment = db.get(Enrollment, enrollment_id)
+async def delete_enrollment(db: AsyncSession, enrollment_id: int) -> bool:
+    enrollment = await db.get(Enrollment, enrollment_id)
     if enrollment:
-        db.delete(enrollment)
-        db.commit()
+        await db.delete(enrollment)
+        await db.commit()
+        _changed(Enrollment)
         return True
     return False
 
 
-print("ORM crud operations created successfully")
+def _count(model, *where):
+    return select(func.count()).select_from(model).where(*where).scalar_subquery()
+
+
+async def _aggregate_stats(db: AsyncSession) -> dict:
+    """Статистика агрегатными запросами по самим таблицам"""
+    totals = (
+        await db.execute(
+            select(
+                _count(Student).label("students"),
+                _count(Student, Student.is_active).label("active_students"),
+                select(func.coalesce(func.sum(Student.age), 0))
+                .scalar_subquery()
+                .label("age_sum"),
+                _count(Course).label("courses"),
+                _count(Enrollment).label("enrollments"),
+                select(func.coalesce(func.sum(Course.price), 0.0))
+                .join(Enrollment, Enrollment.course_id == Course.id)
+                .scalar_subquery()
+                .label("revenue"),
+            )
+        )
+    ).one()
+    per_course = await db.execute(
+        select(Course.id, func.count(Enrollment.id))
+        .outerjoin(Enrollment, Enrollment.course_id == Course.id)
+        .group_by(Course.id)
+        .order_by(Course.id)
+    )
+    return _stats(totals, per_course.all())
+
+
+def _stats(totals, per_course) -> dict:
+    return {
+        "students": totals.students,
+        "active_students": totals.active_students,
+        "inactive_students": totals.students - totals.active_students,
+        "courses": totals.courses,
+        "enrollments": totals.enrollments,
+        "revenue": round(totals.revenue, 2),
+        "average_age": (
+            round(totals.age_sum / totals.students, 2) if totals.students else None
+        ),
+        "enrollments_per_course": [
+            {"course_id": course_id, "enrollments": enrollments}
+            for course_id, enrollments in per_course
+        ],
+    }
+
+
+@replica_read
+async def get_stats(db: AsyncSession) -> dict:
+    """Сводная статистика. В SQLite читается из счетчиков, которые ведут
+    триггеры (время не зависит от числа студентов и записей), в остальных
+    СУБД или без таблицы счетчиков - считается агрегатными запросами"""
+    totals = None
+    if db.get_bind().dialect.name == "sqlite":
+        totals = await db.get(StatsTotals, 1)
+    if totals is None:
+        return await _aggregate_stats(db)
+    per_course = await db.execute(
+        select(CourseStats.course_id, CourseStats.enrollments).order_by(
+            CourseStats.course_id
+        )
+    )
+    return _stats(totals, per_course.all())
+
+
+def search_words(text: str) -> list[str]:
+    """Слова запроса (буквы, цифры, _); остальное, в том числе синтаксис
+    FTS5, отбрасывается"""
+    return re.findall(r"\w+", text)
+
+
+def fts_query(text: str) -> str:
+    """Запрос FTS5 из пользовательской строки: каждое слово - префикс,
+    все слова обязательны"""
+    return " ".join(f'"{word}"*' for word in search_words(text))
+
+
+def like_pattern(word: str) -> str:
+    """Подстрока для LIKE ... ESCAPE '\\': % и _ ищутся как есть"""
+    escaped = word.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def search_statement(model, text: str, dialect: str = "sqlite") -> Select | None:
+    """Запрос поиска без пагинации; None, если в строке нет слов.
+
+    В SQLite - индекс FTS5 с сортировкой по bm25 (rank), на других СУБД -
+    подстрока в тех же столбцах по порядку id. В обоих случаях каждое
+    слово должно найтись хотя бы в одном столбце.
+    """
+    words = search_words(text)
+    if not words:
+        return None
+    table_name = model.__tablename__
+    if dialect == "sqlite":
+        fts = table(f"{table_name}_fts", column("rowid"), column("rank"))
+        return (
+            select(model)
+            .join(fts, fts.c.rowid == model.id)
+            .where(literal_column(fts.name).op("MATCH")(fts_query(text)))
+            .order_by(fts.c.rank, model.id)
+        )
+    columns = [getattr(model, name) for name in SEARCH_INDEXES[table_name]]
+    matches = [
+        or_(*(field.ilike(like_pattern(word), escape="\\") for field in columns))
+        for word in words
+    ]
+    return select(model).where(and_(*matches)).order_by(model.id)
+
+
+async def _search(
+    db: AsyncSession, model, text: str, limit: int, offset: int
+) -> tuple[list, int | None]:
+    statement = search_statement(model, text, db.get_bind().dialect.name)
+    if statement is None:
+        return [], None
+    result = await db.execute(statement.offset(offset).limit(limit + 1))
+    items = list(result.scalars().all())
+    if len(items) > limit:
+        return items[:limit], offset + limit
+    return items, None
+
+
+@replica_read
+async def search_students(
+    db: AsyncSession, text: str, limit: int, offset: int = 0
+) -> tuple[list[Student], int | None]:
+    return await _search(db, Student, text, limit, offset)
+
+
+@replica_read
+async def search_courses(
+    db: AsyncSession, text: str, limit: int, offset: int = 0
+) -> tuple[list[Course], int | None]:
+    return await _search(db, Course, text, limit, offset)
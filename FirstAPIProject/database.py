@@ -1,12 +1,42 @@
-from sqlalchemy import create_engine, String, Integer, Boolean, Float, Text, ForeignKey
+from sqlalchemy import (
+    DDL,
+    event,
+    create_engine,
+    String,
+    Integer,
+    Boolean,
+    Float,
+    Text,
+    ForeignKey,
+    Index,
+    UniqueConstraint,
+)
+from sqlalchemy.engine import URL, Engine, make_url
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlalchemy.orm import (
     DeclarativeBase,
     Mapped,
     mapped_column,
     relationship,
+    Session,
     sessionmaker,
 )
+from sqlalchemy.sql.dml import UpdateBase
 from typing import Optional, List
+import inspect
+import random
+import time
+from functools import wraps
+
+from fastapi import Request, Response
+
+from config import Settings, get_settings
+from metrics import instrument_engine
 
 
 class Base(DeclarativeBase):
@@ -42,6 +72,15 @@ class Course(Base):
 
 class Enrollment(Base):
     __tablename__ = "enrollment"
+    # Оба индекса покрывающие для связки студент-курс: уникальный
+    # (student_id, course_id) отдает курсы студента, (course_id, student_id) -
+    # студентов курса, уже упорядоченных по id, без чтения самой таблицы
+    __table_args__ = (
+        UniqueConstraint(
+            "student_id", "course_id", name="uq_enrollment_student_course"
+        ),
+        Index("ix_enrollment_course_student", "course_id", "student_id"),
+    )
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     course_id: Mapped[int] = mapped_column(ForeignKey("course.id"))
     student_id: Mapped[int] = mapped_column(ForeignKey("student.id"))
@@ -50,14 +89,411 @@ class Enrollment(Base):
     course: Mapped["Course"] = relationship("Course", back_populates="enrollments")
 
 
-engine = create_engine("sqlite:///student_management.db", echo=True)
+class StatsTotals(Base):
+    """Сводные счетчики для /api/stats (одна строка с id=1).
+    В SQLite их ведут триггеры из STATS_DDL"""
+
+    __tablename__ = "stats_totals"
+    id: Mapped[int] = mapped_column(primary_key=True)
+    students: Mapped[int] = mapped_column(default=0)
+    active_students: Mapped[int] = mapped_column(default=0)
+    age_sum: Mapped[int] = mapped_column(default=0)
+    courses: Mapped[int] = mapped_column(default=0)
+    enrollments: Mapped[int] = mapped_column(default=0)
+    revenue: Mapped[float] = mapped_column(default=0.0)
+
+
+class CourseStats(Base):
+    """Число записей на каждый курс, ведется триггерами"""
+
+    __tablename__ = "course_stats"
+    course_id: Mapped[int] = mapped_column(primary_key=True)
+    enrollments: Mapped[int] = mapped_column(default=0)
+
+
+# Счетчики заполняются по текущим данным (если их еще нет), дальше их
+# обновляют триггеры на каждую вставку, изменение и удаление, в том числе
+# пакетные и сделанные мимо crud. Выручка - сумма цен курсов по записям,
+# записи на удаленный курс в нее не входят (как в JOIN).
+# Пересоздание таблицы (batch_alter_table в миграциях) удаляет ее триггеры.
+STATS_DDL = [
+    """INSERT OR IGNORE INTO stats_totals
+        (id, students, active_students, age_sum, courses, enrollments, revenue)
+    SELECT 1,
+        (SELECT COUNT(*) FROM student),
+        (SELECT COUNT(*) FROM student WHERE is_active),
+        (SELECT COALESCE(SUM(age), 0) FROM student),
+        (SELECT COUNT(*) FROM course),
+        (SELECT COUNT(*) FROM enrollment),
+        (SELECT COALESCE(SUM(course.price), 0) FROM enrollment
+            JOIN course ON course.id = enrollment.course_id)""",
+    """INSERT OR IGNORE INTO course_stats (course_id, enrollments)
+    SELECT course.id, COUNT(enrollment.id) FROM course
+        LEFT JOIN enrollment ON enrollment.course_id = course.id
+    GROUP BY course.id""",
+    """CREATE TRIGGER IF NOT EXISTS stats_student_insert AFTER INSERT ON student
+    BEGIN
+        UPDATE stats_totals SET students = students + 1,
+            active_students = active_students + NEW.is_active,
+            age_sum = age_sum + NEW.age
+        WHERE id = 1;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS stats_student_delete AFTER DELETE ON student
+    BEGIN
+        UPDATE stats_totals SET students = students - 1,
+            active_students = active_students - OLD.is_active,
+            age_sum = age_sum - OLD.age
+        WHERE id = 1;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS stats_student_update
+    AFTER UPDATE OF age, is_active ON student
+    BEGIN
+        UPDATE stats_totals SET
+            active_students = active_students + NEW.is_active - OLD.is_active,
+            age_sum = age_sum + NEW.age - OLD.age
+        WHERE id = 1;
+    END""",
+    # Новый курс может получить id удаленного, на который остались записи
+    """CREATE TRIGGER IF NOT EXISTS stats_course_insert AFTER INSERT ON course
+    BEGIN
+        INSERT OR REPLACE INTO course_stats (course_id, enrollments)
+        SELECT NEW.id, COUNT(*) FROM enrollment WHERE course_id = NEW.id;
+        UPDATE stats_totals SET courses = courses + 1,
+            revenue = revenue + NEW.price * (SELECT enrollments FROM course_stats
+                WHERE course_id = NEW.id)
+        WHERE id = 1;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS stats_course_delete AFTER DELETE ON course
+    BEGIN
+        UPDATE stats_totals SET courses = courses - 1,
+            revenue = revenue - OLD.price * COALESCE((SELECT enrollments
+                FROM course_stats WHERE course_id = OLD.id), 0)
+        WHERE id = 1;
+        DELETE FROM course_stats WHERE course_id = OLD.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS stats_course_update
+    AFTER UPDATE OF price ON course
+    BEGIN
+        UPDATE stats_totals SET
+            revenue = revenue + (NEW.price - OLD.price) * COALESCE((SELECT
+                enrollments FROM course_stats WHERE course_id = NEW.id), 0)
+        WHERE id = 1;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS stats_enrollment_insert
+    AFTER INSERT ON enrollment
+    BEGIN
+        UPDATE stats_totals SET enrollments = enrollments + 1,
+            revenue = revenue + COALESCE((SELECT price FROM course
+                WHERE id = NEW.course_id), 0)
+        WHERE id = 1;
+        UPDATE course_stats SET enrollments = enrollments + 1
+        WHERE course_id = NEW.course_id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS stats_enrollment_delete
+    AFTER DELETE ON enrollment
+    BEGIN
+        UPDATE stats_totals SET enrollments = enrollments - 1,
+            revenue = revenue - COALESCE((SELECT price FROM course
+                WHERE id = OLD.course_id), 0)
+        WHERE id = 1;
+        UPDATE course_stats SET enrollments = enrollments - 1
+        WHERE course_id = OLD.course_id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS stats_enrollment_update
+    AFTER UPDATE OF course_id ON enrollment
+    BEGIN
+        UPDATE stats_totals SET revenue = revenue
+            - COALESCE((SELECT price FROM course WHERE id = OLD.course_id), 0)
+            + COALESCE((SELECT price FROM course WHERE id = NEW.course_id), 0)
+        WHERE id = 1;
+        UPDATE course_stats SET enrollments = enrollments - 1
+        WHERE course_id = OLD.course_id;
+        UPDATE course_stats SET enrollments = enrollments + 1
+        WHERE course_id = NEW.course_id;
+    END""",
+]
+
+# Полнотекстовый поиск (SQLite FTS5). Индексы хранят только токены
+# (content= указывает на исходную таблицу), синхронизируются триггерами.
+# prefix - готовые индексы префиксов для поиска по началу слова.
+# Веса bm25 по столбцам: совпадение в имени или названии важнее остальных.
+SEARCH_INDEXES = {
+    "student": ("first_name", "last_name", "email"),
+    "course": ("title", "description"),
+}
+SEARCH_WEIGHTS = {"student": "bm25(10.0, 10.0, 1.0)", "course": "bm25(10.0, 1.0)"}
+
+
+def search_ddl(table: str) -> list[str]:
+    columns = SEARCH_INDEXES[table]
+    fts = f"{table}_fts"
+    names = ", ".join(columns)
+    new = ", ".join(f"NEW.{column}" for column in columns)
+    old = ", ".join(f"OLD.{column}" for column in columns)
+    return [
+        f"""CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({names},
+        content='{table}', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3')""",
+        f"""INSERT INTO {fts}({fts}, rank) VALUES('rank', '{SEARCH_WEIGHTS[table]}')""",
+        # Индекс по уже существующим данным строится один раз, пока он пуст
+        f"""INSERT INTO {fts}({fts}) SELECT 'rebuild'
+        WHERE NOT EXISTS (SELECT 1 FROM {fts}_docsize)
+            AND EXISTS (SELECT 1 FROM {table})""",
+        f"""CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON {table}
+        BEGIN
+            INSERT INTO {fts}(rowid, {names}) VALUES (NEW.id, {new});
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON {table}
+        BEGIN
+            INSERT INTO {fts}({fts}, rowid, {names})
+            VALUES ('delete', OLD.id, {old});
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {fts}_update
+        AFTER UPDATE OF {names} ON {table}
+        BEGIN
+            INSERT INTO {fts}({fts}, rowid, {names})
+            VALUES ('delete', OLD.id, {old});
+            INSERT INTO {fts}(rowid, {names}) VALUES (NEW.id, {new});
+        END""",
+    ]
+
+
+# Счетчики, индексы поиска и их триггеры вместе с таблицами, без которых
+# они не выполнятся. Повторное выполнение на заполненной БД без триггеров
+# (benchmarks/datagen.py) пересчитывает пустые счетчики и строит индекс
+# поиска заново
+SQLITE_DDL_TABLES = [
+    (STATS_DDL, ("student", "course", "enrollment", "stats_totals", "course_stats")),
+    (search_ddl("student"), ("student",)),
+    (search_ddl("course"), ("course",)),
+]
+SQLITE_DDL = [
+    statement for statements, _ in SQLITE_DDL_TABLES for statement in statements
+]
+
+
+def _tables_exist(names: tuple[str, ...]):
+    """Условие для DDL: все таблицы names есть в БД после create_all, в
+    том числе частичного (create_all(tables=[...]))"""
+
+    def check(ddl, target, bind, tables=(), **kw):
+        created = {table.name for table in tables}
+        return all(
+            name in created or bind.dialect.has_table(bind, name) for name in names
+        )
+
+    return check
+
+
+for statements, names in SQLITE_DDL_TABLES:
+    for statement in statements:
+        event.listen(
+            Base.metadata,
+            "after_create",
+            DDL(statement).execute_if(dialect="sqlite", callable_=_tables_exist(names)),
+        )
+
+
+# Синхронный и асинхронный драйверы для одной и той же БД
+SYNC_DRIVERS = {"sqlite+aiosqlite": "sqlite", "postgresql+asyncpg": "postgresql"}
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+}
+
+
+def sync_url(url: str | URL) -> URL:
+    url = make_url(url)
+    return url.set(drivername=SYNC_DRIVERS.get(url.drivername, url.drivername))
+
+
+def async_url(url: str | URL) -> URL:
+    url = make_url(url)
+    return url.set(drivername=ASYNC_DRIVERS.get(url.drivername, url.drivername))
+
+
+def _engine_options(url: URL, settings: Settings) -> dict:
+    options = {"echo": settings.db_echo}
+    in_memory = url.get_backend_name() == "sqlite" and url.database in (
+        None,
+        "",
+        ":memory:",
+    )
+    # In-memory SQLite живет в одном соединении, пул для нее не настраивается
+    if not in_memory:
+        options.update(
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+            pool_recycle=settings.db_pool_recycle,
+        )
+    if url.get_backend_name() != "sqlite":
+        # Соединения к серверу могут оборваться, пока лежат в пуле
+        options["pool_pre_ping"] = True
+    return options
+
+
+def _set_sqlite_pragmas(settings: Settings):
+    """PRAGMA на каждое новое соединение: WAL позволяет читать во время
+    записи, synchronous=NORMAL в режиме WAL не теряет целостность,
+    busy_timeout ждет блокировку вместо ошибки database is locked"""
+
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA journal_mode={settings.sqlite_journal_mode}")
+        cursor.execute(f"PRAGMA synchronous={settings.sqlite_synchronous}")
+        # Отрицательное значение - размер кэша в КБ, а не в страницах
+        cursor.execute(f"PRAGMA cache_size=-{settings.sqlite_cache_size_kb}")
+        cursor.execute(f"PRAGMA mmap_size={settings.sqlite_mmap_size}")
+        cursor.execute(f"PRAGMA busy_timeout={settings.sqlite_busy_timeout_ms}")
+        cursor.close()
+
+    return on_connect
+
+
+def create_db_engine(settings: Settings | None = None) -> Engine:
+    """Синхронный движок по настройкам (create_tables, alembic, скрипты)"""
+    settings = settings or get_settings()
+    url = sync_url(settings.database_url)
+    db_engine = create_engine(url, **_engine_options(url, settings))
+    if url.get_backend_name() == "sqlite":
+        event.listen(db_engine, "connect", _set_sqlite_pragmas(settings))
+    if settings.metrics_enabled:
+        instrument_engine(db_engine)
+    return db_engine
+
+
+def create_async_db_engine(
+    settings: Settings | None = None, url: str | None = None
+) -> AsyncEngine:
+    """Асинхронный движок по настройкам: aiosqlite или asyncpg.
+    url - другая БД с теми же настройками (реплика)"""
+    settings = settings or get_settings()
+    url = async_url(url or settings.database_url)
+    db_engine = create_async_engine(url, **_engine_options(url, settings))
+    if url.get_backend_name() == "sqlite":
+        event.listen(db_engine.sync_engine, "connect", _set_sqlite_pragmas(settings))
+    if settings.metrics_enabled:
+        instrument_engine(db_engine.sync_engine)
+    return db_engine
+
+
+class RoutingSession(Session):
+    """Сессия, которая отправляет чтения из функций crud, помеченных
+    replica_read, на реплики, а все остальное - в основную БД (bind).
+
+    Реплика выбирается одна на сессию, чтобы страницы одного запроса
+    читались из одного источника. Сессия с info["primary"] (клиент
+    недавно писал) читает только из основной БД. Копии, прочитанные с
+    реплики, в кэш сущностей не попадают, и ETag у таких ответов нет.
+    """
+
+    def __init__(self, replicas: list[Engine] | None = None, **kw):
+        super().__init__(**kw)
+        self.replicas = replicas or []
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if (
+            self.replicas
+            and self.info.get("read_only")
+            and not self.info.get("primary")
+            and not self._flushing
+            and not isinstance(clause, UpdateBase)
+        ):
+            if "replica" not in self.info:
+                self.info["replica"] = random.choice(self.replicas)
+            return self.info["replica"]
+        return super().get_bind(mapper, clause=clause, **kw)
+
+
+def reads_replica(db: AsyncSession) -> bool:
+    """Чтения replica_read этой сессии пойдут на реплику"""
+    session = db.sync_session
+    return bool(getattr(session, "replicas", None)) and not session.info.get("primary")
+
+
+def replica_read(func):
+    """Помечает функцию crud как чистое чтение: на время ее выполнения
+    сессия может читать из реплики"""
+
+    def mark(db) -> bool:
+        previous = db.info.get("read_only", False)
+        db.info["read_only"] = True
+        return previous
+
+    if inspect.isasyncgenfunction(func):
+
+        @wraps(func)
+        async def generator_wrapper(db, *args, **kwargs):
+            previous = mark(db)
+            try:
+                async for item in func(db, *args, **kwargs):
+                    yield item
+            finally:
+                db.info["read_only"] = previous
+
+        return generator_wrapper
+
+    @wraps(func)
+    async def wrapper(db, *args, **kwargs):
+        previous = mark(db)
+        try:
+            return await func(db, *args, **kwargs)
+        finally:
+            db.info["read_only"] = previous
+
+    return wrapper
+
+
+def create_sessionmaker(
+    primary: AsyncEngine, replicas: list[AsyncEngine] = ()
+) -> async_sessionmaker:
+    return async_sessionmaker(
+        bind=primary,
+        sync_session_class=RoutingSession,
+        replicas=[replica.sync_engine for replica in replicas],
+        autoflush=False,
+        expire_on_commit=False,
+    )
+
+
+settings = get_settings()
+
+engine = create_db_engine(settings)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Асинхронный движок: запросы не блокируют event loop uvicorn
+async_engine = create_async_db_engine(settings)
+replica_engines = [
+    create_async_db_engine(settings, url) for url in settings.database_replica_urls
+]
+AsyncSessionLocal = create_sessionmaker(async_engine, replica_engines)
+
+# Cookie, по которой запросы клиента после записи читают из основной БД:
+# хранится у клиента, поэтому работает при нескольких воркерах
+PRIMARY_STICKY_COOKIE = "db_primary_until"
+REPLICA_STICKY_SECONDS = settings.db_replica_sticky_seconds
+READ_METHODS = ("GET", "HEAD", "OPTIONS")
+
 
 def create_tables():
     Base.metadata.create_all(bind=engine)
 
 
+async def create_tables_async():
+    """create_tables для lifespan приложения: не блокирует event loop"""
+    async with async_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+
+async def dispose_engines():
+    """Закрывает соединения пулов при остановке приложения"""
+    for async_db_engine in (async_engine, *replica_engines):
+        await async_db_engine.dispose()
+
+
 def get_db():
     db = SessionLocal()
     try:
@@ -66,4 +502,25 @@ def get_db():
         db.close()
 
 
-print("ORM models created successfully")
+def _use_primary(request: Request, response: Response) -> bool:
+    """Запрос на запись продлевает окно чтения из основной БД для клиента"""
+    now = time.time()
+    if request.method not in READ_METHODS:
+        response.set_cookie(
+            PRIMARY_STICKY_COOKIE,
+            str(int(now + REPLICA_STICKY_SECONDS)),
+            max_age=REPLICA_STICKY_SECONDS,
+            httponly=True,
+        )
+        return True
+    try:
+        return float(request.cookies.get(PRIMARY_STICKY_COOKIE, 0)) > now
+    except ValueError:
+        return False
+
+
+async def get_async_db(request: Request, response: Response):
+    async with AsyncSessionLocal() as db:
+        if db.sync_session.replicas:
+            db.info["primary"] = _use_primary(request, response)
+        yield db
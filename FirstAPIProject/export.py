@@ -0,0 +1,54 @@
+import csv
+import io
+import json
+from typing import Literal
+
+from fastapi.responses import StreamingResponse
+
+DataFormat = Literal["ndjson", "csv"]
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+async def ndjson_chunks(partitions):
+    """Одна JSON-строка на запись, один кусок ответа на пачку"""
+    async for rows in partitions:
+        yield "".join(
+            json.dumps(dict(row), ensure_ascii=False) + "\n" for row in rows
+        ).encode()
+
+
+async def csv_chunks(partitions, columns: list[str]):
+    """CSV с заголовком, один кусок ответа на пачку"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns)
+    writer.writeheader()
+    async for rows in partitions:
+        writer.writerows(rows)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def export_response(
+    partitions, model, fmt: DataFormat, name: str, headers: dict | None = None
+):
+    """Потоковый ответ с выгрузкой таблицы модели"""
+    if fmt == "csv":
+        columns = [column.name for column in model.__table__.columns]
+        body = csv_chunks(partitions, columns)
+    else:
+        body = ndjson_chunks(partitions)
+    return StreamingResponse(
+        body,
+        media_type=MEDIA_TYPES[fmt],
+        headers={
+            **(headers or {}),
+            "Content-Disposition": f'attachment; filename="{name}.{fmt}"',
+        },
+    )
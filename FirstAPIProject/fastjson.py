@@ -0,0 +1,97 @@
+"""Быстрый путь для списков: строки выборки сразу в orjson.
+
+Обычный путь - ORM-объекты, которые FastAPI по одному валидирует через
+response_model (from_attributes) и кодирует стандартным json. Быстрый путь
+выбирает только столбцы схемы и сериализует кортежи orjson без повторной
+валидации: данные из своей же БД схеме уже соответствуют. response_model у
+эндпоинтов остается прежним, поэтому схема OpenAPI не меняется.
+
+Включается настройкой FAST_JSON=1 и только если установлен orjson.
+Тот же путь обслуживает параметр fields= (выборка части полей): в SQL
+уходят только запрошенные столбцы, и ответ содержит только их.
+"""
+
+from fastapi import HTTPException, Query
+from fastapi.responses import JSONResponse, ORJSONResponse
+from pydantic import BaseModel
+
+from config import get_settings
+
+try:
+    import orjson
+except ImportError:  # orjson необязателен: без него работает обычный путь
+    orjson = None
+
+
+def enabled() -> bool:
+    return orjson is not None and get_settings().fast_json
+
+
+def schema_columns(
+    model, schema: type[BaseModel], fields: list[str] | None = None
+) -> list:
+    """Столбцы таблицы модели для полей схемы (или только для fields),
+    в порядке полей схемы"""
+    columns = model.__table__.columns
+    return [
+        columns[name]
+        for name in schema.model_fields
+        if name in columns and (fields is None or name in fields)
+    ]
+
+
+def schema_defaults(
+    model, schema: type[BaseModel], fields: list[str] | None = None
+) -> dict:
+    """Значения полей схемы, которых нет в таблице (например, Course.tags)"""
+    columns = model.__table__.columns
+    return {
+        name: field.get_default(call_default_factory=True)
+        for name, field in schema.model_fields.items()
+        if name not in columns and (fields is None or name in fields)
+    }
+
+
+def field_selection(schema: type[BaseModel]):
+    """Зависимость для параметра fields=: список полей схемы или None.
+
+    id нужен для курсора пагинации, поэтому возвращается всегда.
+    Неизвестные поля отклоняются с 422.
+    """
+    allowed = list(schema.model_fields)
+
+    def dependency(
+        fields: str | None = Query(
+            None,
+            description=f"Поля ответа через запятую: {', '.join(allowed)}",
+        ),
+    ) -> list[str] | None:
+        if fields is None:
+            return None
+        requested = {name.strip() for name in fields.split(",") if name.strip()}
+        unknown = sorted(requested - set(allowed))
+        if unknown:
+            raise HTTPException(
+                status_code=422,
+                detail={"unknown_fields": unknown, "allowed_fields": allowed},
+            )
+        return [name for name in allowed if name == "id" or name in requested]
+
+    return dependency
+
+
+def page_response(
+    model,
+    schema: type[BaseModel],
+    rows: list,
+    next_cursor: int | None,
+    headers: dict | None = None,
+    fields: list[str] | None = None,
+) -> JSONResponse:
+    """Страница списка в формате Page[schema] из строк schema_columns"""
+    names = [column.name for column in schema_columns(model, schema, fields)]
+    defaults = schema_defaults(model, schema, fields)
+    items = [dict(zip(names, row), **defaults) for row in rows]
+    # Без orjson (возможно при fields=) - стандартный json
+    response_class = ORJSONResponse if orjson is not None else JSONResponse
+    return response_class({"items": items, "next_cursor": next_cursor}, headers=headers)
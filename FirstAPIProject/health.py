@@ -0,0 +1,174 @@
+"""Проверки живости и готовности воркера для балансировщика и оркестратора.
+
+Живость (GET /api/health/live) - процесс отвечает, БД не трогается.
+Готовность (GET /api/health/ready) - ping БД с таймаутом, версия схемы
+относительно головы миграций Alembic, занятость пула соединений,
+задержка event loop, доля попаданий кэша сущностей и счетчики лимитов
+ratelimit.py. Отчет кэшируется на HEALTH_CACHE_MS: частые пробы
+балансировщика не нагружают БД, а пробы, пришедшие во время проверки,
+ждут ее результат вместо новой.
+"""
+
+import asyncio
+import os
+import time
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Awaitable, Callable
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import database
+import ratelimit
+from cache import entity_cache
+from config import get_settings
+
+HEALTHY = "healthy"
+UNHEALTHY = "unhealthy"
+ALEMBIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "alembic")
+
+
+@lru_cache
+def migration_head() -> str | None:
+    """Последняя ревизия в alembic/versions (читается с диска один раз)"""
+    # Alembic тянет диалекты всех СУБД: импорт при первой проверке, а не
+    # при старте воркера
+    from alembic.script import ScriptDirectory
+
+    try:
+        return ScriptDirectory(ALEMBIC_DIR).get_current_head()
+    except Exception:
+        return None
+
+
+def _current_revision(session) -> str | None:
+    from alembic.runtime.migration import MigrationContext
+
+    return MigrationContext.configure(session.connection()).get_current_revision()
+
+
+async def check_database(db: AsyncSession, timeout: float) -> tuple[dict, dict]:
+    """Ping БД и ее ревизия Alembic за один заход с общим таймаутом"""
+
+    async def probe() -> str | None:
+        await db.execute(text("SELECT 1"))
+        return await db.run_sync(_current_revision)
+
+    started = time.perf_counter()
+    try:
+        current = await asyncio.wait_for(probe(), timeout)
+    except asyncio.TimeoutError:
+        return {"ok": False, "error": f"timeout after {timeout * 1000:.0f} ms"}, {}
+    except Exception as exc:
+        return {"ok": False, "error": type(exc).__name__}, {}
+    latency_ms = (time.perf_counter() - started) * 1000
+    database = {"ok": True, "latency_ms": round(latency_ms, 3)}
+
+    head = migration_head()
+    # Без alembic_version схема создана create_all, сравнивать не с чем
+    up_to_date = None if current is None or head is None else current == head
+    migrations = {"current": current, "head": head, "up_to_date": up_to_date}
+    return database, migrations
+
+
+def pool_stats(pool) -> dict:
+    """Занятость пула; у StaticPool (in-memory SQLite) счетчиков нет"""
+    stats = {"class": type(pool).__name__}
+    for key, method in (
+        ("size", "size"),
+        ("checked_out", "checkedout"),
+        ("checked_in", "checkedin"),
+        ("overflow", "overflow"),
+    ):
+        if hasattr(pool, method):
+            stats[key] = getattr(pool, method)()
+    return stats
+
+
+async def loop_lag() -> float:
+    """Сколько ждет обратный вызов, поставленный в очередь event loop,
+    секунды: растет, когда loop занят CPU или блокирующим кодом"""
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    ran = loop.create_future()
+    loop.call_soon(ran.set_result, None)
+    await ran
+    return loop.time() - started
+
+
+def cache_stats() -> dict:
+    stats = entity_cache.stats()
+    hits, misses = stats.get("hits", 0), stats.get("misses", 0)
+    lookups = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": hits / lookups if lookups else None,
+    }
+
+
+async def readiness() -> dict:
+    """Отчет готовности. Сессию проверка открывает сама: она выполняется
+    общей задачей ReportCache и не должна зависеть от сессии запроса,
+    который ее запустил и может быть отменен раньше"""
+    async with database.AsyncSessionLocal() as db:
+        return await _readiness(db)
+
+
+async def _readiness(db: AsyncSession) -> dict:
+    # До ping: соединение самой проверки в счетчики не попадает
+    pool = pool_stats(db.bind.pool)
+    timeout = get_settings().health_db_timeout_ms / 1000
+    db_check, migrations = await check_database(db, timeout)
+    ready = db_check["ok"] and migrations.get("up_to_date") is not False
+    return {
+        "status": HEALTHY if ready else UNHEALTHY,
+        "database": db.bind.dialect.name,
+        "checked_at": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+        "checks": {
+            "database": db_check,
+            "migrations": migrations,
+            "pool": pool,
+            "event_loop": {"lag_ms": round(await loop_lag() * 1000, 3)},
+            "entity_cache": cache_stats(),
+            "limits": ratelimit.stats(),
+        },
+    }
+
+
+class ReportCache:
+    """Последний отчет на ttl секунд. Одновременные промахи ждут одну
+    проверку; отмена ожидающего запроса ее не прерывает"""
+
+    def __init__(self, ttl: float, clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self.clock = clock
+        self.clear()
+
+    def clear(self):
+        self._report: dict | None = None
+        self._expires = 0.0
+        self._pending: asyncio.Task | None = None
+
+    async def get(self, check: Callable[[], Awaitable[dict]]) -> dict:
+        if self._report is not None and self.clock() < self._expires:
+            return self._report
+        pending = self._pending
+        # Задача от другого loop (новый TestClient) ждать нельзя
+        if (
+            pending is None
+            or pending.done()
+            or pending.get_loop() is not asyncio.get_running_loop()
+        ):
+            pending = self._pending = asyncio.create_task(self._refresh(check))
+        return await asyncio.shield(pending)
+
+    async def _refresh(self, check) -> dict:
+        report = await check()
+        self._report = report
+        self._expires = self.clock() + self.ttl
+        return report
+
+
+readiness_cache = ReportCache(get_settings().health_cache_ms / 1000)
@@ -0,0 +1,132 @@
+import codecs
+import csv
+import json
+import time
+import uuid
+from collections import OrderedDict
+from typing import AsyncIterator
+
+from pydantic import BaseModel, ValidationError
+
+from models import BulkItemError, ImportReport, error_detail
+
+# Сколько строк проверяется и коммитится за одну транзакцию
+IMPORT_CHUNK_SIZE = 1000
+# Сколько ошибок хранится в отчете (остальные только считаются)
+MAX_REPORTED_ERRORS = 1000
+# Сколько последних отчетов доступно для опроса прогресса
+MAX_TRACKED_IMPORTS = 100
+
+_reports: OrderedDict[str, ImportReport] = OrderedDict()
+
+
+def start_report(import_id: str | None) -> ImportReport:
+    report = ImportReport(import_id=import_id or uuid.uuid4().hex)
+    _reports[report.import_id] = report
+    while len(_reports) > MAX_TRACKED_IMPORTS:
+        _reports.popitem(last=False)
+    return report
+
+
+def get_report(import_id: str) -> ImportReport | None:
+    return _reports.get(import_id)
+
+
+async def read_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Режет поток байтов на строки, не собирая тело целиком"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    tail = ""
+    async for chunk in chunks:
+        lines = (tail + decoder.decode(chunk)).split("\n")
+        tail = lines.pop()
+        for line in lines:
+            yield line.rstrip("\r")
+    tail += decoder.decode(b"", final=True)
+    if tail:
+        yield tail.rstrip("\r")
+
+
+async def read_ndjson(lines: AsyncIterator[str]):
+    """(номер строки, объект) или (номер строки, текст ошибки разбора)"""
+    number = 0
+    async for line in lines:
+        number += 1
+        if not line.strip():
+            continue
+        try:
+            yield number, json.loads(line)
+        except json.JSONDecodeError as e:
+            yield number, f"invalid JSON: {e.msg}"
+
+
+async def read_csv(lines: AsyncIterator[str]):
+    """(номер записи, словарь) по заголовку CSV; пустые ячейки пропускаются,
+    чтобы сработали значения по умолчанию. Поля в кавычках могут содержать
+    переводы строк: запись копится, пока число кавычек нечетное."""
+    header = None
+    number = 0
+    record = []
+    async for line in lines:
+        record.append(line)
+        if "\n".join(record).count('"') % 2:
+            continue
+        text = "\n".join(record)
+        record = []
+        if not text.strip():
+            continue
+        values = next(csv.reader([text]))
+        if header is None:
+            header = values
+            continue
+        number += 1
+        if len(values) != len(header):
+            yield number, f"expected {len(header)} columns, got {len(values)}"
+            continue
+        yield number, {k: v for k, v in zip(header, values) if v != ""}
+    if record:
+        yield number + 1, "unterminated quoted field"
+
+
+def _add_error(report: ImportReport, row: int, detail: str):
+    report.failed += 1
+    if len(report.errors) < MAX_REPORTED_ERRORS:
+        report.errors.append(BulkItemError(index=row, detail=detail))
+
+
+async def import_rows(
+    chunks: AsyncIterator[bytes],
+    fmt: str,
+    model: type[BaseModel],
+    insert_batch,
+    report: ImportReport,
+) -> ImportReport:
+    """Потоковый импорт: строки валидируются пачками по IMPORT_CHUNK_SIZE,
+    каждая пачка вставляется и коммитится отдельно через insert_batch"""
+    reader = read_csv if fmt == "csv" else read_ndjson
+    started = time.perf_counter()
+    batch = []
+
+    async def flush():
+        report.inserted += len(await insert_batch(batch))
+        report.rows_per_sec = report.processed / (time.perf_counter() - started)
+        batch.clear()
+
+    async for row, item in reader(read_lines(chunks)):
+        report.processed += 1
+        if isinstance(item, str):
+            _add_error(report, row, item)
+            continue
+        try:
+            batch.append(model.model_validate(item))
+        except ValidationError as e:
+            _add_error(report, row, error_detail(e))
+            continue
+        if len(batch) >= IMPORT_CHUNK_SIZE:
+            await flush()
+
+    if batch:
+        await flush()
+    elapsed = time.perf_counter() - started
+    report.rows_per_sec = report.processed / elapsed if elapsed else 0.0
+    report.finished = True
+    return report
@@ -1,78 +1,148 @@
-from fastapi import FastAPI
-from fastapi.responses import HTMLResponse
+import asyncio
+from contextlib import asynccontextmanager, suppress
+
+from fastapi import APIRouter, FastAPI, HTTPException, Request
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse
 import os
-import uvicorn
 
 # Импортируем роутеры
-from routers.students import router as students_router
-from routers.courses import router as courses_router
-from routers.enrollments import router as enrollments_router
-from database import create_tables
-
-create_tables()
-
-# 1. СОЗДАНИЕ ПРИЛОЖЕНИЯ
-app = FastAPI(
-    title="Мой учебный API",
-    version="1.0.0",
-    description="Этот API создан для изучения FastAPI",
+from routers.students import router as students_router, students_page
+from routers.courses import router as courses_router, courses_page
+from routers.enrollments import router as enrollments_router, enrollments_page
+from routers.stats import router as stats_router
+from routers.admin import router as admin_router
+import database
+import importer
+from cache import entity_cache
+from compress import CompressionMiddleware
+from config import SCHEMA_READY_ENV, get_settings
+from health import HEALTHY, readiness, readiness_cache
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsMiddleware, metrics
+from models import ImportReport
+from pages import page_store
+from profiler import ProfilerMiddleware
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Схема проверяется и страницы загружаются один раз при старте,
+    а не при импорте модуля"""
+    if not os.getenv(SCHEMA_READY_ENV):
+        await database.create_tables_async()
+    page_store.load_all()
+    watcher = None
+    if get_settings().templates_watch:
+        watcher = asyncio.create_task(page_store.watch())
+    yield
+    if watcher is not None:
+        watcher.cancel()
+        with suppress(asyncio.CancelledError):
+            await watcher
+    await database.dispose_engines()
+
+
+# 1. HTML СТРАНИЦЫ И СЛУЖЕБНЫЕ ЭНДПОИНТЫ
+site_router = APIRouter()
+
+
+@site_router.get("/", response_class=HTMLResponse)
+async def read_root(request: Request):
+    return page_store.response("index", request)
+
+
+site_router.add_api_route("/students/", students_page, response_class=HTMLResponse)
+site_router.add_api_route("/courses/", courses_page, response_class=HTMLResponse)
+site_router.add_api_route(
+    "/enrollments/", enrollments_page, response_class=HTMLResponse
 )
 
-# 2. ПОДКЛЮЧАЕМ РОУТЕРЫ
-app.include_router(students_router)
-app.include_router(courses_router)
-app.include_router(enrollments_router)
 
+@site_router.get("/api/health/live")
+async def liveness():
+    """Процесс жив и обслуживает запросы; БД не проверяется"""
+    return {"status": "alive"}
+
+
+@site_router.get("/api/health/ready")
+async def readiness_check(request: Request):
+    """Готовность принимать трафик: 503, если БД недоступна или схема
+    отстает от миграций. Отчет кэшируется на HEALTH_CACHE_MS: при
+    попадании запрос не берет соединение из пула"""
+    report = await readiness_cache.get(readiness)
+    healthy = report["status"] == HEALTHY
+    body = {
+        **report,
+        "message": (
+            "Student Management System работает корректно"
+            if healthy
+            else "База данных недоступна или схема устарела"
+        ),
+        "version": request.app.version,
+    }
+    return JSONResponse(body, status_code=200 if healthy else 503)
 
 
-# 3. HTML СТРАНИЦЫ
-@app.get("/", response_class=HTMLResponse)
-async def read_root():
-    try:
-        with open("templates/index.html", "r", encoding="utf-8") as f:
-            return HTMLResponse(content=f.read())
-    except FileNotFoundError:
-        return HTMLResponse(content="<h1>HTML file not found</h1>")
+# Прежний адрес проверки: тот же отчет готовности
+site_router.add_api_route("/api/health", readiness_check, methods=["GET"])
 
 
-@app.get("/students/", response_class=HTMLResponse)
-async def students_page():
-    from routers.students import students_page as students_handler
+@site_router.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    """Метрики запросов и SQL в текстовом формате Prometheus"""
+    return PlainTextResponse(metrics.render(), media_type=METRICS_CONTENT_TYPE)
 
-    return await students_handler()
 
+@site_router.get("/api/imports/{import_id}", response_model=ImportReport)
+async def import_progress(import_id: str):
+    """Прогресс потокового импорта"""
+    report = importer.get_report(import_id)
+    if not report:
+        raise HTTPException(status_code=404, detail="Import not found")
+    return report
 
-@app.get("/courses/", response_class=HTMLResponse)
-async def courses_page():
-    from routers.courses import courses_page as courses_handler
 
-    return await courses_handler()
+@site_router.get("/api/cache/stats")
+async def cache_stats():
+    """Счетчики кэша сущностей: попадания, промахи, вытеснения"""
+    return entity_cache.stats()
 
 
-@app.get("/enrollments/", response_class=HTMLResponse)
-async def enrollments_page():
-    from routers.enrollments import enrollments_page as enrollments_handler
+@site_router.get("/api/")
+async def root():
+    return {"message": "It's Student Management System"}
 
-    return await enrollments_handler()
 
+# 2. СОЗДАНИЕ ПРИЛОЖЕНИЯ
+def create_app() -> FastAPI:
+    app = FastAPI(
+        title="Мой учебный API",
+        version="1.0.0",
+        description="Этот API создан для изучения FastAPI",
+        lifespan=lifespan,
+    )
+    app.add_middleware(CompressionMiddleware)
+    # Профиль запроса по X-Profile: весь путь, кроме учета метрик
+    app.add_middleware(ProfilerMiddleware)
+    # Внешним слоем: время включает сжатие, размер - уже сжатого тела
+    if get_settings().metrics_enabled:
+        app.add_middleware(MetricsMiddleware)
 
-@app.get("/api/health")
-async def health_check():
-    return {
-        "status": "healthy",
-        "message": "Student Management System работает корректно",
-        "version": "2.0.0",
-        "database": "SQLite",
-    }
+    # 3. ПОДКЛЮЧАЕМ РОУТЕРЫ
+    app.include_router(students_router)
+    app.include_router(courses_router)
+    app.include_router(enrollments_router)
+    app.include_router(stats_router)
+    app.include_router(admin_router)
+    app.include_router(site_router)
+    return app
 
 
-# 4. БАЗОВЫЙ ЭНДПОИНТ
-@app.get("/api/")
-async def root():
-    return {"message": "It's Student Management System"}
+app = create_app()
 
 
 if __name__ == "__main__":
+    import uvicorn
+
     print(" Запускаем сервер на http://localhost:8000")
     print(" Документация API: http://localhost:8000/docs")
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
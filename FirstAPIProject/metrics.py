@@ -0,0 +1,327 @@
+"""Метрики запросов в текстовом формате Prometheus (GET /metrics).
+
+MetricsMiddleware меряет каждый HTTP-запрос: гистограммы длительности и
+размера ответа по шаблону маршрута, число запросов в обработке. Слушатели
+before/after_cursor_execute на движках database.py считают SQL-запросы и
+их время в рамках текущего запроса (через contextvar) и пишут медленные
+запросы в лог. Итог запроса уходит клиенту в заголовке Server-Timing.
+
+Метрики у каждого воркера свои, как и кэш сущностей: при нескольких
+воркерах /metrics показывает счетчики того воркера, что принял запрос.
+"""
+
+import logging
+import re
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from config import get_settings
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# Запросы, не совпавшие ни с одним маршрутом, идут под одной меткой, чтобы
+# случайные адреса не раздували число рядов
+UNMATCHED_ROUTE = "unmatched"
+QUANTILES = (0.5, 0.95, 0.99)
+
+LATENCY_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    """Число наблюдений по корзинам (граница le включительно), их сумма
+    и количество"""
+
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: tuple):
+        self.bounds = bounds
+        # Последняя корзина - все, что больше последней границы (+Inf)
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Оценка квантиля линейной интерполяцией внутри корзины, как
+        histogram_quantile в Prometheus"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        cumulative = 0
+        lower = 0.0
+        for bound, count in zip(self.bounds, self.counts):
+            if count and cumulative + count >= rank:
+                return lower + (bound - lower) * (rank - cumulative) / count
+            cumulative += count
+            lower = bound
+        return self.bounds[-1]
+
+
+class RequestTimings:
+    """SQL-запросы одного HTTP-запроса: число и суммарное время"""
+
+    __slots__ = ("queries", "db_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+
+    def server_timing(self, app_seconds: float) -> str:
+        return (
+            f"app;dur={app_seconds * 1000:.2f}, "
+            f'db;dur={self.db_seconds * 1000:.2f};desc="queries={self.queries}"'
+        )
+
+
+_current_request: ContextVar[RequestTimings | None] = ContextVar(
+    "current_request", default=None
+)
+
+
+class Metrics:
+    """Реестр метрик процесса. Ключ рядов - (метод, шаблон маршрута)"""
+
+    def __init__(self, slow_query_ms: int | None = None):
+        if slow_query_ms is None:
+            slow_query_ms = get_settings().slow_query_ms
+        self.slow_query_seconds = slow_query_ms / 1000
+        self.clear()
+
+    def clear(self):
+        self.in_flight = 0
+        self.requests: dict[tuple[str, str, int], int] = {}
+        self.latency: dict[tuple[str, str], Histogram] = {}
+        self.sizes: dict[tuple[str, str], Histogram] = {}
+        self.request_queries: dict[tuple[str, str], Histogram] = {}
+        self.request_db_seconds: dict[tuple[str, str], float] = {}
+        self.queries = Histogram(LATENCY_BUCKETS)
+        self.slow_queries = 0
+
+    def observe_request(
+        self,
+        method: str,
+        route: str,
+        status: int,
+        seconds: float,
+        size: int,
+        timings: RequestTimings,
+    ):
+        key = (method, route)
+        latency = self.latency.get(key)
+        if latency is None:
+            latency = self.latency[key] = Histogram(LATENCY_BUCKETS)
+            self.sizes[key] = Histogram(SIZE_BUCKETS)
+            self.request_queries[key] = Histogram(QUERY_COUNT_BUCKETS)
+            self.request_db_seconds[key] = 0.0
+        latency.observe(seconds)
+        self.sizes[key].observe(size)
+        self.request_queries[key].observe(timings.queries)
+        self.request_db_seconds[key] += timings.db_seconds
+        counter = (method, route, status)
+        self.requests[counter] = self.requests.get(counter, 0) + 1
+
+    def render(self) -> str:
+        lines = []
+
+        def header(name: str, kind: str, text: str):
+            lines.append(f"# HELP {name} {text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        def histogram(name: str, series: dict, labels=_route_labels):
+            for key, value in series.items():
+                base = labels(key)
+                cumulative = 0
+                for bound, count in zip((*value.bounds, "+Inf"), value.counts):
+                    cumulative += count
+                    le = f'le="{bound}"'
+                    lines.append(f"{name}_bucket{_braces(base, le)} {cumulative}")
+                lines.append(f"{name}_sum{_braces(base)} {value.sum}")
+                lines.append(f"{name}_count{_braces(base)} {value.count}")
+
+        header("http_requests_total", "counter", "HTTP requests by route and status")
+        for (method, route, status), count in self.requests.items():
+            labels = _route_labels((method, route))
+            lines.append(f'http_requests_total{{{labels},status="{status}"}} {count}')
+
+        header("http_requests_in_flight", "gauge", "HTTP requests being processed")
+        lines.append(f"http_requests_in_flight {self.in_flight}")
+
+        name = "http_request_duration_seconds"
+        header(name, "histogram", "HTTP request latency by route")
+        histogram(name, self.latency)
+
+        header(
+            "http_request_duration_quantile_seconds",
+            "gauge",
+            "Latency quantiles estimated from the histogram buckets",
+        )
+        for key, latency in self.latency.items():
+            for q in QUANTILES:
+                lines.append(
+                    "http_request_duration_quantile_seconds"
+                    f'{{{_route_labels(key)},quantile="{q}"}} {latency.quantile(q)}'
+                )
+
+        name = "http_response_size_bytes"
+        header(name, "histogram", "HTTP response body size by route")
+        histogram(name, self.sizes)
+
+        name = "http_request_db_queries"
+        header(name, "histogram", "SQL queries per HTTP request by route")
+        histogram(name, self.request_queries)
+
+        header(
+            "http_request_db_seconds_total",
+            "counter",
+            "Time spent in SQL queries by route",
+        )
+        for key, seconds in self.request_db_seconds.items():
+            lines.append(
+                f"http_request_db_seconds_total{{{_route_labels(key)}}} {seconds}"
+            )
+
+        name = "db_query_duration_seconds"
+        header(name, "histogram", "SQL query latency")
+        histogram(name, {(): self.queries}, labels=lambda key: "")
+
+        header("db_slow_queries_total", "counter", "SQL queries above SLOW_QUERY_MS")
+        lines.append(f"db_slow_queries_total {self.slow_queries}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _braces(*labels: str) -> str:
+    inner = ",".join(label for label in labels if label)
+    return f"{{{inner}}}" if inner else ""
+
+
+def _route_labels(key: tuple[str, str]) -> str:
+    method, route = key
+    return f'method="{method}",route="{_escape(route)}"'
+
+
+metrics = Metrics()
+
+
+_PLACEHOLDERS = re.compile(r"\$\d+|%\(\w+\)s")
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_REPEATED_LISTS = re.compile(r"\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_sql(statement: str) -> str:
+    """Форма запроса без значений: параметры и литералы заменяются на ?,
+    списки IN и многострочные VALUES схлопываются, пробелы сжимаются.
+    Одинаковые по форме запросы дают одну строку лога"""
+    statement = _PLACEHOLDERS.sub("?", statement)
+    statement = _LITERALS.sub("?", statement)
+    statement = _LISTS.sub("(...)", statement)
+    statement = _REPEATED_LISTS.sub("(...)", statement)
+    return _SPACES.sub(" ", statement).strip()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info["query_started"] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    seconds = time.perf_counter() - conn.info.pop("query_started", time.perf_counter())
+    metrics.queries.observe(seconds)
+    timings = _current_request.get()
+    if timings is not None:
+        timings.queries += 1
+        timings.db_seconds += seconds
+    if seconds >= metrics.slow_query_seconds:
+        metrics.slow_queries += 1
+        logger.warning(
+            "slow query %.1f ms: %s", seconds * 1000, normalize_sql(statement)
+        )
+
+
+def instrument_engine(engine: Engine):
+    """Подключает учет SQL-запросов к синхронному движку
+    (для асинхронного - к его sync_engine)"""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class MetricsMiddleware:
+    """ASGI-middleware учета запросов. Подключается последним (внешним),
+    чтобы размер ответа был размером после сжатия"""
+
+    def __init__(self, app: ASGIApp, registry: Metrics | None = None):
+        self.app = app
+        self.registry = registry or metrics
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        registry = self.registry
+        started = time.perf_counter()
+        timings = RequestTimings()
+        token = _current_request.set(timings)
+        status = 500
+        size = 0
+
+        async def send_with_timing(message: Message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "Server-Timing",
+                    timings.server_timing(time.perf_counter() - started),
+                )
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        registry.in_flight += 1
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            registry.in_flight -= 1
+            _current_request.reset(token)
+            # Маршрут известен только после роутинга: FastAPI кладет его в scope
+            route = scope.get("route")
+            registry.observe_request(
+                scope["method"],
+                getattr(route, "path", UNMATCHED_ROUTE),
+                status,
+                time.perf_counter() - started,
+                size,
+                timings,
+            )
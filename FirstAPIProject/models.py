@@ -1,12 +1,29 @@
-from pydantic import BaseModel, ConfigDict, field_validator, EmailStr, Field
-from typing import Optional, List
+from pydantic import (
+    BaseModel,
+    ConfigDict,
+    field_validator,
+    EmailStr,
+    Field,
+    ValidationError,
+)
+from typing import Any, Generic, Optional, List, TypeVar
+
+T = TypeVar("T")
+
+# Размер страницы для списочных эндпоинтов
+DEFAULT_PAGE_LIMIT = 50
+MAX_PAGE_LIMIT = 500
+# Поиск листается смещением: дальние страницы дороги и не нужны
+MAX_SEARCH_OFFSET = 10_000
+
+# Максимум элементов в одном запросе к bulk-эндпоинтам
+MAX_BULK_ITEMS = 10_000
 
 
 class Student(BaseModel):
 
     model_config = ConfigDict(from_attributes=True)
 
-
     id: int
     first_name: str
     last_name: str
@@ -18,7 +35,6 @@ class Student(BaseModel):
 class Course(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
-
     id: int
     title: str
     description: Optional[str] = None
@@ -30,12 +46,39 @@ class Course(BaseModel):
 class Enrollment(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
-
     id: int
     course_id: int
     student_id: int
 
 
+class Page(BaseModel, Generic[T]):
+    """Страница списка с курсором (id последней записи) на следующую"""
+
+    items: List[T]
+    next_cursor: Optional[int] = None
+
+
+class SearchPage(BaseModel, Generic[T]):
+    """Страница результатов поиска по релевантности; next_offset - смещение
+    следующей страницы (None, если ее нет)"""
+
+    items: List[T]
+    next_offset: Optional[int] = None
+
+
+class EnrollmentDetail(BaseModel):
+    """Запись на курс вместе со студентом и курсом"""
+
+    enrollment: Enrollment
+    student: Student
+    course: Course
+
+
+class EnrollmentDetailPage(BaseModel):
+    enrollments: List[EnrollmentDetail]
+    next_cursor: Optional[int] = None
+
+
 class StudentCreate(BaseModel):
     """Модель для создания нового студента (без ID)"""
 
@@ -69,4 +112,70 @@ class EnrollmentCreate(BaseModel):
     course_id: int
 
 
-print("Модели для API созданы успешно!")
+class BulkItemError(BaseModel):
+    """Ошибка одного элемента пакета"""
+
+    index: int
+    detail: str
+
+
+class BulkResult(BaseModel):
+    """Итог пакетной загрузки: ids выровнены по индексам входного массива,
+    для элементов с ошибкой там None"""
+
+    created: int
+    ids: List[Optional[int]]
+    errors: List[BulkItemError] = []
+
+
+class ImportReport(BaseModel):
+    """Ход и итог потокового импорта; errors хранит только первые ошибки,
+    failed - их общее число"""
+
+    import_id: str
+    processed: int = 0
+    inserted: int = 0
+    failed: int = 0
+    rows_per_sec: float = 0.0
+    finished: bool = False
+    errors: List[BulkItemError] = []
+
+
+class CourseEnrollmentCount(BaseModel):
+    course_id: int
+    enrollments: int
+
+
+class Stats(BaseModel):
+    """Сводная статистика для главной страницы"""
+
+    students: int
+    active_students: int
+    inactive_students: int
+    courses: int
+    enrollments: int
+    revenue: float
+    average_age: Optional[float] = None
+    enrollments_per_course: List[CourseEnrollmentCount] = []
+
+
+def validate_bulk(
+    model: type[BaseModel], items: list[Any]
+) -> tuple[list[tuple[int, BaseModel]], list[BulkItemError]]:
+    """Валидирует элементы по одному, не прерываясь на первой ошибке"""
+    valid = []
+    errors = []
+    for index, item in enumerate(items):
+        try:
+            valid.append((index, model.model_validate(item)))
+        except ValidationError as e:
+            errors.append(BulkItemError(index=index, detail=error_detail(e)))
+    return valid, errors
+
+
+def error_detail(e: ValidationError) -> str:
+    """Ошибки валидации одной строкой: "поле: сообщение; ..." """
+    return "; ".join(
+        f"{'.'.join(str(loc) for loc in err['loc'])}: {err['msg']}"
+        for err in e.errors()
+    )
@@ -0,0 +1,152 @@
+"""HTML-страницы из templates/, загруженные в память один раз.
+
+Для каждой страницы заранее готовы сжатые варианты (gzip, а также brotli
+и zstd, если установлены их пакеты) с максимальным уровнем сжатия и ETag,
+поэтому запрос не читает диск и не сжимает тело. В режиме разработки
+(TEMPLATES_WATCH=1) файлы перечитываются при изменении.
+"""
+
+import asyncio
+import hashlib
+import os
+from dataclasses import dataclass, field
+
+from fastapi import Request, Response
+from fastapi.responses import HTMLResponse
+
+from compress import ENCODERS, choose_encoding
+from conditional import etag_matches
+
+TEMPLATES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates")
+# Страницы можно кэшировать, но перед показом сверять ETag с сервером
+CACHE_CONTROL = "no-cache"
+# Как часто режим разработки проверяет время изменения файлов, в секундах
+WATCH_INTERVAL_SECONDS = 1.0
+
+# Сжатие один раз при загрузке, поэтому уровень максимальный
+PAGE_LEVELS = {"gzip": 9, "br": 11, "zstd": 19}
+
+# Страница -> текст, если файла нет
+PAGES = {
+    "index": "<h1>HTML file not found</h1>",
+    "students": "<h1>Students Page</h1><p>HTML file not found</p>",
+    "courses": "<h1>Courses Page</h1><p>HTML file not found</p>",
+    "enrollments": "<h1>Enrollments Page</h1><p>HTML file not found</p>",
+}
+
+
+@dataclass
+class Page:
+    """Страница и ее заранее сжатые варианты: кодировка -> тело"""
+
+    bodies: dict[str, bytes]
+    etag: str
+    mtime: int | None = None
+    # Заголовки ответа по кодировке, собираются один раз при загрузке
+    headers: dict[str, dict[str, str]] = field(default_factory=dict)
+
+    def __post_init__(self):
+        for encoding in self.bodies:
+            headers = {
+                "ETag": self.representation_etag(encoding),
+                "Cache-Control": CACHE_CONTROL,
+                "Vary": "Accept-Encoding",
+            }
+            if encoding != "identity":
+                headers["Content-Encoding"] = encoding
+            self.headers[encoding] = headers
+
+    def representation_etag(self, encoding: str) -> str:
+        # Сжатые варианты - другие байты, поэтому и ETag у них свой
+        if encoding == "identity":
+            return f'"{self.etag}"'
+        return f'"{self.etag}-{encoding}"'
+
+
+def compress_variants(body: bytes) -> dict[str, bytes]:
+    """Тело без сжатия и сжатые варианты, которые меньше исходного"""
+    bodies = {"identity": body}
+    for encoding, (compress, _) in ENCODERS.items():
+        data = compress(body, PAGE_LEVELS[encoding])
+        if len(data) < len(body):
+            bodies[encoding] = data
+    return bodies
+
+
+class PageStore:
+    """Страницы в памяти процесса; загружаются при старте или первом запросе"""
+
+    def __init__(self, directory: str = TEMPLATES_DIR, pages: dict = PAGES):
+        self.directory = directory
+        self.fallbacks = pages
+        self._pages: dict[str, Page] = {}
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, f"{name}.html")
+
+    def _mtime(self, name: str) -> int | None:
+        try:
+            return os.stat(self._path(name)).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def load(self, name: str) -> Page:
+        mtime = self._mtime(name)
+        try:
+            with open(self._path(name), "rb") as f:
+                body = f.read()
+        except FileNotFoundError:
+            body = self.fallbacks[name].encode()
+        page = Page(
+            bodies=compress_variants(body),
+            etag=hashlib.blake2b(body, digest_size=8).hexdigest(),
+            mtime=mtime,
+        )
+        self._pages[name] = page
+        return page
+
+    def load_all(self):
+        """Загружает недостающие страницы; уже загруженные только сверяет
+        с файлом, чтобы повторный старт приложения не сжимал их заново"""
+        self.reload_changed()
+        for name in self.fallbacks.keys() - self._pages.keys():
+            self.load(name)
+
+    def get(self, name: str) -> Page:
+        page = self._pages.get(name)
+        return page if page is not None else self.load(name)
+
+    def reload_changed(self) -> list[str]:
+        """Перечитывает страницы, чьи файлы изменились; возвращает их имена"""
+        changed = [
+            name
+            for name, page in self._pages.items()
+            if self._mtime(name) != page.mtime
+        ]
+        for name in changed:
+            self.load(name)
+        return changed
+
+    async def watch(self, interval: float = WATCH_INTERVAL_SECONDS):
+        """Фоновая задача режима разработки: следит за изменениями файлов"""
+        while True:
+            await asyncio.sleep(interval)
+            await asyncio.to_thread(self.reload_changed)
+
+    def response(self, name: str, request: Request) -> Response:
+        page = self.get(name)
+        accept_encoding = request.headers.get("accept-encoding", "")
+        encoding = choose_encoding(accept_encoding, page.bodies) or "identity"
+        headers = page.headers[encoding]
+
+        # Любой вариант страницы с тем же содержимым подходит для 304
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and any(
+            etag_matches(if_none_match, page.representation_etag(e))
+            for e in page.bodies
+        ):
+            return Response(status_code=304, headers=headers)
+        return HTMLResponse(content=page.bodies[encoding], headers=headers)
+
+
+page_store = PageStore()
@@ -0,0 +1,214 @@
+"""Статистический профайлер воркера для диагностики под нагрузкой.
+
+Отдельный поток с заданным интервалом снимает стек потока event loop
+(sys._current_frames) и считает одинаковые стеки. Результат - свернутые
+стеки ("a;b;c 42" на строку), формат flamegraph.pl, speedscope и
+inferno. Профилировать можно окно в N секунд (GET /api/admin/profile)
+или один запрос с заголовком X-Profile: 1 (ProfilerMiddleware).
+
+Включается только заданным PROFILER_TOKEN, тот же токен требуется в
+X-Admin-Token. Одновременно работает один сэмплер на воркер.
+
+Пока loop занят CPU, поток сэмплера получает GIL не чаще
+sys.getswitchinterval() (5 мс), поэтому на время работы сэмплера с
+меньшим интервалом интервал переключения процесса уменьшается до него.
+"""
+
+import asyncio
+import os
+import secrets
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from types import CodeType, FrameType
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from config import get_settings
+
+PROFILE_HEADER = "x-profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+TOKEN_HEADER = "x-admin-token"
+# Интервал снимков при профилировании одного запроса, секунды
+REQUEST_INTERVAL = 0.001
+# Сколько последних профилей запросов доступно по id
+MAX_STORED_PROFILES = 32
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Задача asyncio, выполняемая сейчас в каждом loop. Приватный словарь
+# модуля asyncio.tasks: читается из потока сэмплера без участия loop
+_current_tasks: dict | None = getattr(asyncio.tasks, "_current_tasks", None)
+
+_busy = threading.Lock()
+_profiles: OrderedDict[str, "Sampler"] = OrderedDict()
+_labels: dict[CodeType, str] = {}
+
+
+def admin_token() -> str:
+    """Токен администратора; пустой - профайлер выключен"""
+    return get_settings().profiler_token
+
+
+def token_matches(given: str | None, token: str) -> bool:
+    return given is not None and secrets.compare_digest(given, token)
+
+
+def _short_path(filename: str) -> str:
+    if filename.startswith(PROJECT_ROOT):
+        return os.path.relpath(filename, PROJECT_ROOT)
+    _, marker, tail = filename.rpartition("site-packages" + os.sep)
+    if marker:
+        return tail
+    return os.path.basename(filename)
+
+
+def _label(code: CodeType) -> str:
+    label = _labels.get(code)
+    if label is None:
+        label = _labels[code] = f"{_short_path(code.co_filename)}:{code.co_qualname}"
+    return label
+
+
+def collapse(frame: FrameType | None) -> str:
+    """Стек от корня к текущему кадру, кадры через ';'"""
+    labels = []
+    while frame is not None:
+        labels.append(_label(frame.f_code))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+class Sampler:
+    """Снимки стека одного потока. С task учитываются только снимки,
+    сделанные, пока в loop выполняется эта задача (профиль одного запроса
+    без чужих запросов, обрабатываемых тем же loop)"""
+
+    def __init__(
+        self,
+        thread_id: int,
+        interval: float,
+        task: asyncio.Task | None = None,
+    ):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.task = task
+        self.loop = task.get_loop() if task is not None else None
+        self.stacks: Counter[str] = Counter()
+        self.samples = 0
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+
+    def start(self):
+        self._switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(min(self.interval, self._switch_interval))
+        self._started = time.perf_counter()
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.duration = time.perf_counter() - self._started
+        sys.setswitchinterval(self._switch_interval)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            if (
+                self.task is not None
+                and _current_tasks is not None
+                and _current_tasks.get(self.loop) is not self.task
+            ):
+                continue
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                return
+            self.stacks[collapse(frame)] += 1
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        return "".join(
+            f"{stack} {count}\n" for stack, count in self.stacks.most_common()
+        )
+
+    def headers(self) -> dict:
+        return {
+            "X-Profile-Samples": str(self.samples),
+            "X-Profile-Duration": f"{self.duration:.3f}",
+        }
+
+
+def try_acquire() -> bool:
+    """Занимает единственный сэмплер воркера; False - профилирование уже идет"""
+    return _busy.acquire(blocking=False)
+
+
+def release():
+    _busy.release()
+
+
+async def profile_window(seconds: float, interval: float) -> Sampler:
+    """Профиль потока event loop за seconds секунд. Вызывающий должен
+    заранее занять сэмплер через try_acquire"""
+    sampler = Sampler(threading.get_ident(), interval)
+    sampler.start()
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        sampler.stop()
+    return sampler
+
+
+def get_profile(profile_id: str) -> Sampler | None:
+    return _profiles.get(profile_id)
+
+
+def _store(profile_id: str, sampler: Sampler):
+    _profiles[profile_id] = sampler
+    while len(_profiles) > MAX_STORED_PROFILES:
+        _profiles.popitem(last=False)
+
+
+class ProfilerMiddleware:
+    """Профиль одного запроса по заголовку X-Profile: 1 с верным
+    X-Admin-Token. Ответ получает X-Profile-Id, профиль забирается через
+    GET /api/admin/profiles/{id}. Без токена в настройках - один вызов
+    функции на запрос"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        token = admin_token()
+        if scope["type"] != "http" or not token:
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        if (
+            headers.get(PROFILE_HEADER) != "1"
+            or not token_matches(headers.get(TOKEN_HEADER), token)
+            or not try_acquire()
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = uuid.uuid4().hex
+        sampler = Sampler(
+            threading.get_ident(), REQUEST_INTERVAL, asyncio.current_task()
+        )
+
+        async def send_with_id(message: Message):
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).append(PROFILE_ID_HEADER, profile_id)
+            await send(message)
+
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            sampler.stop()
+            release()
+            _store(profile_id, sampler)
@@ -0,0 +1,259 @@
+"""Ограничение частоты запросов и допуск к БД под всплесками нагрузки.
+
+Роутер подключает зависимость limited("группа"). На каждый запрос:
+1. Корзина токенов на клиента и маршрут: RATE_LIMITS="группа=rps/всплеск".
+   Пустая корзина - 429 с Retry-After до следующего токена.
+2. Допуск: не больше ADMISSION_CONCURRENCY одновременных запросов к БД на
+   воркер и, если задано в ADMISSION_LIMITS="группа=N", на группу. Сверх
+   лимита до ADMISSION_QUEUE запросов ждут место не дольше
+   ADMISSION_QUEUE_TIMEOUT_MS, остальные сразу получают 503 с Retry-After.
+   Место держится до конца ответа, включая потоковые выгрузки.
+
+Лимиты группы можно задать отдельно для чтения и записи: "enrollments.write"
+действует на POST/PUT/DELETE, "enrollments" - на все запросы группы.
+
+Лишние запросы отсекаются сразу, а не ждут блокировку SQLite или
+соединение пула до DB_POOL_TIMEOUT: время ответа принятых запросов
+остается ограниченным. Корзины живут в памяти воркера; общее для воркеров
+хранилище реализует RateLimitBackend. Допуск всегда свой у воркера: он
+защищает пул соединений этого процесса.
+"""
+
+import asyncio
+import math
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from typing import Callable
+
+from fastapi import HTTPException, Request
+
+from config import get_settings
+
+RETRY_AFTER_HEADER = "Retry-After"
+READ_METHODS = ("GET", "HEAD", "OPTIONS")
+# Корзин в памяти не больше этого числа: давно не приходившие клиенты
+# вытесняются (их корзина к тому времени все равно полная)
+MAX_BUCKETS = 100_000
+GLOBAL = "*"
+
+
+class RateLimitBackend(ABC):
+    """Интерфейс хранилища корзин токенов: строковые ключи, как в Redis,
+    чтобы лимит можно было сделать общим для воркеров"""
+
+    @abstractmethod
+    async def take(self, key: str, rate: float, burst: int) -> float:
+        """Забирает токен из корзины key: 0 - запрос разрешен, иначе
+        через сколько секунд появится токен"""
+
+    @abstractmethod
+    def clear(self) -> None: ...
+
+    @abstractmethod
+    def stats(self) -> dict: ...
+
+
+class MemoryBuckets(RateLimitBackend):
+    """Корзины токенов в памяти процесса. Корзина хранит остаток токенов и
+    время обновления, пополнение считается при обращении"""
+
+    def __init__(
+        self,
+        max_keys: int = MAX_BUCKETS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_keys = max_keys
+        self.clock = clock
+        self.clear()
+
+    async def take(self, key: str, rate: float, burst: int) -> float:
+        now = self.clock()
+        tokens, updated = self._buckets.pop(key, (burst, now))
+        tokens = min(burst, tokens + (now - updated) * rate)
+        if tokens >= 1:
+            tokens -= 1
+            wait = 0.0
+            self.allowed += 1
+        else:
+            wait = (1 - tokens) / rate
+            self.limited += 1
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return wait
+
+    def clear(self) -> None:
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        self.allowed = 0
+        self.limited = 0
+
+    def stats(self) -> dict:
+        return {
+            "backend": "memory",
+            "buckets": len(self._buckets),
+            "allowed": self.allowed,
+            "limited": self.limited,
+        }
+
+
+class AdmissionController:
+    """Не больше limit одновременных запросов; до queue_size следующих
+    ждут место в порядке прихода не дольше timeout секунд"""
+
+    def __init__(self, limit: int, queue_size: int, timeout: float):
+        self.limit = limit
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.active = 0
+        self._waiters: deque[asyncio.Future] = deque()
+        self.admitted = 0
+        self.queued = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    async def acquire(self) -> bool:
+        """True - место занято (освободить через release), False - отказ"""
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            self.admitted += 1
+            return True
+        if len(self._waiters) >= self.queue_size:
+            self.rejected += 1
+            return False
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self.queued += 1
+        try:
+            await asyncio.wait_for(waiter, self.timeout)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            return False
+        except asyncio.CancelledError:
+            # Клиент ушел, когда место уже было передано: возвращаем его
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+        self.admitted += 1
+        return True
+
+    def release(self):
+        # Место передается первому ждущему, счетчик active не меняется
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    def stats(self) -> dict:
+        return {
+            "limit": self.limit,
+            "active": self.active,
+            "waiting": len(self._waiters),
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+        }
+
+
+rate_limiter: RateLimitBackend = MemoryBuckets()
+_controllers: dict[str, AdmissionController | None] = {}
+
+
+def _policy_key(limits: dict, group: str, method: str) -> str | None:
+    """Ключ лимита запроса: сначала отдельный для чтения или записи"""
+    kind = "read" if method in READ_METHODS else "write"
+    for key in (f"{group}.{kind}", group):
+        if key in limits:
+            return key
+    return None
+
+
+def admission(key: str) -> AdmissionController | None:
+    """Контроллер ключа из ADMISSION_LIMITS (GLOBAL - общий на воркер);
+    None - без лимита"""
+    if key not in _controllers:
+        settings = get_settings()
+        if key == GLOBAL:
+            limit = settings.admission_concurrency
+        else:
+            limit = settings.admission_limits.get(key, 0)
+        _controllers[key] = (
+            AdmissionController(
+                limit,
+                settings.admission_queue,
+                settings.admission_queue_timeout_ms / 1000,
+            )
+            if limit
+            else None
+        )
+    return _controllers[key]
+
+
+def reset():
+    """Сбрасывает корзины и контроллеры (после смены настроек, в тестах)"""
+    rate_limiter.clear()
+    _controllers.clear()
+
+
+def stats() -> dict:
+    return {
+        "rate_limiter": rate_limiter.stats(),
+        "admission": {
+            group: controller.stats()
+            for group, controller in _controllers.items()
+            if controller is not None
+        },
+    }
+
+
+def _retry_after(seconds: float) -> dict:
+    return {RETRY_AFTER_HEADER: str(max(1, math.ceil(seconds)))}
+
+
+def limited(group: str):
+    """Зависимость роутера: лимит частоты по клиенту и маршруту, затем
+    допуск группы и общий допуск воркера"""
+
+    async def dependency(request: Request):
+        settings = get_settings()
+        rate_key = _policy_key(settings.rate_limits, group, request.method)
+        if rate_key is not None:
+            rps, burst = settings.rate_limits[rate_key]
+            client = request.client.host if request.client else "unknown"
+            route = getattr(request.scope.get("route"), "path", request.url.path)
+            key = f"{client}:{request.method} {route}"
+            wait = await rate_limiter.take(key, rps, burst)
+            if wait:
+                raise HTTPException(
+                    status_code=429,
+                    detail="Too many requests",
+                    headers=_retry_after(wait),
+                )
+
+        # Сначала узкий лимит группы: ожидая его, запрос не держит общее место
+        group_key = _policy_key(settings.admission_limits, group, request.method)
+        controllers = (admission(group_key) if group_key else None, admission(GLOBAL))
+        acquired = []
+        try:
+            for controller in controllers:
+                if controller is None:
+                    continue
+                if not await controller.acquire():
+                    raise HTTPException(
+                        status_code=503,
+                        detail="Server is overloaded",
+                        headers=_retry_after(controller.timeout),
+                    )
+                acquired.append(controller)
+            yield
+        finally:
+            for controller in reversed(acquired):
+                controller.release()
+
+    return dependency
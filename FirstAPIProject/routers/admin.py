@@ -0,0 +1,50 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+
+import profiler
+
+# Профиль окна не дольше минуты: запрос держит соединение все это время
+MAX_PROFILE_SECONDS = 60.0
+
+
+def require_admin(x_admin_token: str | None = Header(None)):
+    """Пускает только с X-Admin-Token; без PROFILER_TOKEN в настройках
+    эндпоинтов как будто нет"""
+    token = profiler.admin_token()
+    if not token:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not profiler.token_matches(x_admin_token, token):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+router = APIRouter(
+    prefix="/api/admin",
+    tags=["admin"],
+    dependencies=[Depends(require_admin)],
+    include_in_schema=False,
+)
+
+
+@router.get("/profile", response_class=PlainTextResponse)
+async def profile(
+    seconds: float = Query(10.0, gt=0, le=MAX_PROFILE_SECONDS),
+    interval_ms: float = Query(5.0, ge=1, le=1000),
+):
+    """Профиль потока event loop за seconds секунд в виде свернутых стеков
+    (flamegraph.pl, speedscope): нагрузку дают остальные клиенты"""
+    if not profiler.try_acquire():
+        raise HTTPException(status_code=409, detail="Profiling already in progress")
+    try:
+        sampler = await profiler.profile_window(seconds, interval_ms / 1000)
+    finally:
+        profiler.release()
+    return PlainTextResponse(sampler.collapsed(), headers=sampler.headers())
+
+
+@router.get("/profiles/{profile_id}", response_class=PlainTextResponse)
+async def request_profile(profile_id: str):
+    """Профиль запроса, отправленного с X-Profile: 1 (id из X-Profile-Id)"""
+    sampler = profiler.get_profile(profile_id)
+    if sampler is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return PlainTextResponse(sampler.collapsed(), headers=sampler.headers())
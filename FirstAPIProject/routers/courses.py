@@ -1,52 +1,179 @@
-from fastapi import APIRouter, HTTPException, Depends
+from functools import partial
+from typing import Any
+
+from fastapi import APIRouter, HTTPException, Depends, Query, Body, Request
 from fastapi.responses import HTMLResponse
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 import crud
-from models import Course, CourseCreate
-from database import get_db
+import fastjson
+import importer
+from models import (
+    Course,
+    Student,
+    CourseCreate,
+    Page,
+    SearchPage,
+    BulkResult,
+    ImportReport,
+    validate_bulk,
+    DEFAULT_PAGE_LIMIT,
+    MAX_PAGE_LIMIT,
+    MAX_SEARCH_OFFSET,
+    MAX_BULK_ITEMS,
+)
+from database import get_async_db, Course as CourseModel
+from export import DataFormat, export_response
+from conditional import conditional
+from ratelimit import limited
+from pages import page_store
+
+router = APIRouter(
+    prefix="/api/courses", tags=["courses"], dependencies=[Depends(limited("courses"))]
+)
+
+
+@router.get("/", response_model=Page[Course])
+async def get_courses(
+    limit: int = Query(DEFAULT_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT),
+    after: int | None = Query(None, description="next_cursor предыдущей страницы"),
+    min_price: float | None = Query(None, ge=0),
+    max_price: float | None = Query(None, ge=0),
+    fields: list[str] | None = Depends(fastjson.field_selection(Course)),
+    cache_headers: dict = Depends(conditional("course")),
+    db: AsyncSession = Depends(get_async_db),
+):
+    filters = dict(limit=limit, after=after, min_price=min_price, max_price=max_price)
+    # Часть полей отдается тем же путем: модель ответа требует все поля
+    if fields is not None or fastjson.enabled():
+        rows, next_cursor = await crud.get_all_courses(
+            db, **filters, as_rows=True, fields=fields
+        )
+        return fastjson.page_response(
+            CourseModel, Course, rows, next_cursor, cache_headers, fields
+        )
+    courses, next_cursor = await crud.get_all_courses(db, **filters)
+    return {"items": courses, "next_cursor": next_cursor}
 
-router = APIRouter(prefix="/api/courses", tags=["courses"])
+
+@router.post("/bulk", response_model=BulkResult)
+async def create_courses_bulk(
+    items: list[Any] = Body(
+        ..., max_length=MAX_BULK_ITEMS, description="Массив объектов CourseCreate"
+    ),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Создать курсы пакетом: ошибочные элементы не мешают остальным"""
+    valid, errors = validate_bulk(CourseCreate, items)
+    created_ids = await crud.bulk_create_courses(db, [c for _, c in valid])
+    ids = [None] * len(items)
+    for (index, _), course_id in zip(valid, created_ids):
+        ids[index] = course_id
+    return BulkResult(created=len(created_ids), ids=ids, errors=errors)
 
 
-@router.get("/", response_model=list[Course])
-async def get_courses(db: Session = Depends(get_db)):
-    courses = crud.get_all_courses(db)
-    return courses
+@router.post("/import", response_model=ImportReport)
+async def import_courses(
+    request: Request,
+    format: DataFormat = "ndjson",
+    import_id: str | None = Query(
+        None, description="id для опроса прогресса: GET /api/imports/{import_id}"
+    ),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Импорт курсов из CSV/NDJSON в теле запроса: файл читается потоком,
+    каждая строка проверяется как CourseCreate, курсы коммитятся пачками"""
+    report = importer.start_report(import_id)
+    return await importer.import_rows(
+        request.stream(),
+        format,
+        CourseCreate,
+        partial(crud.bulk_create_courses, db),
+        report,
+    )
 
 
-@router.get("/{course_id}", response_model=Course)
-async def get_course(course_id: int, db: Session = Depends(get_db)):
-    course = crud.get_course(db, course_id)
+@router.get("/export")
+async def export_courses(
+    format: DataFormat = "ndjson",
+    cache_headers: dict = Depends(conditional("course")),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Выгрузить все курсы потоком в NDJSON или CSV"""
+    rows = crud.stream_rows(db, CourseModel)
+    return export_response(rows, CourseModel, format, "courses", cache_headers)
+
+
+@router.get(
+    "/search",
+    response_model=SearchPage[Course],
+    dependencies=[Depends(conditional("course"))],
+)
+async def search_courses(
+    q: str = Query(..., min_length=1, max_length=200, description="Слова для поиска"),
+    limit: int = Query(DEFAULT_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT),
+    offset: int = Query(0, ge=0, le=MAX_SEARCH_OFFSET),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Полнотекстовый поиск по названию и описанию: слова ищутся по началу,
+    результаты отсортированы по релевантности (bm25)"""
+    courses, next_offset = await crud.search_courses(db, q, limit=limit, offset=offset)
+    return {"items": courses, "next_offset": next_offset}
+
+
+@router.get(
+    "/{course_id}", response_model=Course, dependencies=[Depends(conditional("course"))]
+)
+async def get_course(course_id: int, db: AsyncSession = Depends(get_async_db)):
+    course = await crud.get_course(db, course_id)
     if not course:
         raise HTTPException(status_code=404, detail="Course not found")
     return course
 
 
+@router.get(
+    "/{course_id}/students",
+    response_model=Page[Student],
+    dependencies=[Depends(conditional("course", "enrollment", "student"))],
+)
+async def get_course_students(
+    course_id: int,
+    limit: int = Query(DEFAULT_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT),
+    after: int | None = Query(None, description="next_cursor предыдущей страницы"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Студенты, записанные на курс, по возрастанию id, постранично"""
+    if not await crud.get_course(db, course_id):
+        raise HTTPException(status_code=404, detail="Course not found")
+    students, next_cursor = await crud.get_course_students(
+        db, course_id, limit=limit, after=after
+    )
+    return {"items": students, "next_cursor": next_cursor}
+
+
 @router.post("/", response_model=Course)
-async def create_course(course: CourseCreate, db: Session = Depends(get_db)):
-    new_course = crud.create_course(db, course)
+async def create_course(course: CourseCreate, db: AsyncSession = Depends(get_async_db)):
+    new_course = await crud.create_course(db, course)
     return new_course
 
 
 @router.put("/{course_id}", response_model=Course)
 async def update_course(
-    course_id: int, course: CourseCreate, db: Session = Depends(get_db)
+    course_id: int, course: CourseCreate, db: AsyncSession = Depends(get_async_db)
 ):
-    updated_course = crud.update_course(db, course_id, course)
+    updated_course = await crud.update_course(db, course_id, course)
+    if not updated_course:
+        raise HTTPException(status_code=404, detail="Course not found")
+    return updated_course
 
 
 @router.delete("/{course_id}")
-async def delete_course(course_id: int, db: Session = Depends(get_db)):
-    success = crud.delete_course(db, course_id)
+async def delete_course(course_id: int, db: AsyncSession = Depends(get_async_db)):
+    success = await crud.delete_course(db, course_id)
     if not success:
         raise HTTPException(status_code=404, detail="Course not found")
     return {"message": "Course deleted successfully"}
 
 
 @router.get("/page/", response_class=HTMLResponse, include_in_schema=False)
-async def courses_page():
-    try:
-        with open("templates/courses.html", "r", encoding="utf-8") as f:
-            return HTMLResponse(content=f.read())
-    except FileNotFoundError:
-        return HTMLResponse(content="<h1>Courses Page</h1><p>HTML file not found</p>")
+async def courses_page(request: Request):
+    return page_store.response("courses", request)
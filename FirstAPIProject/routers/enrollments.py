@@ -1,18 +1,40 @@
-from fastapi import APIRouter, HTTPException, Depends
+from typing import Any
+
+from fastapi import APIRouter, HTTPException, Depends, Query, Body, Request
 from fastapi.responses import HTMLResponse
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 import crud
-from models import Enrollment, EnrollmentCreate
-from database import get_db
+import fastjson
+from models import (
+    Enrollment,
+    EnrollmentCreate,
+    EnrollmentDetailPage,
+    Page,
+    BulkResult,
+    BulkItemError,
+    validate_bulk,
+    DEFAULT_PAGE_LIMIT,
+    MAX_PAGE_LIMIT,
+    MAX_BULK_ITEMS,
+)
+from database import get_async_db, Enrollment as EnrollmentModel
+from export import DataFormat, export_response
+from conditional import conditional
+from ratelimit import limited
+from pages import page_store
 
-router = APIRouter(prefix="/api", tags=["enrollments"])
+router = APIRouter(
+    prefix="/api", tags=["enrollments"], dependencies=[Depends(limited("enrollments"))]
+)
 
 
 @router.post("/enroll/", response_model=Enrollment)
-async def enroll_student(enrollment: EnrollmentCreate, db: Session = Depends(get_db)):
+async def enroll_student(
+    enrollment: EnrollmentCreate, db: AsyncSession = Depends(get_async_db)
+):
     """Записать студента на курс"""
     try:
-        new_enrollment = crud.create_enrollment(db, enrollment)
+        new_enrollment = await crud.create_enrollment(db, enrollment)
         return new_enrollment
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -20,45 +42,112 @@ async def enroll_student(enrollment: EnrollmentCreate, db: Session = Depends(get
         raise HTTPException(status_code=500, detail=f"Ошибка сервера: {str(e)}")
 
 
-@router.get("/enrollments/", response_model=list[Enrollment])
-async def get_enrollments(db: Session = Depends(get_db)):
-    """Получить все записи на курсы"""
-    enrollments = crud.get_all_enrollments(db)
-    return enrollments
+@router.post("/enroll/bulk", response_model=BulkResult)
+async def enroll_students_bulk(
+    items: list[Any] = Body(
+        ...,
+        max_length=MAX_BULK_ITEMS,
+        description="Массив объектов EnrollmentCreate",
+    ),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Записать студентов на курсы пакетом, уже существующие пары пропускаются"""
+    valid, errors = validate_bulk(EnrollmentCreate, items)
+    created_ids, crud_errors = await crud.bulk_create_enrollments(
+        db, [e for _, e in valid]
+    )
+    ids = [None] * len(items)
+    for position, (index, _) in enumerate(valid):
+        ids[index] = created_ids[position]
+        if position in crud_errors:
+            errors.append(BulkItemError(index=index, detail=crud_errors[position]))
+    errors.sort(key=lambda error: error.index)
+    created = sum(1 for enrollment_id in created_ids if enrollment_id is not None)
+    return BulkResult(created=created, ids=ids, errors=errors)
+
+
+@router.get("/enrollments/", response_model=Page[Enrollment])
+async def get_enrollments(
+    limit: int = Query(DEFAULT_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT),
+    after: int | None = Query(None, description="next_cursor предыдущей страницы"),
+    student_id: int | None = None,
+    course_id: int | None = None,
+    fields: list[str] | None = Depends(fastjson.field_selection(Enrollment)),
+    cache_headers: dict = Depends(conditional("enrollment")),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Получить записи на курсы постранично"""
+    filters = dict(limit=limit, after=after, student_id=student_id, course_id=course_id)
+    # Часть полей отдается тем же путем: модель ответа требует все поля
+    if fields is not None or fastjson.enabled():
+        rows, next_cursor = await crud.get_all_enrollments(
+            db, **filters, as_rows=True, fields=fields
+        )
+        return fastjson.page_response(
+            EnrollmentModel, Enrollment, rows, next_cursor, cache_headers, fields
+        )
+    enrollments, next_cursor = await crud.get_all_enrollments(db, **filters)
+    return {"items": enrollments, "next_cursor": next_cursor}
 
 
-@router.get("/enrollments/detailed/")
-async def get_detailed_enrollments(db: Session = Depends(get_db)):
+@router.get(
+    "/enrollments/detailed/",
+    response_model=EnrollmentDetailPage,
+    dependencies=[Depends(conditional("enrollment", "student", "course"))],
+)
+async def get_detailed_enrollments(
+    limit: int = Query(DEFAULT_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT),
+    after: int | None = Query(None, description="next_cursor предыдущей страницы"),
+    db: AsyncSession = Depends(get_async_db),
+):
     """Получить записи с информацией о студентах и курсах"""
-    detailed_enrollments = crud.get_detailed_enrollments(db)
-    return {"enrollments": detailed_enrollments}
+    rows, next_cursor = await crud.get_detailed_enrollments(
+        db, limit=limit, after=after
+    )
+    detailed_enrollments = [
+        {"enrollment": enrollment, "student": student, "course": course}
+        for enrollment, student, course in rows
+    ]
+    return {"enrollments": detailed_enrollments, "next_cursor": next_cursor}
+
+
+@router.get("/enrollments/export")
+async def export_enrollments(
+    format: DataFormat = "ndjson",
+    cache_headers: dict = Depends(conditional("enrollment")),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Выгрузить все записи на курсы потоком в NDJSON или CSV"""
+    rows = crud.stream_rows(db, EnrollmentModel)
+    return export_response(rows, EnrollmentModel, format, "enrollments", cache_headers)
 
 
 @router.put("/enrollments/{enrollment_id}/", response_model=Enrollment)
 async def update_enrollment(
-        enrollment_id: int,
-        enrollment: EnrollmentCreate,
-        db: Session = Depends(get_db),
+    enrollment_id: int,
+    enrollment: EnrollmentCreate,
+    db: AsyncSession = Depends(get_async_db),
 ):
-    updated_enrollment = crud.update_enrollment(db, enrollment_id, enrollment)
+    try:
+        updated_enrollment = await crud.update_enrollment(db, enrollment_id, enrollment)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not updated_enrollment:
+        raise HTTPException(status_code=404, detail="Enrollment not found")
     return updated_enrollment
 
 
 @router.delete("/enrollments/{enrollment_id}")
-async def delete_enrollment(enrollment_id: int, db: Session = Depends(get_db)):
+async def delete_enrollment(
+    enrollment_id: int, db: AsyncSession = Depends(get_async_db)
+):
     """Удалить запись по ID"""
-    success = crud.delete_enrollment(db, enrollment_id)
+    success = await crud.delete_enrollment(db, enrollment_id)
     if not success:
         raise HTTPException(status_code=404, detail="Enrollment not found")
     return {"message": "Enrollment deleted successfully"}
 
 
 @router.get("/page/", response_class=HTMLResponse, include_in_schema=False)
-async def enrollments_page():
-    try:
-        with open("templates/enrollments.html", "r", encoding="utf-8") as f:
-            return HTMLResponse(content=f.read())
-    except FileNotFoundError:
-        return HTMLResponse(
-            content="<h1>Enrollments Page</h1><p>HTML file not found</p>"
-        )
+async def enrollments_page(request: Request):
+    return page_store.response("enrollments", request)
@@ -0,0 +1,21 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+import crud
+from models import Stats
+from database import get_async_db
+from conditional import conditional
+from ratelimit import limited
+
+router = APIRouter(
+    prefix="/api", tags=["stats"], dependencies=[Depends(limited("stats"))]
+)
+
+
+@router.get(
+    "/stats",
+    response_model=Stats,
+    dependencies=[Depends(conditional("student", "course", "enrollment"))],
+)
+async def get_stats(db: AsyncSession = Depends(get_async_db)):
+    """Счетчики для главной страницы вместо загрузки полных списков"""
+    return await crud.get_stats(db)
@@ -1,53 +1,190 @@
-from fastapi import APIRouter, HTTPException, Depends
+from functools import partial
+from typing import Any
+
+from fastapi import APIRouter, HTTPException, Depends, Query, Body, Request
 from fastapi.responses import HTMLResponse
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 import crud
-from models import Student, StudentCreate
-from database import get_db
+import fastjson
+import importer
+from models import (
+    Student,
+    Course,
+    StudentCreate,
+    Page,
+    SearchPage,
+    BulkResult,
+    ImportReport,
+    validate_bulk,
+    DEFAULT_PAGE_LIMIT,
+    MAX_PAGE_LIMIT,
+    MAX_SEARCH_OFFSET,
+    MAX_BULK_ITEMS,
+)
+from database import get_async_db, Student as StudentModel
+from export import DataFormat, export_response
+from conditional import conditional
+from ratelimit import limited
+from pages import page_store
+
+router = APIRouter(
+    prefix="/api/students",
+    tags=["students"],
+    dependencies=[Depends(limited("students"))],
+)
+
+
+@router.get("/", response_model=Page[Student])
+async def get_students(
+    limit: int = Query(DEFAULT_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT),
+    after: int | None = Query(None, description="next_cursor предыдущей страницы"),
+    is_active: bool | None = None,
+    min_age: int | None = Query(None, ge=0),
+    max_age: int | None = Query(None, ge=0),
+    fields: list[str] | None = Depends(fastjson.field_selection(Student)),
+    cache_headers: dict = Depends(conditional("student")),
+    db: AsyncSession = Depends(get_async_db),
+):
+    filters = dict(
+        limit=limit, after=after, is_active=is_active, min_age=min_age, max_age=max_age
+    )
+    # Часть полей отдается тем же путем: модель ответа требует все поля
+    if fields is not None or fastjson.enabled():
+        rows, next_cursor = await crud.get_all_students(
+            db, **filters, as_rows=True, fields=fields
+        )
+        return fastjson.page_response(
+            StudentModel, Student, rows, next_cursor, cache_headers, fields
+        )
+    students, next_cursor = await crud.get_all_students(db, **filters)
+    return {"items": students, "next_cursor": next_cursor}
+
+
+@router.post("/bulk", response_model=BulkResult)
+async def create_students_bulk(
+    items: list[Any] = Body(
+        ..., max_length=MAX_BULK_ITEMS, description="Массив объектов StudentCreate"
+    ),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Создать студентов пакетом: ошибочные элементы не мешают остальным"""
+    valid, errors = validate_bulk(StudentCreate, items)
+    created_ids = await crud.bulk_create_students(db, [s for _, s in valid])
+    ids = [None] * len(items)
+    for (index, _), student_id in zip(valid, created_ids):
+        ids[index] = student_id
+    return BulkResult(created=len(created_ids), ids=ids, errors=errors)
+
+
+@router.post("/import", response_model=ImportReport)
+async def import_students(
+    request: Request,
+    format: DataFormat = "ndjson",
+    import_id: str | None = Query(
+        None, description="id для опроса прогресса: GET /api/imports/{import_id}"
+    ),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Импорт студентов из CSV/NDJSON в теле запроса: файл читается потоком,
+    каждая строка проверяется как StudentCreate, студенты коммитятся пачками"""
+    report = importer.start_report(import_id)
+    return await importer.import_rows(
+        request.stream(),
+        format,
+        StudentCreate,
+        partial(crud.bulk_create_students, db),
+        report,
+    )
 
-router = APIRouter(prefix="/api/students", tags=["students"])
 
+@router.get("/export")
+async def export_students(
+    format: DataFormat = "ndjson",
+    cache_headers: dict = Depends(conditional("student")),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Выгрузить всех студентов потоком в NDJSON или CSV"""
+    rows = crud.stream_rows(db, StudentModel)
+    return export_response(rows, StudentModel, format, "students", cache_headers)
 
-@router.get("/", response_model=list[Student])
-async def get_students(db: Session = Depends(get_db)):
-    students = crud.get_all_students(db)
-    return students
 
+@router.get(
+    "/search",
+    response_model=SearchPage[Student],
+    dependencies=[Depends(conditional("student"))],
+)
+async def search_students(
+    q: str = Query(..., min_length=1, max_length=200, description="Слова для поиска"),
+    limit: int = Query(DEFAULT_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT),
+    offset: int = Query(0, ge=0, le=MAX_SEARCH_OFFSET),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Полнотекстовый поиск по имени, фамилии и email: слова ищутся по началу,
+    результаты отсортированы по релевантности (bm25)"""
+    students, next_offset = await crud.search_students(
+        db, q, limit=limit, offset=offset
+    )
+    return {"items": students, "next_offset": next_offset}
 
-@router.get("/{student_id}", response_model=Student)
-async def get_student(student_id: int, db: Session = Depends(get_db)):
-    student = crud.get_student(db, student_id)
+
+@router.get(
+    "/{student_id}",
+    response_model=Student,
+    dependencies=[Depends(conditional("student"))],
+)
+async def get_student(student_id: int, db: AsyncSession = Depends(get_async_db)):
+    student = await crud.get_student(db, student_id)
     if not student:
         raise HTTPException(status_code=404, detail="Student not found")
     return student
 
 
+@router.get(
+    "/{student_id}/courses",
+    response_model=Page[Course],
+    dependencies=[Depends(conditional("student", "enrollment", "course"))],
+)
+async def get_student_courses(
+    student_id: int,
+    limit: int = Query(DEFAULT_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT),
+    after: int | None = Query(None, description="next_cursor предыдущей страницы"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Курсы студента по возрастанию id, постранично"""
+    if not await crud.get_student(db, student_id):
+        raise HTTPException(status_code=404, detail="Student not found")
+    courses, next_cursor = await crud.get_student_courses(
+        db, student_id, limit=limit, after=after
+    )
+    return {"items": courses, "next_cursor": next_cursor}
+
+
 @router.post("/", response_model=Student)
-async def create_student(student: StudentCreate, db: Session = Depends(get_db)):
-    new_student = crud.create_student(db,student)
+async def create_student(
+    student: StudentCreate, db: AsyncSession = Depends(get_async_db)
+):
+    new_student = await crud.create_student(db, student)
     return new_student
 
 
 @router.put("/{student_id}", response_model=Student)
 async def update_student(
-    student_id: int, student: StudentCreate, db: Session = Depends(get_db)
+    student_id: int, student: StudentCreate, db: AsyncSession = Depends(get_async_db)
 ):
-    updated_student = crud.update_student(db, student_id, student)
+    updated_student = await crud.update_student(db, student_id, student)
+    if not updated_student:
+        raise HTTPException(status_code=404, detail="Student not found")
     return updated_student
 
 
 @router.delete("/{student_id}")
-async def delete_student(student_id: int, db: Session = Depends(get_db)):
-    success = crud.delete_student(db, student_id)
+async def delete_student(student_id: int, db: AsyncSession = Depends(get_async_db)):
+    success = await crud.delete_student(db, student_id)
     if not success:
         raise HTTPException(status_code=404, detail="Student not found")
     return {"message": "Student deleted successfully"}
 
 
-@router.put("/page/", response_class=HTMLResponse, include_in_schema=False)
-async def students_page():
-    try:
-        with open("templates/students.html", "r", encoding="utf-8") as f:
-            return HTMLResponse(content=f.read())
-    except FileNotFoundError:
-        return HTMLResponse(content="<h1>Students Page</h1><p>HTML file not found</p>")
+@router.get("/page/", response_class=HTMLResponse, include_in_schema=False)
+async def students_page(request: Request):
+    return page_store.response("students", request)
@@ -0,0 +1,52 @@
+"""Продакшн-запуск: несколько воркеров uvicorn
+
+python server.py (настройки - переменные окружения, см. config.py)
+"""
+
+import importlib.util
+import os
+
+import uvicorn
+
+from config import SCHEMA_READY_ENV, get_settings
+from conditional import VERSIONS_FILE_ENV, create_versions_file
+
+
+def _available(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def prepare():
+    """Работа до запуска воркеров, которую не нужно повторять в каждом:
+    создание таблиц и общий файл версий таблиц"""
+    from database import create_tables
+
+    create_tables()
+    os.environ[SCHEMA_READY_ENV] = "1"
+    os.environ[VERSIONS_FILE_ENV] = create_versions_file()
+
+
+def main():
+    settings = get_settings()
+    prepare()
+    try:
+        uvicorn.run(
+            "main:app",
+            host=settings.host,
+            port=settings.port,
+            workers=settings.workers,
+            loop="uvloop" if _available("uvloop") else "asyncio",
+            http="httptools" if _available("httptools") else "h11",
+            timeout_keep_alive=settings.keep_alive_seconds,
+            backlog=settings.backlog,
+            limit_concurrency=settings.limit_concurrency,
+            timeout_graceful_shutdown=settings.graceful_shutdown_seconds,
+            proxy_headers=True,
+            access_log=settings.access_log,
+        )
+    finally:
+        os.remove(os.environ[VERSIONS_FILE_ENV])
+
+
+if __name__ == "__main__":
+    main()
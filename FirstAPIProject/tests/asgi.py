@@ -0,0 +1,66 @@
+import asyncio
+import os
+
+
+def current_rss_mb() -> float:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+async def call_streaming(app, method: str, path: str, body_chunks=(), query=b""):
+    """Прогоняет запрос через ASGI-приложение, отдавая тело по кускам
+    и выбрасывая тело ответа (TestClient и httpx копят его целиком и
+    исказили бы замер памяти).
+
+    Возвращает (статус, тело ответа до 64 КБ, размер тела, максимальный RSS).
+    """
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query,
+        "root_path": "",
+        "headers": [(b"host", b"test")],
+        "client": ("test", 1),
+        "server": ("test", 80),
+    }
+    chunks = iter(body_chunks)
+    request_done = False
+    response_done = asyncio.Event()
+    status = None
+    head = bytearray()
+    received = 0
+    peak_rss_mb = current_rss_mb()
+
+    async def receive():
+        nonlocal request_done, peak_rss_mb
+        if not request_done:
+            chunk = next(chunks, None)
+            if chunk is not None:
+                peak_rss_mb = max(peak_rss_mb, current_rss_mb())
+                return {"type": "http.request", "body": chunk, "more_body": True}
+            request_done = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        # Дальше ждем, как реальный сервер, пока ответ не будет отправлен
+        await response_done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status, received, peak_rss_mb
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            body = message.get("body", b"")
+            received += len(body)
+            if len(head) < 65536:
+                head.extend(body[: 65536 - len(head)])
+            peak_rss_mb = max(peak_rss_mb, current_rss_mb())
+            if not message.get("more_body", False):
+                response_done.set()
+
+    await app(scope, receive, send)
+    return status, bytes(head), received, peak_rss_mb
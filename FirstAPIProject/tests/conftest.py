@@ -1,51 +1,106 @@
 import pytest
 import sys
 import os
+import asyncio
+from contextlib import contextmanager
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.pool import StaticPool
 
 # Добавляем путь к родительской директории проекта
 project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, project_root)
 
+# Тесты работают с in-memory БД: lifespan не должен создавать файл проекта
+os.environ.setdefault("APP_SCHEMA_READY", "1")
+
 from main import app
-from database import Base, get_db
+import database
+from database import Base, get_async_db
+from cache import entity_cache
+from health import readiness_cache
+import ratelimit
 
 
 @pytest.fixture(scope="function")
-def test_client():
-    """Фикстура для тестового клиента - пересоздает БД для каждого теста"""
-    TEST_DATABASE_URL = "sqlite:///:memory:"
+def test_engine():
+    """Чистая in-memory БД для каждого теста"""
+    TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
 
-    test_engine = create_engine(
+    test_engine = create_async_engine(
         TEST_DATABASE_URL,
         connect_args={"check_same_thread": False},
         poolclass=StaticPool,
     )
 
+    async def create_all():
+        async with test_engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
     # 🔧 ВАЖНО: Сначала создаем все таблицы
-    Base.metadata.create_all(bind=test_engine)
+    asyncio.run(create_all())
+
+    yield test_engine
+
+    asyncio.run(test_engine.dispose())
+
 
-    TestingSessionLocal = sessionmaker(
-        autocommit=False, autoflush=False, bind=test_engine
+@pytest.fixture(scope="function")
+def test_client(test_engine, monkeypatch):
+    """Фикстура для тестового клиента - пересоздает БД для каждого теста"""
+    TestingSessionLocal = async_sessionmaker(
+        bind=test_engine, autoflush=False, expire_on_commit=False
     )
+    # Проверка готовности открывает сессии сама, без get_async_db
+    monkeypatch.setattr(database, "AsyncSessionLocal", TestingSessionLocal)
 
-    def override_get_db():
-        try:
-            db = TestingSessionLocal()
+    async def override_get_db():
+        async with TestingSessionLocal() as db:
             yield db
-        finally:
-            db.close()
 
     # Переопределяем зависимость БД
-    app.dependency_overrides[get_db] = override_get_db
-
-    client = TestClient(app)
-    return client
+    app.dependency_overrides[get_async_db] = override_get_db
+    # id в новой БД повторяются, кэш прошлого теста не должен их видеть
+    entity_cache.clear()
+    readiness_cache.clear()
+    ratelimit.reset()
 
-    yield client
+    with TestClient(app) as client:
+        yield client
 
     # Очищаем переопределения после теста
     app.dependency_overrides.clear()
+
+
+class QueryCounter:
+    """Считает SQL-запросы, ушедшие в БД, и запоминает их текст"""
+
+    def __init__(self):
+        self.count = 0
+        self.statements = []
+
+    def __call__(self, conn, cursor, statement, *args):
+        self.count += 1
+        self.statements.append(statement)
+
+
+@pytest.fixture(scope="function")
+def count_queries(test_engine):
+    """Контекстный менеджер для подсчета запросов к тестовой БД:
+
+    with count_queries() as queries:
+        test_client.get(...)
+    assert queries.count == 1
+    """
+
+    @contextmanager
+    def counter():
+        queries = QueryCounter()
+        event.listen(test_engine.sync_engine, "before_cursor_execute", queries)
+        try:
+            yield queries
+        finally:
+            event.remove(test_engine.sync_engine, "before_cursor_execute", queries)
+
+    return counter
@@ -0,0 +1,100 @@
+from sqlalchemy import event
+
+from cache import LRUCache, entity_cache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestLRUCache:
+    """LRU-кэш с TTL"""
+
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(max_items=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        assert cache.get("a") == 1
+        cache.set("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        stats = cache.stats()
+        assert stats["evictions"] == 1
+        assert stats["hits"] == 3
+        assert stats["misses"] == 1
+
+    def test_entry_expires_after_ttl(self):
+        clock = FakeClock()
+        cache = LRUCache(ttl=10, clock=clock)
+        cache.set("a", 1)
+        clock.now = 9.9
+        assert cache.get("a") == 1
+        clock.now = 10
+        assert cache.get("a") is None
+        assert cache.stats()["expirations"] == 1
+        assert cache.stats()["size"] == 0
+
+
+class TestEntityCache:
+    """Кэш GET по id и его инвалидация при записи"""
+
+    def test_cache_hit_does_not_touch_database(
+        self, test_client, test_engine, count_queries
+    ):
+        course = test_client.post(
+            "/api/courses/", json={"title": "Math", "duration_hours": 10}
+        ).json()
+        test_client.get(f"/api/courses/{course['id']}")
+
+        checkouts = []
+
+        def on_checkout(*args):
+            checkouts.append(args)
+
+        pool = test_engine.sync_engine.pool
+        event.listen(pool, "checkout", on_checkout)
+        try:
+            with count_queries() as queries:
+                response = test_client.get(f"/api/courses/{course['id']}")
+        finally:
+            event.remove(pool, "checkout", on_checkout)
+
+        assert response.json() == course
+        assert queries.count == 0
+        assert checkouts == []
+
+    def test_update_invalidates_entry(self, test_client):
+        student = {"first_name": "Ivan", "last_name": "Smith", "age": 20}
+        student_id = test_client.post("/api/students/", json=student).json()["id"]
+        test_client.get(f"/api/students/{student_id}")
+
+        test_client.put(f"/api/students/{student_id}", json={**student, "age": 30})
+
+        assert test_client.get(f"/api/students/{student_id}").json()["age"] == 30
+
+    def test_delete_invalidates_entry(self, test_client):
+        student = {"first_name": "Ivan", "last_name": "Smith", "age": 20}
+        student_id = test_client.post("/api/students/", json=student).json()["id"]
+        test_client.get(f"/api/students/{student_id}")
+
+        test_client.delete(f"/api/students/{student_id}")
+
+        assert test_client.get(f"/api/students/{student_id}").status_code == 404
+
+    def test_stats_endpoint(self, test_client):
+        course = test_client.post(
+            "/api/courses/", json={"title": "Math", "duration_hours": 10}
+        ).json()
+        test_client.get(f"/api/courses/{course['id']}")
+        test_client.get(f"/api/courses/{course['id']}")
+
+        stats = test_client.get("/api/cache/stats").json()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["size"] == entity_cache.stats()["size"] == 1
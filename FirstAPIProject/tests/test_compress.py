@@ -0,0 +1,113 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from cache import LRUCache
+from compress import CompressionMiddleware, accepted_encodings, zstandard
+from config import Settings
+
+STUDENTS = [{"first_name": "Ivan", "last_name": "Smith", "age": 20}] * 100
+BODY = "student,course,enrolled\n" * 200
+
+
+@pytest.fixture
+def compress_client():
+    """Отдельное приложение с middleware и собственным кэшем"""
+    app = FastAPI()
+    cache = LRUCache()
+    app.add_middleware(
+        CompressionMiddleware,
+        settings=Settings(compression_minimum_size=100),
+        cache=cache,
+    )
+
+    @app.get("/body")
+    async def body():
+        return PlainTextResponse(BODY, headers={"ETag": '"v1"'})
+
+    @app.get("/small")
+    async def small():
+        return PlainTextResponse("ok")
+
+    @app.get("/stream")
+    async def stream():
+        chunks = (BODY.encode() for _ in range(3))
+        return StreamingResponse(chunks, media_type="text/csv")
+
+    with TestClient(app) as client:
+        yield client, cache
+
+
+class TestCompressionMiddleware:
+    """Сжатие ответов по Accept-Encoding"""
+
+    def test_large_body_is_compressed(self, compress_client):
+        client, _ = compress_client
+        response = client.get("/body", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert int(response.headers["content-length"]) < len(BODY)
+        assert response.text == BODY
+
+    def test_small_body_and_identity_pass_through(self, compress_client):
+        client, _ = compress_client
+        small = client.get("/small", headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in small.headers
+
+        identity = client.get("/body", headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in identity.headers
+        assert identity.headers["etag"] == '"v1"'
+
+    def test_etag_becomes_weak_and_compressed_form_is_cached(self, compress_client):
+        client, cache = compress_client
+        for _ in range(2):
+            response = client.get("/body", headers={"Accept-Encoding": "gzip"})
+            assert response.headers["etag"] == 'W/"v1"'
+        assert cache.stats()["hits"] == 1
+
+    def test_streaming_response(self, compress_client):
+        client, _ = compress_client
+        response = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert "content-length" not in response.headers
+        assert response.text == BODY * 3
+
+    @pytest.mark.skipif(zstandard is None, reason="zstandard не установлен")
+    def test_zstd_preferred(self, compress_client):
+        client, _ = compress_client
+        response = client.get("/body", headers={"Accept-Encoding": "gzip, zstd"})
+        assert response.headers["content-encoding"] == "zstd"
+
+    def test_accepted_encodings(self):
+        assert accepted_encodings("gzip;q=0.5, br;q=0, deflate") == {
+            "gzip",
+            "deflate",
+        }
+
+
+class TestApiCompression:
+    """Сжатие ответов API"""
+
+    def test_list_is_compressed_and_revalidates(self, test_client):
+        test_client.post("/api/students/bulk", json=STUDENTS)
+        response = test_client.get(
+            "/api/students/?limit=100", headers={"Accept-Encoding": "gzip"}
+        )
+        assert response.headers["content-encoding"] == "gzip"
+        assert len(response.json()["items"]) == 100
+
+        etag = response.headers["etag"]
+        assert etag.startswith("W/")
+        response = test_client.get(
+            "/api/students/?limit=100", headers={"If-None-Match": etag}
+        )
+        assert response.status_code == 304
+
+    def test_export_stream_is_compressed(self, test_client):
+        test_client.post("/api/students/bulk", json=STUDENTS)
+        response = test_client.get(
+            "/api/students/export?format=csv", headers={"Accept-Encoding": "gzip"}
+        )
+        assert response.headers["content-encoding"] == "gzip"
+        assert len(response.text.splitlines()) == len(STUDENTS) + 1
@@ -0,0 +1,112 @@
+import tempfile
+
+from conditional import TableVersions, create_versions_file
+
+STUDENT = {"first_name": "Ivan", "last_name": "Smith", "age": 20}
+COURSE = {"title": "Math", "duration_hours": 10}
+
+
+class TestConditionalRequests:
+    """ETag / Last-Modified и ответы 304"""
+
+    def test_list_returns_validators(self, test_client):
+        response = test_client.get("/api/students/")
+        assert response.status_code == 200
+        assert response.headers["etag"].startswith('"')
+        assert "last-modified" in response.headers
+        assert response.headers["cache-control"] == "no-cache"
+
+    def test_matching_etag_returns_304_without_queries(
+        self, test_client, count_queries
+    ):
+        test_client.post("/api/students/", json=STUDENT)
+        etag = test_client.get("/api/students/").headers["etag"]
+
+        with count_queries() as queries:
+            response = test_client.get(
+                "/api/students/", headers={"If-None-Match": etag}
+            )
+
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+        assert queries.count == 0
+
+    def test_write_changes_etag(self, test_client):
+        etag = test_client.get("/api/students/").headers["etag"]
+        test_client.post("/api/students/", json=STUDENT)
+
+        response = test_client.get("/api/students/", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["etag"] != etag
+        assert len(response.json()["items"]) == 1
+
+    def test_other_table_write_keeps_etag(self, test_client):
+        etag = test_client.get("/api/students/").headers["etag"]
+        test_client.post("/api/courses/", json=COURSE)
+
+        response = test_client.get("/api/students/", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+
+    def test_detailed_enrollments_depend_on_courses(self, test_client):
+        course_id = test_client.post("/api/courses/", json=COURSE).json()["id"]
+        etag = test_client.get("/api/enrollments/detailed/").headers["etag"]
+
+        test_client.put(
+            f"/api/courses/{course_id}", json={**COURSE, "title": "Physics"}
+        )
+
+        response = test_client.get(
+            "/api/enrollments/detailed/", headers={"If-None-Match": etag}
+        )
+        assert response.status_code == 200
+
+    def test_etag_list_and_weak_prefix(self, test_client):
+        etag = test_client.get("/api/courses/").headers["etag"]
+        response = test_client.get(
+            "/api/courses/", headers={"If-None-Match": f'"other", W/{etag}'}
+        )
+        assert response.status_code == 304
+
+    def test_if_modified_since(self, test_client):
+        last_modified = test_client.get("/api/courses/").headers["last-modified"]
+        response = test_client.get(
+            "/api/courses/", headers={"If-Modified-Since": last_modified}
+        )
+        assert response.status_code == 304
+
+        response = test_client.get(
+            "/api/courses/",
+            headers={"If-Modified-Since": "Thu, 01 Jan 1970 00:00:00 GMT"},
+        )
+        assert response.status_code == 200
+
+    def test_single_entity_and_export(self, test_client):
+        student_id = test_client.post("/api/students/", json=STUDENT).json()["id"]
+        for url in (f"/api/students/{student_id}", "/api/students/export"):
+            etag = test_client.get(url).headers["etag"]
+            response = test_client.get(url, headers={"If-None-Match": etag})
+            assert response.status_code == 304
+
+
+class TestSharedVersions:
+    """Версии таблиц в общем файле видны всем воркерам"""
+
+    def test_bump_visible_through_shared_file(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+        path = create_versions_file()
+        first, second = TableVersions(path), TableVersions(path)
+        etag = second.etag(("student",))
+        assert first.etag(("student",)) == etag
+
+        first.bump("student")
+
+        assert second.version("student") == first.version("student") > 0
+        assert second.etag(("student",)) != etag
+        assert second.version("course") == 0
+
+    def test_local_versions_are_private(self):
+        first, second = TableVersions(), TableVersions()
+        first.bump("student")
+        assert second.version("student") == 0
+        assert first.etag(("student",)) != second.etag(("student",))
@@ -0,0 +1,104 @@
+import asyncio
+
+from sqlalchemy import create_engine, text
+
+from config import Settings
+from database import (
+    Base,
+    Course,
+    Student,
+    _engine_options,
+    async_url,
+    create_async_db_engine,
+    create_db_engine,
+    sync_url,
+)
+
+
+class TestSettings:
+    """Настройки из переменных окружения"""
+
+    def test_defaults(self, monkeypatch):
+        monkeypatch.delenv("DATABASE_URL", raising=False)
+        settings = Settings()
+        assert settings.database_url == "sqlite:///student_management.db"
+        assert settings.db_echo is False
+        assert settings.sqlite_journal_mode == "WAL"
+
+    def test_from_environment(self, monkeypatch):
+        monkeypatch.setenv("DATABASE_URL", "postgresql://app@db/app")
+        monkeypatch.setenv("DB_ECHO", "true")
+        monkeypatch.setenv("DB_POOL_SIZE", "20")
+        settings = Settings()
+        assert settings.database_url == "postgresql://app@db/app"
+        assert settings.db_echo is True
+        assert settings.db_pool_size == 20
+
+
+class TestEngineFactory:
+    """Движки по настройкам"""
+
+    def test_driver_urls(self):
+        assert str(async_url("sqlite:///app.db")) == "sqlite+aiosqlite:///app.db"
+        assert str(sync_url("sqlite+aiosqlite:///app.db")) == "sqlite:///app.db"
+        assert async_url("postgresql://db/app").drivername == "postgresql+asyncpg"
+        assert sync_url("postgresql+asyncpg://db/app").drivername == "postgresql"
+
+    def test_pool_options(self):
+        settings = Settings(database_url="", db_pool_size=7)
+        postgres = _engine_options(async_url("postgresql://db/app"), settings)
+        assert postgres["pool_size"] == 7
+        assert postgres["pool_pre_ping"] is True
+        memory = _engine_options(async_url("sqlite://"), settings)
+        assert memory == {"echo": False}
+
+    def test_sqlite_pragmas(self, tmp_path):
+        settings = Settings(database_url=f"sqlite:///{tmp_path / 'app.db'}")
+        engine = create_db_engine(settings)
+        with engine.connect() as conn:
+            pragma = lambda name: conn.execute(text(f"PRAGMA {name}")).scalar()
+            assert pragma("journal_mode") == "wal"
+            assert pragma("synchronous") == 1  # NORMAL
+            assert pragma("cache_size") == -settings.sqlite_cache_size_kb
+            assert pragma("busy_timeout") == settings.sqlite_busy_timeout_ms
+        engine.dispose()
+
+    def test_async_sqlite_pragmas(self, tmp_path):
+        settings = Settings(
+            database_url=f"sqlite:///{tmp_path / 'app.db'}", sqlite_synchronous="FULL"
+        )
+
+        async def run():
+            engine = create_async_db_engine(settings)
+            async with engine.connect() as conn:
+                journal = await conn.scalar(text("PRAGMA journal_mode"))
+                synchronous = await conn.scalar(text("PRAGMA synchronous"))
+            await engine.dispose()
+            return journal, synchronous
+
+        assert asyncio.run(run()) == ("wal", 2)
+
+
+class TestSqliteDDL:
+    """Счетчики и поиск создаются вместе с таблицами, от которых зависят"""
+
+    def triggers(self, engine):
+        with engine.connect() as conn:
+            return {
+                name
+                for (name,) in conn.execute(
+                    text("SELECT name FROM sqlite_master WHERE type = 'trigger'")
+                )
+            }
+
+    def test_partial_create_all(self, tmp_path):
+        engine = create_engine(f"sqlite:///{tmp_path / 'partial.db'}")
+        Base.metadata.create_all(engine, tables=[Student.__table__, Course.__table__])
+        triggers = self.triggers(engine)
+        assert "student_fts_insert" in triggers
+        assert not any(name.startswith("stats_") for name in triggers)
+
+        # Недостающие таблицы позже: счетчики и их триггеры появляются
+        Base.metadata.create_all(engine)
+        assert "stats_enrollment_insert" in self.triggers(engine)
+        engine.dispose()
@@ -0,0 +1,110 @@
+import asyncio
+import csv
+import io
+import json
+import os
+
+import pytest
+from sqlalchemy import create_engine, insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from main import app
+from database import Base, Student, get_async_db
+from tests.asgi import call_streaming, current_rss_mb
+
+
+def create_students(test_client, count):
+    items = [
+        {"first_name": "Ivan", "last_name": "Smith", "age": 20 + i}
+        for i in range(count)
+    ]
+    test_client.post("/api/students/bulk", json=items)
+
+
+class TestExport:
+    """Потоковая выгрузка таблиц"""
+
+    def test_export_students_ndjson(self, test_client):
+        create_students(test_client, 3)
+
+        response = test_client.get("/api/students/export")
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        assert [row["age"] for row in rows] == [20, 21, 22]
+        assert rows[0]["first_name"] == "Ivan"
+
+    def test_export_students_csv(self, test_client):
+        create_students(test_client, 2)
+
+        response = test_client.get("/api/students/export?format=csv")
+        assert response.status_code == 200
+        assert "students.csv" in response.headers["content-disposition"]
+        rows = list(csv.DictReader(io.StringIO(response.text)))
+        assert len(rows) == 2
+        assert rows[1]["age"] == "21"
+
+    def test_export_empty_csv_has_header(self, test_client):
+        response = test_client.get("/api/courses/export?format=csv")
+        assert response.status_code == 200
+        assert response.text.strip() == "id,title,description,duration_hours,price"
+
+    def test_export_enrollments(self, test_client):
+        response = test_client.get("/api/enrollments/export")
+        assert response.status_code == 200
+        assert response.text == ""
+
+    def test_export_unknown_format(self, test_client):
+        response = test_client.get("/api/students/export?format=xml")
+        assert response.status_code == 422
+
+
+@pytest.mark.skipif(
+    not os.getenv("RUN_SLOW_TESTS") or not os.path.exists("/proc/self/statm"),
+    reason="долгий тест: RUN_SLOW_TESTS=1, только Linux",
+)
+def test_export_million_rows_bounded_rss(tmp_path):
+    """Выгрузка 1M строк не раздувает память процесса"""
+    rows = 1_000_000
+    rss_ceiling_mb = 32
+    db_path = tmp_path / "export.db"
+
+    sync_engine = create_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(sync_engine)
+    with sync_engine.begin() as conn:
+        for start in range(0, rows, 50_000):
+            conn.execute(
+                insert(Student),
+                [
+                    {
+                        "first_name": "Export",
+                        "last_name": "Student",
+                        "age": 20,
+                        "email": f"student{i}@export.test",
+                    }
+                    for i in range(start, start + 50_000)
+                ],
+            )
+    sync_engine.dispose()
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+    sessions = async_sessionmaker(bind=engine, expire_on_commit=False)
+
+    async def override_get_db():
+        async with sessions() as db:
+            yield db
+
+    app.dependency_overrides[get_async_db] = override_get_db
+    try:
+        rss_before = current_rss_mb()
+        status, _, received, peak_rss = asyncio.run(
+            call_streaming(app, "GET", "/api/students/export")
+        )
+    finally:
+        app.dependency_overrides.clear()
+        asyncio.run(engine.dispose())
+
+    assert status == 200
+    assert received > rows * 50
+    growth = peak_rss - rss_before
+    assert growth < rss_ceiling_mb, f"RSS вырос на {growth:.0f} МБ"
@@ -0,0 +1,67 @@
+import pytest
+
+import fastjson
+
+STUDENTS = [
+    {"first_name": "Ivan", "last_name": "Smith", "age": 20 + i, "email": None}
+    for i in range(5)
+]
+COURSES = [
+    {"title": f"Course{i}", "duration_hours": 10 + i, "price": 100.5 * i}
+    for i in range(3)
+]
+
+URLS = [
+    "/api/students/",
+    "/api/students/?limit=2",
+    "/api/students/?limit=2&after=2&min_age=21",
+    "/api/students/?is_active=true",
+    "/api/courses/?limit=2",
+    "/api/courses/?min_price=100",
+    "/api/enrollments/?limit=3",
+    "/api/enrollments/?student_id=1",
+]
+
+
+@pytest.fixture
+def seeded_client(test_client):
+    test_client.post("/api/students/bulk", json=STUDENTS)
+    test_client.post("/api/courses/bulk", json=COURSES)
+    test_client.post(
+        "/api/enroll/bulk",
+        json=[{"student_id": s, "course_id": c} for s in (1, 2, 3) for c in (1, 2)],
+    )
+    return test_client
+
+
+class TestFastJson:
+    """Быстрый путь сериализации списков дает тот же ответ"""
+
+    @pytest.mark.parametrize("url", URLS)
+    def test_same_body_as_response_model(self, seeded_client, monkeypatch, url):
+        expected = seeded_client.get(url).json()
+        assert expected["items"]
+
+        monkeypatch.setattr(fastjson, "enabled", lambda: True)
+        response = seeded_client.get(url)
+
+        assert response.status_code == 200
+        assert response.json() == expected
+
+    def test_courses_have_schema_defaults(self, seeded_client, monkeypatch):
+        monkeypatch.setattr(fastjson, "enabled", lambda: True)
+        course = seeded_client.get("/api/courses/").json()["items"][0]
+        assert course["tags"] == []
+        assert isinstance(course["duration_hours"], float)
+
+    def test_keeps_conditional_headers(self, seeded_client, monkeypatch):
+        monkeypatch.setattr(fastjson, "enabled", lambda: True)
+        response = seeded_client.get("/api/students/")
+        assert response.headers["cache-control"] == "no-cache"
+
+        etag = response.headers["etag"]
+        response = seeded_client.get("/api/students/", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+
+    def test_disabled_by_default(self):
+        assert fastjson.enabled() is False
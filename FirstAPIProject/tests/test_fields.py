@@ -0,0 +1,56 @@
+COURSE = {
+    "title": "Math",
+    "description": "Long text " * 20,
+    "duration_hours": 10,
+    "price": 99.5,
+}
+STUDENTS = [
+    {"first_name": "Ivan", "last_name": "Smith", "age": 20 + i} for i in range(3)
+]
+
+
+class TestFieldSelection:
+    """Параметр fields= у списков"""
+
+    def test_only_requested_fields(self, test_client):
+        test_client.post("/api/students/bulk", json=STUDENTS)
+        response = test_client.get("/api/students/?fields=first_name,last_name")
+        assert response.status_code == 200
+        assert response.json()["items"][0] == {
+            "id": 1,
+            "first_name": "Ivan",
+            "last_name": "Smith",
+        }
+
+    def test_query_selects_only_requested_columns(self, test_client, count_queries):
+        test_client.post("/api/courses/", json=COURSE)
+        with count_queries() as queries:
+            response = test_client.get("/api/courses/?fields=title,price")
+
+        assert response.json()["items"] == [{"id": 1, "title": "Math", "price": 99.5}]
+        select = next(s for s in queries.statements if s.startswith("SELECT"))
+        assert "description" not in select
+
+    def test_fields_keep_cursor_and_filters(self, test_client):
+        test_client.post("/api/students/bulk", json=STUDENTS)
+        page = test_client.get("/api/students/?fields=age&limit=1&min_age=21").json()
+        assert page == {"items": [{"id": 2, "age": 21}], "next_cursor": 2}
+
+    def test_schema_default_field(self, test_client):
+        test_client.post("/api/courses/", json=COURSE)
+        items = test_client.get("/api/courses/?fields=tags").json()["items"]
+        assert items == [{"id": 1, "tags": []}]
+
+    def test_enrollments(self, test_client):
+        test_client.post("/api/students/bulk", json=STUDENTS)
+        test_client.post("/api/courses/", json=COURSE)
+        test_client.post("/api/enroll/", json={"student_id": 1, "course_id": 1})
+        items = test_client.get("/api/enrollments/?fields=course_id").json()["items"]
+        assert items == [{"id": 1, "course_id": 1}]
+
+    def test_unknown_field_rejected(self, test_client):
+        response = test_client.get("/api/students/?fields=first_name,password")
+        assert response.status_code == 422
+        detail = response.json()["detail"]
+        assert detail["unknown_fields"] == ["password"]
+        assert "first_name" in detail["allowed_fields"]
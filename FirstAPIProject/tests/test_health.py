@@ -0,0 +1,163 @@
+import asyncio
+import dataclasses
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+import database
+import health
+from config import get_settings
+from health import ReportCache
+from main import app
+
+
+def run(test_engine, statement):
+    async def execute():
+        async with test_engine.begin() as conn:
+            await conn.execute(text(statement))
+
+    asyncio.run(execute())
+
+
+@pytest.fixture
+def unreachable_db(tmp_path, monkeypatch):
+    """Сессии к файлу SQLite в несуществующем каталоге: соединение падает"""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/missing/app.db")
+    monkeypatch.setattr(database, "AsyncSessionLocal", async_sessionmaker(bind=engine))
+    yield
+    asyncio.run(engine.dispose())
+
+
+class TestHealth:
+    """Живость, готовность и кэш отчета готовности"""
+
+    def test_liveness(self, test_client, count_queries):
+        with count_queries() as queries:
+            response = test_client.get("/api/health/live")
+        assert response.status_code == 200
+        assert response.json() == {"status": "alive"}
+        assert queries.count == 0
+
+    def test_readiness_report(self, test_client):
+        response = test_client.get("/api/health/ready")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["status"] == "healthy"
+        assert data["database"] == "sqlite"
+        assert data["version"] == app.version
+        checks = data["checks"]
+        assert checks["database"]["ok"] is True
+        assert checks["pool"]["class"] == "StaticPool"
+        assert checks["event_loop"]["lag_ms"] >= 0
+        assert set(checks["entity_cache"]) == {"hits", "misses", "hit_rate"}
+        # Схема из create_all, alembic_version нет
+        assert checks["migrations"]["current"] is None
+        assert checks["migrations"]["head"] == health.migration_head()
+
+    def test_report_is_cached(self, test_client, count_queries):
+        first = test_client.get("/api/health/ready").json()
+        with count_queries() as queries:
+            second = test_client.get("/api/health").json()
+        assert queries.count == 0
+        assert second["checked_at"] == first["checked_at"]
+
+    def test_cache_hit_opens_no_session(self, test_client, monkeypatch):
+        opened = 0
+        sessions = database.AsyncSessionLocal
+
+        def counting_sessions():
+            nonlocal opened
+            opened += 1
+            return sessions()
+
+        monkeypatch.setattr(database, "AsyncSessionLocal", counting_sessions)
+        test_client.get("/api/health/ready")
+        test_client.get("/api/health/ready")
+        assert opened == 1
+
+    def test_cancelled_caller_keeps_shared_check(self, test_client):
+        cache = ReportCache(ttl=10)
+
+        async def probe():
+            first = asyncio.create_task(cache.get(health.readiness))
+            second = asyncio.create_task(cache.get(health.readiness))
+            await asyncio.sleep(0)
+            first.cancel()
+            return await second
+
+        assert asyncio.run(probe())["status"] == "healthy"
+
+    def test_outdated_schema_is_not_ready(self, test_client, test_engine):
+        run(test_engine, "CREATE TABLE alembic_version (version_num VARCHAR(32))")
+        run(test_engine, "INSERT INTO alembic_version VALUES ('8fbb9fdad5b1')")
+        response = test_client.get("/api/health/ready")
+        assert response.status_code == 503
+        migrations = response.json()["checks"]["migrations"]
+        assert migrations == {
+            "current": "8fbb9fdad5b1",
+            "head": health.migration_head(),
+            "up_to_date": False,
+        }
+
+    def test_current_schema_is_ready(self, test_client, test_engine):
+        run(test_engine, "CREATE TABLE alembic_version (version_num VARCHAR(32))")
+        run(
+            test_engine,
+            f"INSERT INTO alembic_version VALUES ('{health.migration_head()}')",
+        )
+        response = test_client.get("/api/health/ready")
+        assert response.status_code == 200
+        assert response.json()["checks"]["migrations"]["up_to_date"] is True
+
+    def test_unreachable_database(self, test_client, unreachable_db):
+        response = test_client.get("/api/health")
+        assert response.status_code == 503
+        data = response.json()
+        assert data["status"] == "unhealthy"
+        assert data["checks"]["database"] == {
+            "ok": False,
+            "error": "OperationalError",
+        }
+
+    def test_ping_timeout(self, test_client, monkeypatch):
+        settings = dataclasses.replace(get_settings(), health_db_timeout_ms=0)
+        monkeypatch.setattr(health, "get_settings", lambda: settings)
+        response = test_client.get("/api/health/ready")
+        assert response.status_code == 503
+        assert "timeout" in response.json()["checks"]["database"]["error"]
+
+
+class TestReportCache:
+    def test_concurrent_misses_share_one_check(self):
+        cache = ReportCache(ttl=10)
+        calls = 0
+
+        async def check():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return {"status": "healthy"}
+
+        async def probe():
+            return await asyncio.gather(*(cache.get(check) for _ in range(5)))
+
+        reports = asyncio.run(probe())
+        assert calls == 1
+        assert all(report is reports[0] for report in reports)
+
+    def test_expires_after_ttl(self):
+        now = 0.0
+        cache = ReportCache(ttl=2, clock=lambda: now)
+        calls = 0
+
+        async def check():
+            nonlocal calls
+            calls += 1
+            return {"call": calls}
+
+        assert asyncio.run(cache.get(check)) == {"call": 1}
+        now = 1.9
+        assert asyncio.run(cache.get(check)) == {"call": 1}
+        now = 2.0
+        assert asyncio.run(cache.get(check)) == {"call": 2}
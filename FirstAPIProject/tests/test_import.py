@@ -0,0 +1,124 @@
+import asyncio
+import json
+import os
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from main import app
+from database import Base, Student, get_async_db
+from tests.asgi import call_streaming, current_rss_mb
+
+
+class TestImport:
+    """Потоковый импорт из CSV/NDJSON"""
+
+    def test_import_students_ndjson(self, test_client):
+        body = "\n".join(
+            [
+                json.dumps({"first_name": "Ivan", "last_name": "Smith", "age": 20}),
+                "{broken",
+                json.dumps({"first_name": "Anna", "last_name": "Smith", "age": 5}),
+                json.dumps({"first_name": "Olga", "last_name": "Smith", "age": 30}),
+            ]
+        )
+        response = test_client.post(
+            "/api/students/import?import_id=nd1", content=body.encode()
+        )
+        assert response.status_code == 200
+        report = response.json()
+        assert report["processed"] == 4
+        assert report["inserted"] == 2
+        assert report["failed"] == 2
+        assert report["finished"] is True
+        assert [e["index"] for e in report["errors"]] == [2, 3]
+
+        progress = test_client.get("/api/imports/nd1").json()
+        assert progress["inserted"] == 2
+
+        students = test_client.get("/api/students/").json()["items"]
+        assert [s["first_name"] for s in students] == ["Ivan", "Olga"]
+
+    def test_import_courses_csv(self, test_client):
+        body = (
+            "﻿title,description,duration_hours,price\r\n"
+            'Math,"Algebra,\nGeometry",64,5000\r\n'
+            "Art,,10,\r\n"
+            "Bad,,-1,0\r\n"
+        )
+        response = test_client.post(
+            "/api/courses/import?format=csv", content=body.encode()
+        )
+        assert response.status_code == 200
+        report = response.json()
+        assert report["inserted"] == 2
+        assert report["errors"][0]["index"] == 3
+
+        courses = test_client.get("/api/courses/").json()["items"]
+        assert courses[0]["description"] == "Algebra,\nGeometry"
+        assert courses[1]["description"] is None
+        assert courses[1]["price"] == 0.0
+
+    def test_export_then_import_roundtrip(self, test_client):
+        items = [{"first_name": "Ivan", "last_name": "Smith", "age": 20}]
+        test_client.post("/api/students/bulk", json=items)
+        exported = test_client.get("/api/students/export?format=csv").content
+
+        report = test_client.post(
+            "/api/students/import?format=csv", content=exported
+        ).json()
+        assert report["inserted"] == 1
+        assert report["failed"] == 0
+
+    def test_import_progress_not_found(self, test_client):
+        response = test_client.get("/api/imports/unknown")
+        assert response.status_code == 404
+
+
+def ndjson_students(rows: int, rows_per_chunk: int = 5000):
+    line = json.dumps({"first_name": "Import", "last_name": "Student", "age": 20})
+    chunk = ((line + "\n") * rows_per_chunk).encode()
+    for _ in range(rows // rows_per_chunk):
+        yield chunk
+
+
+@pytest.mark.skipif(
+    not os.getenv("RUN_SLOW_TESTS") or not os.path.exists("/proc/self/statm"),
+    reason="долгий тест: RUN_SLOW_TESTS=1, только Linux",
+)
+def test_import_million_rows_bounded_rss(tmp_path):
+    """Импорт 1M строк идет с ограниченной памятью"""
+    rows = 1_000_000
+    rss_ceiling_mb = 32
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'import.db'}")
+    sessions = async_sessionmaker(bind=engine, expire_on_commit=False)
+
+    async def override_get_db():
+        async with sessions() as db:
+            yield db
+
+    async def run():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        rss_before = current_rss_mb()
+        result = await call_streaming(
+            app, "POST", "/api/students/import", ndjson_students(rows)
+        )
+        async with sessions() as db:
+            count = await db.scalar(select(func.count()).select_from(Student))
+        await engine.dispose()
+        return rss_before, result, count
+
+    app.dependency_overrides[get_async_db] = override_get_db
+    try:
+        rss_before, (status, body, _, peak_rss), count = asyncio.run(run())
+    finally:
+        app.dependency_overrides.clear()
+
+    report = json.loads(body)
+    print(f"импорт: {report['rows_per_sec']:.0f} строк/с")
+    assert status == 200
+    assert report["inserted"] == count == rows
+    growth = peak_rss - rss_before
+    assert growth < rss_ceiling_mb, f"RSS вырос на {growth:.0f} МБ"
@@ -8,7 +8,7 @@ class TestStudentsAPI:
         """Тест получения пустого списка студентов"""
         response = test_client.get("/api/students/")
         assert response.status_code == 200
-        assert response.json() == []
+        assert response.json() == {"items": [], "next_cursor": None}
         print("Отработали пустой список студентов")
 
     def test_create_student_success(self, test_client):
@@ -80,6 +80,65 @@ class TestStudentsAPI:
         assert get_response.status_code == 404
         print(f"Студент с ID: {student_id} успешно удален")
 
+    def test_students_keyset_pagination(self, test_client):
+        """Постраничный обход студентов по курсору"""
+        for age in (18, 19, 20, 21, 22):
+            student_data = {"first_name": "Ivan", "last_name": "Smith", "age": age}
+            test_client.post("/api/students/", json=student_data)
+
+        first_page = test_client.get("/api/students/?limit=2").json()
+        assert len(first_page["items"]) == 2
+        assert first_page["next_cursor"] == first_page["items"][-1]["id"]
+
+        seen = [s["id"] for s in first_page["items"]]
+        cursor = first_page["next_cursor"]
+        while cursor is not None:
+            page = test_client.get(f"/api/students/?limit=2&after={cursor}").json()
+            seen.extend(s["id"] for s in page["items"])
+            cursor = page["next_cursor"]
+
+        assert len(seen) == 5
+        assert seen == sorted(seen)
+
+    def test_students_filters(self, test_client):
+        """Фильтры по активности и возрасту"""
+        for age, is_active in ((18, True), (25, False), (40, True)):
+            student_data = {
+                "first_name": "Ivan",
+                "last_name": "Smith",
+                "age": age,
+                "is_active": is_active,
+            }
+            test_client.post("/api/students/", json=student_data)
+
+        active = test_client.get("/api/students/?is_active=true").json()["items"]
+        assert [s["age"] for s in active] == [18, 40]
+
+        ranged = test_client.get("/api/students/?min_age=20&max_age=40").json()
+        assert [s["age"] for s in ranged["items"]] == [25, 40]
+
+    def test_create_students_bulk(self, test_client):
+        """Пакетное создание: невалидный элемент не прерывает пакет"""
+        items = [
+            {"first_name": "Ivan", "last_name": "Smith", "age": 20},
+            {"first_name": "Bad", "last_name": "Age", "age": 5},
+            {"first_name": "Anna", "last_name": "Smith", "age": 21},
+        ]
+        response = test_client.post("/api/students/bulk", json=items)
+        assert response.status_code == 200
+        data = response.json()
+        assert data["created"] == 2
+        assert data["ids"][1] is None
+        assert [e["index"] for e in data["errors"]] == [1]
+        assert "age" in data["errors"][0]["detail"]
+
+        created = test_client.get(f"/api/students/{data['ids'][2]}").json()
+        assert created["first_name"] == "Anna"
+
+    def test_students_limit_validation(self, test_client):
+        response = test_client.get("/api/students/?limit=0")
+        assert response.status_code == 422
+
 
 class TestCoursesAPI:
     """Тесты для курсов"""
@@ -88,7 +147,7 @@ class TestCoursesAPI:
         """Тест получения пустого списка"""
         response = test_client.get("/api/courses/")
         assert response.status_code == 200
-        assert response.json() == []
+        assert response.json() == {"items": [], "next_cursor": None}
         print("Отработали пустой список курсов")
 
     def test_create_course_success(self, test_client):
@@ -180,6 +239,29 @@ class TestCoursesAPI:
 
         print(f"Курс с ID: {course_id} deleted")
 
+    def test_courses_price_filter(self, test_client):
+        for price in (1000.0, 5000.0, 9000.0):
+            course_data = {"title": "Course", "duration_hours": 10, "price": price}
+            test_client.post("/api/courses/", json=course_data)
+
+        response = test_client.get("/api/courses/?min_price=2000&max_price=9000")
+        assert response.status_code == 200
+        prices = [c["price"] for c in response.json()["items"]]
+        assert prices == [5000.0, 9000.0]
+
+    def test_create_courses_bulk(self, test_client):
+        items = [
+            {"title": "Course A", "duration_hours": 10, "price": 100.0},
+            {"title": "Course B", "duration_hours": 20},
+        ]
+        response = test_client.post("/api/courses/bulk", json=items)
+        assert response.status_code == 200
+        data = response.json()
+        assert data["created"] == 2
+        assert data["errors"] == []
+        titles = [c["title"] for c in test_client.get("/api/courses/").json()["items"]]
+        assert titles == ["Course A", "Course B"]
+
 
 class TestEnrollmentsAPI:
     """Тест записей на курсы"""
@@ -209,7 +291,7 @@ class TestEnrollmentsAPI:
         """Получение пустого списка записей"""
         response = test_client.get("/api/enrollments/")
         assert response.status_code == 200
-        assert response.json() == []
+        assert response.json() == {"items": [], "next_cursor": None}
 
     def test_enrollment_student_success(self, test_client):
         """Успешная запись на курс"""
@@ -277,6 +359,52 @@ class TestEnrollmentsAPI:
         assert "Enrollment already exists" in second_response.json()["detail"]
         print("Обработана дублирующая запись")
 
+    def test_update_enrollment_to_duplicate(self, test_client):
+        """Изменение записи в уже существующую пару студент-курс"""
+        student_id, course_id = self.create_test_data(test_client)
+        _, other_course_id = self.create_test_data(test_client)
+
+        test_client.post(
+            "/api/enroll/", json={"student_id": student_id, "course_id": course_id}
+        )
+        second = test_client.post(
+            "/api/enroll/",
+            json={"student_id": student_id, "course_id": other_course_id},
+        ).json()
+
+        response = test_client.put(
+            f"/api/enrollments/{second['id']}/",
+            json={"student_id": student_id, "course_id": course_id},
+        )
+        assert response.status_code == 400
+        assert "Enrollment already exists" in response.json()["detail"]
+
+    def test_enroll_bulk(self, test_client):
+        """Пакетная запись: дубли и несуществующие студенты попадают в ошибки"""
+        student_id, course_id = self.create_test_data(test_client)
+        _, other_course_id = self.create_test_data(test_client)
+        test_client.post(
+            "/api/enroll/", json={"student_id": student_id, "course_id": course_id}
+        )
+
+        items = [
+            {"student_id": student_id, "course_id": other_course_id},
+            {"student_id": student_id, "course_id": course_id},
+            {"student_id": 999, "course_id": course_id},
+            {"student_id": student_id, "course_id": other_course_id},
+            {"student_id": "x"},
+        ]
+        response = test_client.post("/api/enroll/bulk", json=items)
+        assert response.status_code == 200
+        data = response.json()
+        assert data["created"] == 1
+        assert data["ids"][0] is not None
+        errors = {e["index"]: e["detail"] for e in data["errors"]}
+        assert errors[1] == "Enrollment already exists"
+        assert errors[2] == "Student not found"
+        assert errors[3] == "Enrollment already exists"
+        assert 4 in errors
+
     def test_get_detailed_enrollments_empty(self, test_client):
         response = test_client.get("/api/enrollments/detailed/")
 
@@ -285,6 +413,43 @@ class TestEnrollmentsAPI:
         assert data["enrollments"] == []
         print("Обработан пустой список детальных записей")
 
+    def test_get_detailed_enrollments(self, test_client):
+        student_id, course_id = self.create_test_data(test_client)
+        enrollment_data = {"student_id": student_id, "course_id": course_id}
+        create_response = test_client.post("/api/enroll/", json=enrollment_data)
+        enrollment_id = create_response.json()["id"]
+
+        response = test_client.get("/api/enrollments/detailed/")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["next_cursor"] is None
+        detail = data["enrollments"][0]
+        assert detail["enrollment"]["id"] == enrollment_id
+        assert detail["student"]["first_name"] == "Иван"
+        assert detail["course"]["title"] == "Математика"
+
+    def test_detailed_enrollments_query_count_is_constant(
+        self, test_client, count_queries
+    ):
+        """Число запросов не растет вместе с числом записей (нет N+1)"""
+
+        def enroll_new_pair():
+            student_id, course_id = self.create_test_data(test_client)
+            enrollment_data = {"student_id": student_id, "course_id": course_id}
+            test_client.post("/api/enroll/", json=enrollment_data)
+
+        enroll_new_pair()
+        with count_queries() as few_rows:
+            test_client.get("/api/enrollments/detailed/")
+
+        for _ in range(10):
+            enroll_new_pair()
+        with count_queries() as many_rows:
+            response = test_client.get("/api/enrollments/detailed/")
+
+        assert len(response.json()["enrollments"]) == 11
+        assert many_rows.count == few_rows.count == 1
+
     def test_delete_enrollment_success(self, test_client):
         student_id, course_id = self.create_test_data(test_client)
         enrollment_data = {"student_id": student_id, "course_id": course_id}
@@ -408,7 +573,7 @@ class TestIntegration:
 
         enrollments_response = test_client.get("/api/enrollments/")
         assert enrollments_response.status_code == 200
-        enrollments = enrollments_response.json()
+        enrollments = enrollments_response.json()["items"]
         assert len(enrollments) == 1
         assert enrollments[0]["id"] == enrollment_id
 
@@ -425,7 +590,7 @@ class TestIntegration:
         delete_response = test_client.delete(f"/api/enrollments/{enrollment_id}")
         assert delete_response.status_code == 200
 
-        final_enrollments = test_client.get("/api/enrollments/").json()
+        final_enrollments = test_client.get("/api/enrollments/").json()["items"]
         assert len(final_enrollments) == 0
 
 
@@ -0,0 +1,99 @@
+import logging
+
+from metrics import Histogram, instrument_engine, metrics, normalize_sql
+
+STUDENTS = [
+    {"first_name": "Ivan", "last_name": "Smith", "age": 20 + i} for i in range(3)
+]
+
+
+def series(text: str, name: str) -> dict[str, float]:
+    """Ряды метрики name из ответа /metrics: метки -> значение"""
+    values = {}
+    for line in text.splitlines():
+        if line.startswith(name + "{"):
+            labels, value = line[len(name) :].rsplit(" ", 1)
+            values[labels] = float(value)
+    return values
+
+
+class TestMetrics:
+    """Метрики запросов, Server-Timing и учет SQL"""
+
+    def test_requests_by_route_template(self, test_client):
+        metrics.clear()
+        test_client.post("/api/students/bulk", json=STUDENTS)
+        for student_id in (1, 2, 99):
+            test_client.get(f"/api/students/{student_id}")
+        test_client.get("/no/such/page")
+
+        response = test_client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        requests = series(response.text, "http_requests_total")
+        route = 'method="GET",route="/api/students/{student_id}"'
+        assert requests[f'{{{route},status="200"}}'] == 2
+        assert requests[f'{{{route},status="404"}}'] == 1
+        assert requests['{method="GET",route="unmatched",status="404"}'] == 1
+
+        count = series(response.text, "http_request_duration_seconds_count")
+        assert count[f"{{{route}}}"] == 3
+        buckets = series(response.text, "http_request_duration_seconds_bucket")
+        assert buckets[f'{{{route},le="+Inf"}}'] == 3
+        quantiles = series(response.text, "http_request_duration_quantile_seconds")
+        assert quantiles[f'{{{route},quantile="0.99"}}'] > 0
+
+    def test_response_size(self, test_client):
+        metrics.clear()
+        body = test_client.get("/api/").content
+        sizes = series(test_client.get("/metrics").text, "http_response_size_bytes_sum")
+        assert sizes['{method="GET",route="/api/"}'] == len(body)
+
+    def test_server_timing_counts_queries(self, test_client, test_engine):
+        instrument_engine(test_engine.sync_engine)
+        test_client.post("/api/students/bulk", json=STUDENTS)
+        metrics.clear()
+
+        response = test_client.get("/api/students/")
+        timing = response.headers["server-timing"]
+        assert timing.startswith("app;dur=")
+        assert 'desc="queries=1"' in timing
+        assert metrics.queries.count == 1
+
+        text = test_client.get("/metrics").text
+        queries = series(text, "http_request_db_queries_sum")
+        assert queries['{method="GET",route="/api/students/"}'] == 1
+
+    def test_slow_query_logged(self, test_client, test_engine, monkeypatch, caplog):
+        instrument_engine(test_engine.sync_engine)
+        monkeypatch.setattr(metrics, "slow_query_seconds", 0)
+        metrics.clear()
+        with caplog.at_level(logging.WARNING, logger="metrics"):
+            test_client.get("/api/students/?min_age=30")
+
+        assert metrics.slow_queries == 1
+        message = caplog.records[0].getMessage()
+        assert message.startswith("slow query")
+        assert "student.age >= ?" in message
+
+    def test_histogram_quantile(self):
+        histogram = Histogram((1, 2, 4))
+        for value in (0.5, 1.5, 1.5, 3):
+            histogram.observe(value)
+        assert histogram.counts == [1, 2, 1, 0]
+        assert histogram.quantile(0.5) == 1.5
+        assert histogram.quantile(1.0) == 4
+        assert Histogram((1,)).quantile(0.5) == 0.0
+
+    def test_normalize_sql(self):
+        assert (
+            normalize_sql(
+                "SELECT * FROM student\n  WHERE id IN (?, ?, ?) AND name = 'O''Neil'"
+                " LIMIT 10"
+            )
+            == "SELECT * FROM student WHERE id IN (...) AND name = ? LIMIT ?"
+        )
+        assert (
+            normalize_sql("INSERT INTO t (a, b) VALUES ($1, $2), ($3, $4)")
+            == "INSERT INTO t (a, b) VALUES (...)"
+        )
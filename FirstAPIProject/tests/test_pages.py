@@ -0,0 +1,84 @@
+import gzip
+import os
+
+import pytest
+
+from compress import brotli
+from pages import PageStore
+
+PAGES = {"index": "<h1>missing</h1>"}
+
+
+@pytest.fixture
+def store(tmp_path):
+    (tmp_path / "index.html").write_text("<p>hello</p>" * 200, encoding="utf-8")
+    return PageStore(str(tmp_path), PAGES)
+
+
+class TestPages:
+    """HTML-страницы из памяти со сжатием и ETag"""
+
+    @pytest.mark.parametrize(
+        "url", ["/", "/students/", "/courses/", "/enrollments/", "/api/students/page/"]
+    )
+    def test_pages_are_served(self, test_client, url):
+        response = test_client.get(url)
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/html")
+        assert response.headers["cache-control"] == "no-cache"
+        assert "<html" in response.text.lower()
+
+    def test_gzip_variant(self, test_client):
+        response = test_client.get("/", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert int(response.headers["content-length"]) < len(response.content)
+
+    def test_identity_when_not_accepted(self, test_client):
+        response = test_client.get("/", headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in response.headers
+        assert int(response.headers["content-length"]) == len(response.content)
+
+    @pytest.mark.skipif(brotli is None, reason="brotli не установлен")
+    def test_brotli_preferred(self, test_client):
+        response = test_client.get("/", headers={"Accept-Encoding": "gzip, br"})
+        assert response.headers["content-encoding"] == "br"
+
+    def test_etag_304_across_encodings(self, test_client):
+        etag = test_client.get("/", headers={"Accept-Encoding": "gzip"}).headers["etag"]
+        response = test_client.get(
+            "/", headers={"Accept-Encoding": "identity", "If-None-Match": etag}
+        )
+        assert response.status_code == 304
+        assert response.content == b""
+
+
+class TestPageStore:
+    """Загрузка и перечитывание файлов страниц"""
+
+    def test_variants_are_precomputed(self, store):
+        page = store.get("index")
+        assert gzip.decompress(page.bodies["gzip"]) == page.bodies["identity"]
+        assert store.get("index") is page
+
+    def test_missing_file_uses_fallback(self, tmp_path):
+        store = PageStore(str(tmp_path), PAGES)
+        assert store.get("index").bodies["identity"] == b"<h1>missing</h1>"
+
+    def test_reload_changed(self, store, tmp_path):
+        page = store.get("index")
+        assert store.reload_changed() == []
+
+        path = tmp_path / "index.html"
+        path.write_text("<p>changed</p>", encoding="utf-8")
+        os.utime(path, ns=(page.mtime + 1_000_000, page.mtime + 1_000_000))
+
+        assert store.reload_changed() == ["index"]
+        assert store.get("index").bodies["identity"] == b"<p>changed</p>"
+        assert store.get("index").etag != page.etag
+
+    def test_load_all_keeps_unchanged_pages(self, store):
+        store.load_all()
+        page = store.get("index")
+        store.load_all()
+        assert store.get("index") is page
@@ -0,0 +1,93 @@
+import re
+import sys
+import threading
+
+import pytest
+
+import profiler
+
+TOKEN = "secret"
+ADMIN = {"X-Admin-Token": TOKEN}
+STACK_LINE = re.compile(r"^\S.* \d+$")
+
+
+@pytest.fixture
+def enabled(monkeypatch):
+    monkeypatch.setattr(profiler, "admin_token", lambda: TOKEN)
+
+
+class TestProfiler:
+    """Сэмплирующий профайлер и его эндпоинты"""
+
+    def test_disabled_without_token(self, test_client):
+        response = test_client.get("/api/admin/profile?seconds=0.1", headers=ADMIN)
+        assert response.status_code == 404
+
+    def test_requires_admin_token(self, test_client, enabled):
+        assert test_client.get("/api/admin/profile").status_code == 403
+        response = test_client.get(
+            "/api/admin/profile", headers={"X-Admin-Token": "wrong"}
+        )
+        assert response.status_code == 403
+
+    def test_window_profile_is_collapsed_stacks(self, test_client, enabled):
+        response = test_client.get(
+            "/api/admin/profile?seconds=0.2&interval_ms=2", headers=ADMIN
+        )
+        assert response.status_code == 200
+        assert int(response.headers["x-profile-samples"]) > 0
+        lines = response.text.splitlines()
+        assert lines and all(STACK_LINE.match(line) for line in lines)
+
+    def test_one_profile_at_a_time(self, test_client, enabled):
+        assert profiler.try_acquire()
+        try:
+            response = test_client.get("/api/admin/profile?seconds=0.1", headers=ADMIN)
+        finally:
+            profiler.release()
+        assert response.status_code == 409
+
+    def test_request_profile(self, test_client, enabled):
+        response = test_client.get(
+            "/api/students/", headers={"X-Profile": "1", **ADMIN}
+        )
+        assert response.status_code == 200
+        profile_id = response.headers["x-profile-id"]
+
+        profile = test_client.get(f"/api/admin/profiles/{profile_id}", headers=ADMIN)
+        assert profile.status_code == 200
+        assert "x-profile-samples" in profile.headers
+        missing = test_client.get("/api/admin/profiles/unknown", headers=ADMIN)
+        assert missing.status_code == 404
+
+    def test_profile_header_needs_token(self, test_client, enabled):
+        response = test_client.get("/api/students/", headers={"X-Profile": "1"})
+        assert response.status_code == 200
+        assert "x-profile-id" not in response.headers
+
+    def test_sampler_sees_busy_thread(self):
+        done = threading.Event()
+
+        def busy_loop():
+            while not done.is_set():
+                sum(range(1000))
+
+        worker = threading.Thread(target=busy_loop)
+        worker.start()
+        sampler = profiler.Sampler(worker.ident, 0.001)
+        sampler.start()
+        try:
+            while sampler.samples < 5:
+                done.wait(0.01)
+        finally:
+            sampler.stop()
+            done.set()
+            worker.join()
+        stack, _ = sampler.stacks.most_common(1)[0]
+        assert stack.endswith(
+            "tests/test_profiler.py:TestProfiler.test_sampler_sees_busy_thread.<locals>.busy_loop"
+        )
+
+    def test_collapse(self):
+        stack = profiler.collapse(sys._getframe())
+        assert stack.endswith(";tests/test_profiler.py:TestProfiler.test_collapse")
@@ -0,0 +1,153 @@
+import asyncio
+import dataclasses
+
+import pytest
+
+import ratelimit
+from config import Settings, get_settings
+from ratelimit import GLOBAL, AdmissionController, MemoryBuckets
+
+STUDENT = {"first_name": "Ivan", "last_name": "Smith", "age": 20}
+
+
+@pytest.fixture
+def limits(monkeypatch):
+    """Подменяет настройки лимитов и сбрасывает состояние ratelimit"""
+
+    def configure(**overrides):
+        settings = dataclasses.replace(get_settings(), **overrides)
+        monkeypatch.setattr(ratelimit, "get_settings", lambda: settings)
+        ratelimit.reset()
+
+    yield configure
+    ratelimit.reset()
+
+
+def occupy(key):
+    """Занимает место контроллера, как запрос в обработке"""
+    controller = ratelimit.admission(key)
+    assert asyncio.run(controller.acquire())
+    return controller
+
+
+class TestRateLimit:
+    """Корзины токенов на клиента и маршрут"""
+
+    def test_empty_bucket_returns_429(self, test_client, limits):
+        limits(rate_limits={"students": (1.0, 2)})
+        assert test_client.get("/api/students/").status_code == 200
+        assert test_client.get("/api/students/").status_code == 200
+        response = test_client.get("/api/students/")
+        assert response.status_code == 429
+        assert response.headers["retry-after"] == "1"
+
+    def test_bucket_per_route_template(self, test_client, limits):
+        limits(rate_limits={"students": (1.0, 2)})
+        assert test_client.get("/api/students/1").status_code == 404
+        assert test_client.get("/api/students/2").status_code == 404
+        assert test_client.get("/api/students/3").status_code == 429
+        # Другой маршрут и другой роутер - свои корзины
+        assert test_client.get("/api/students/").status_code == 200
+        assert test_client.get("/api/courses/").status_code == 200
+
+    def test_write_limit_leaves_reads_alone(self, test_client, limits):
+        limits(rate_limits={"students.write": (1.0, 1)})
+        for _ in range(5):
+            assert test_client.get("/api/students/").status_code == 200
+        assert test_client.post("/api/students/", json=STUDENT).status_code == 200
+        response = test_client.post("/api/students/", json=STUDENT)
+        assert response.status_code == 429
+
+    def test_limits_from_environment(self, monkeypatch):
+        monkeypatch.setenv("RATE_LIMITS", "enrollments.write=20/40, stats=5")
+        monkeypatch.setenv("ADMISSION_LIMITS", "enrollments.write=2")
+        settings = Settings()
+        assert settings.rate_limits == {
+            "enrollments.write": (20.0, 40),
+            "stats": (5.0, 5),
+        }
+        assert settings.admission_limits == {"enrollments.write": 2}
+
+    def test_bucket_refills(self):
+        now = 0.0
+        buckets = MemoryBuckets(clock=lambda: now)
+
+        def take():
+            return asyncio.run(buckets.take("client", rate=2.0, burst=1))
+
+        assert take() == 0
+        assert take() == pytest.approx(0.5)
+        now = 0.5
+        assert take() == 0
+        assert buckets.stats()["limited"] == 1
+
+    def test_least_recent_buckets_are_evicted(self):
+        buckets = MemoryBuckets(max_keys=2)
+        for key in ("a", "b", "c"):
+            asyncio.run(buckets.take(key, rate=1.0, burst=1))
+        assert buckets.stats()["buckets"] == 2
+
+
+class TestAdmission:
+    """Допуск запросов к БД: лимит, очередь и отказ с 503"""
+
+    def test_queue_then_reject(self):
+        async def scenario():
+            controller = AdmissionController(limit=1, queue_size=1, timeout=1.0)
+            assert await controller.acquire()
+            waiting = asyncio.create_task(controller.acquire())
+            await asyncio.sleep(0)
+            # Очередь заполнена: следующий получает отказ сразу
+            assert not await controller.acquire()
+            controller.release()
+            assert await waiting
+            assert controller.active == 1
+            controller.release()
+            return controller.stats()
+
+        stats = asyncio.run(scenario())
+        assert stats["active"] == 0
+        assert stats["admitted"] == 2
+        assert stats["rejected"] == 1
+
+    def test_queue_timeout(self):
+        async def scenario():
+            controller = AdmissionController(limit=1, queue_size=1, timeout=0.01)
+            assert await controller.acquire()
+            assert not await controller.acquire()
+            return controller.stats()
+
+        stats = asyncio.run(scenario())
+        assert stats["timed_out"] == 1
+        assert stats["waiting"] == 0
+
+    def test_overload_returns_503(self, test_client, limits):
+        limits(admission_concurrency=1, admission_queue=0)
+        controller = occupy(GLOBAL)
+        response = test_client.get("/api/students/")
+        assert response.status_code == 503
+        assert "retry-after" in response.headers
+        # Служебные эндпоинты без БД лимит не затрагивает
+        assert test_client.get("/api/health/live").status_code == 200
+
+        controller.release()
+        assert test_client.get("/api/students/").status_code == 200
+        assert controller.active == 0
+
+    def test_group_limit(self, test_client, limits):
+        limits(admission_limits={"enrollments.write": 1}, admission_queue=0)
+        occupy("enrollments.write")
+        response = test_client.post(
+            "/api/enroll/", json={"student_id": 1, "course_id": 1}
+        )
+        assert response.status_code == 503
+        assert test_client.get("/api/enrollments/").status_code == 200
+        assert test_client.post("/api/students/", json=STUDENT).status_code == 200
+
+    def test_slot_released_after_error(self, test_client, limits):
+        limits(admission_concurrency=1, admission_queue=0)
+        assert test_client.get("/api/students/999").status_code == 404
+        assert ratelimit.admission(GLOBAL).active == 0
+        # Потоковая выгрузка держит место до конца ответа и отпускает его
+        assert test_client.get("/api/students/export").status_code == 200
+        assert ratelimit.admission(GLOBAL).active == 0
@@ -0,0 +1,134 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, func, insert, select
+from sqlalchemy.ext.asyncio import create_async_engine
+
+import crud
+import database
+from cache import entity_cache
+from database import Base, Student, PRIMARY_STICKY_COOKIE, create_sessionmaker
+from main import app
+from models import StudentCreate
+
+STUDENT = {"first_name": "Ivan", "last_name": "Smith", "age": 20}
+
+
+def create_database(path, first_name=None):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    if first_name:
+        with engine.begin() as conn:
+            conn.execute(insert(Student), [{**STUDENT, "first_name": first_name}])
+    engine.dispose()
+
+
+def count_students(path):
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.connect() as conn:
+        count = conn.scalar(select(func.count()).select_from(Student))
+    engine.dispose()
+    return count
+
+
+@pytest.fixture
+def replica_setup(tmp_path, monkeypatch):
+    """Основная БД и реплика - разные файлы SQLite, поэтому по данным
+    видно, откуда пришел ответ (репликации между ними нет)"""
+    primary_path, replica_path = tmp_path / "primary.db", tmp_path / "replica.db"
+    create_database(primary_path)
+    create_database(replica_path, first_name="Replica")
+    primary = create_async_engine(f"sqlite+aiosqlite:///{primary_path}")
+    replica = create_async_engine(f"sqlite+aiosqlite:///{replica_path}")
+    sessions = create_sessionmaker(primary, [replica])
+    monkeypatch.setattr(database, "AsyncSessionLocal", sessions)
+    app.dependency_overrides.clear()
+    entity_cache.clear()
+
+    with TestClient(app) as client:
+        yield client, sessions, primary_path, replica_path
+
+    asyncio.run(primary.dispose())
+    asyncio.run(replica.dispose())
+
+
+def first_names(client):
+    return [s["first_name"] for s in client.get("/api/students/").json()["items"]]
+
+
+class TestReplicaRouting:
+    """Чтения на реплику, записи и чтения после записи - в основную БД"""
+
+    def test_reads_go_to_replica(self, replica_setup):
+        client, _, _, _ = replica_setup
+        assert first_names(client) == ["Replica"]
+        assert client.get("/api/stats").json()["students"] == 1
+
+    def test_write_goes_to_primary_and_sticks(self, replica_setup):
+        client, _, primary_path, replica_path = replica_setup
+        response = client.post("/api/students/", json=STUDENT)
+        assert response.status_code == 200
+        assert PRIMARY_STICKY_COOKIE in response.cookies
+        assert count_students(primary_path) == 1
+        assert count_students(replica_path) == 1
+
+        # Клиент вернул cookie: читает свою запись из основной БД
+        assert first_names(client) == ["Ivan"]
+
+    def test_expired_window_reads_replica(self, replica_setup):
+        client, _, _, _ = replica_setup
+        client.post("/api/students/", json=STUDENT)
+        client.cookies.set(PRIMARY_STICKY_COOKIE, "1")
+        assert first_names(client) == ["Replica"]
+
+    def test_write_functions_read_primary(self, replica_setup):
+        client, sessions, _, _ = replica_setup
+        student_id = client.post("/api/students/", json=STUDENT).json()["id"]
+
+        async def update():
+            async with sessions() as db:
+                # Без окна после записи: update_* все равно читает основную БД
+                updated = await crud.update_student(
+                    db, student_id, StudentCreate(**{**STUDENT, "age": 30})
+                )
+            async with sessions() as db:
+                replica_view = await crud.get_all_students(db, limit=10)
+            return updated, replica_view
+
+        updated, (replica_view, _) = asyncio.run(update())
+        assert updated is not None and updated.age == 30
+        assert [s.first_name for s in replica_view] == ["Replica"]
+
+    def test_no_cookie_without_replicas(self, test_client):
+        response = test_client.post("/api/students/", json=STUDENT)
+        assert PRIMARY_STICKY_COOKIE not in response.cookies
+
+    def test_replica_copy_is_not_cached_for_writer(self, replica_setup):
+        """Реплика отстает: чтение другого клиента с реплики не должно
+        подменить запись в кэше для клиента, который только что писал"""
+        client, _, primary_path, _ = replica_setup
+        # До записи основная БД совпадает с репликой
+        create_database(primary_path, first_name="Replica")
+        response = client.put("/api/students/1", json={**STUDENT, "first_name": "New"})
+        assert response.status_code == 200
+        other = TestClient(app)
+        assert other.get("/api/students/1").json()["first_name"] == "Replica"
+        assert client.get("/api/students/1").json()["first_name"] == "New"
+        assert first_names(client) == ["New"]
+
+    def test_replica_reads_have_no_validators(self, replica_setup):
+        """ETag строится по версиям основной БД: отстающему телу с реплики
+        его давать нельзя, иначе клиент будет получать 304 на старые данные"""
+        client, _, _, _ = replica_setup
+        response = client.get("/api/students/", headers={"Accept-Encoding": "gzip"})
+        assert response.status_code == 200
+        assert "etag" not in response.headers
+        assert "last-modified" not in response.headers
+        assert response.headers["cache-control"] == "no-cache"
+        assert client.get("/api/students/1", headers={"If-None-Match": "*"}).json()
+
+        client.post("/api/students/", json=STUDENT)
+        etag = client.get("/api/students/").headers["etag"]
+        response = client.get("/api/students/", headers={"If-None-Match": etag})
+        assert response.status_code == 304
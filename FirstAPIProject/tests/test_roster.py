@@ -0,0 +1,102 @@
+import asyncio
+
+STUDENTS = [
+    {"first_name": "Ivan", "last_name": "Petrov", "age": 20 + i} for i in range(4)
+]
+COURSES = [
+    {"title": f"Course {i}", "description": "Text", "duration_hours": 10}
+    for i in range(3)
+]
+# Студент 1 записан на все курсы, курс 1 - у студентов 1, 3, 4
+ENROLLMENTS = [
+    {"student_id": 4, "course_id": 1},
+    {"student_id": 1, "course_id": 3},
+    {"student_id": 1, "course_id": 1},
+    {"student_id": 3, "course_id": 1},
+    {"student_id": 1, "course_id": 2},
+    {"student_id": 2, "course_id": 2},
+]
+
+
+def ids(page):
+    return [item["id"] for item in page["items"]]
+
+
+def query_plan(engine, statement):
+    async def explain():
+        async with engine.connect() as conn:
+            result = await conn.exec_driver_sql(
+                "EXPLAIN QUERY PLAN " + statement, (1,) * statement.count("?")
+            )
+            return " | ".join(row[3] for row in result)
+
+    return asyncio.run(explain())
+
+
+class TestRoster:
+    """Студенты курса и курсы студента"""
+
+    def seed(self, client):
+        client.post("/api/students/bulk", json=STUDENTS)
+        client.post("/api/courses/bulk", json=COURSES)
+        client.post("/api/enroll/bulk", json=ENROLLMENTS)
+
+    def test_course_students(self, test_client):
+        self.seed(test_client)
+        response = test_client.get("/api/courses/1/students")
+        assert response.status_code == 200
+        page = response.json()
+        assert ids(page) == [1, 3, 4]
+        assert page["next_cursor"] is None
+        assert page["items"][0]["first_name"] == "Ivan"
+
+    def test_student_courses(self, test_client):
+        self.seed(test_client)
+        page = test_client.get("/api/students/1/courses").json()
+        assert ids(page) == [1, 2, 3]
+        assert ids(test_client.get("/api/students/2/courses").json()) == [2]
+
+    def test_pagination(self, test_client):
+        self.seed(test_client)
+        first = test_client.get("/api/courses/1/students?limit=2").json()
+        assert ids(first) == [1, 3]
+        assert first["next_cursor"] == 3
+
+        rest = test_client.get("/api/courses/1/students?limit=2&after=3").json()
+        assert ids(rest) == [4]
+        assert rest["next_cursor"] is None
+
+    def test_empty_and_missing(self, test_client):
+        self.seed(test_client)
+        page = test_client.get("/api/courses/2/students?after=2").json()
+        assert page == {"items": [], "next_cursor": None}
+        assert test_client.get("/api/courses/99/students").status_code == 404
+        assert test_client.get("/api/students/99/courses").status_code == 404
+
+    def test_follows_enrollment_changes(self, test_client):
+        self.seed(test_client)
+        etag = test_client.get("/api/students/2/courses").headers["etag"]
+        test_client.post("/api/enroll/", json={"student_id": 2, "course_id": 3})
+
+        response = test_client.get(
+            "/api/students/2/courses", headers={"If-None-Match": etag}
+        )
+        assert response.status_code == 200
+        assert ids(response.json()) == [2, 3]
+
+    def test_single_covering_index_query(self, test_client, test_engine, count_queries):
+        self.seed(test_client)
+        for url, index in (
+            ("/api/courses/1/students?after=1", "ix_enrollment_course_student"),
+            ("/api/students/1/courses?after=1", "sqlite_autoindex_enrollment_1"),
+        ):
+            with count_queries() as queries:
+                test_client.get(url)
+            join = [s for s in queries.statements if "JOIN enrollment" in s]
+            assert len(join) == 1
+
+            plan = query_plan(test_engine, join[0])
+            assert f"COVERING INDEX {index}" in plan
+            assert "USING INTEGER PRIMARY KEY" in plan
+            # Порядок задает индекс, отдельной сортировки нет
+            assert "TEMP B-TREE" not in plan
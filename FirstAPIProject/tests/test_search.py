@@ -0,0 +1,98 @@
+import asyncio
+
+from crud import fts_query, search_statement
+from database import Student
+
+STUDENTS = [
+    {"first_name": "Ivan", "last_name": "Petrov", "age": 20},
+    {
+        "first_name": "Anna",
+        "last_name": "Smith",
+        "age": 21,
+        "email": "petrova@mail.com",
+    },
+    {"first_name": "Petr", "last_name": "Ivanov", "age": 22},
+    {"first_name": "Olga", "last_name": "Sidorova", "age": 23},
+]
+COURSES = [
+    {
+        "title": "Intro",
+        "description": "Basics of python programming",
+        "duration_hours": 10,
+    },
+    {"title": "Python", "description": "Advanced course", "duration_hours": 20},
+    {"title": "SQL", "description": "Databases", "duration_hours": 30},
+]
+
+
+def ids(response):
+    return [item["id"] for item in response.json()["items"]]
+
+
+class TestSearch:
+    """Полнотекстовый поиск по студентам и курсам"""
+
+    def test_prefix_search_ranked(self, test_client):
+        test_client.post("/api/students/bulk", json=STUDENTS)
+        response = test_client.get("/api/students/search?q=pet")
+        assert response.status_code == 200
+        # Совпадения в имени и фамилии выше совпадения только в email
+        assert ids(response)[-1] == 2
+        assert sorted(ids(response)) == [1, 2, 3]
+
+    def test_all_words_required(self, test_client):
+        test_client.post("/api/students/bulk", json=STUDENTS)
+        assert ids(test_client.get("/api/students/search?q=ivan petr")) == [1, 3]
+        assert ids(test_client.get("/api/students/search?q=olga petrov")) == []
+
+    def test_index_follows_writes(self, test_client):
+        test_client.post("/api/students/bulk", json=STUDENTS)
+        test_client.put(
+            "/api/students/4",
+            json={"first_name": "Olga", "last_name": "Petrenko", "age": 23},
+        )
+        test_client.delete("/api/students/1")
+
+        found = ids(test_client.get("/api/students/search?q=petr"))
+        assert sorted(found) == [2, 3, 4]
+        assert ids(test_client.get("/api/students/search?q=sidorova")) == []
+
+    def test_pagination(self, test_client):
+        test_client.post("/api/students/bulk", json=STUDENTS)
+        first = test_client.get("/api/students/search?q=pet&limit=2").json()
+        assert len(first["items"]) == 2
+        assert first["next_offset"] == 2
+
+        rest = test_client.get("/api/students/search?q=pet&limit=2&offset=2").json()
+        assert len(rest["items"]) == 1
+        assert rest["next_offset"] is None
+
+    def test_course_title_outranks_description(self, test_client):
+        test_client.post("/api/courses/bulk", json=COURSES)
+        assert ids(test_client.get("/api/courses/search?q=python")) == [2, 1]
+
+    def test_query_syntax_is_not_interpreted(self, test_client):
+        test_client.post("/api/students/bulk", json=STUDENTS)
+        response = test_client.get('/api/students/search?q="*) OR NEAR(')
+        assert response.status_code == 200
+        assert ids(response) == []
+        assert test_client.get("/api/students/search").status_code == 422
+
+    def test_fts_query(self):
+        assert fts_query('ivan "petr*') == '"ivan"* "petr"*'
+        assert fts_query("--") == ""
+
+    def test_fallback_matches_words_like_fts(self, test_client, test_engine):
+        """Поиск для других СУБД (ILIKE) на той же БД: каждое слово
+        обязательно, % и _ из запроса не работают как шаблоны"""
+        test_client.post("/api/students/bulk", json=STUDENTS)
+
+        async def fallback(text):
+            statement = search_statement(Student, text, dialect="postgresql")
+            async with test_engine.connect() as conn:
+                return list((await conn.execute(statement)).scalars())
+
+        assert asyncio.run(fallback("ivan petr")) == [1, 3]
+        assert ids(test_client.get("/api/students/search?q=ivan petr")) == [1, 3]
+        assert asyncio.run(fallback("o_a")) == []
+        assert asyncio.run(fallback("100%")) == []
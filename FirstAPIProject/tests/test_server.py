@@ -0,0 +1,66 @@
+import os
+import sqlite3
+import subprocess
+import sys
+
+import server
+from conditional import VERSIONS_FILE_ENV
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def tables(path):
+    with sqlite3.connect(path) as conn:
+        rows = conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+        return {name for (name,) in rows}
+
+
+# Старт и остановка приложения: lifespan выполняется только здесь
+START_APP = """
+from fastapi.testclient import TestClient
+import main
+
+with TestClient(main.app):
+    pass
+"""
+
+
+def start_app(tmp_path, **env):
+    """Запускает приложение в отдельном процессе с файлом БД в tmp_path"""
+    path = tmp_path / "app.db"
+    subprocess.run(
+        [sys.executable, "-c", START_APP],
+        cwd=project_root,
+        env={**os.environ, "DATABASE_URL": f"sqlite:///{path}", **env},
+        check=True,
+        capture_output=True,
+    )
+    return path
+
+
+class TestServer:
+    """Запуск через server.py"""
+
+    def test_app_creates_tables_without_launcher(self, tmp_path, monkeypatch):
+        monkeypatch.delenv(server.SCHEMA_READY_ENV, raising=False)
+        path = start_app(tmp_path)
+        assert "student" in tables(path)
+
+    def test_workers_skip_create_tables(self, tmp_path):
+        path = start_app(tmp_path, **{server.SCHEMA_READY_ENV: "1"})
+        assert "student" not in tables(path)
+
+    def test_prepare_runs_before_fork(self, monkeypatch):
+        created = []
+        monkeypatch.setattr("database.create_tables", lambda: created.append(True))
+        # prepare() пишет в os.environ: monkeypatch вернет переменные после теста
+        for name in (server.SCHEMA_READY_ENV, VERSIONS_FILE_ENV):
+            monkeypatch.setenv(name, "")
+            monkeypatch.delenv(name)
+
+        server.prepare()
+
+        assert created == [True]
+        assert os.environ[server.SCHEMA_READY_ENV] == "1"
+        assert os.path.getsize(os.environ[VERSIONS_FILE_ENV]) > 0
+        os.remove(os.environ[VERSIONS_FILE_ENV])
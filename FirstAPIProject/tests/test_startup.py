@@ -0,0 +1,60 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Сейчас импорт main занимает около 1 с; запас на медленные CI-машины
+IMPORT_BUDGET_SECONDS = 5.0
+# Модули, которые не нужны воркеру для обработки запросов
+LAZY_MODULES = ("uvicorn", "sqlalchemy.dialects.postgresql")
+
+
+def import_times(stderr: str) -> dict[str, float]:
+    """Накопленное время импорта по модулям из вывода -X importtime, в с"""
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line.split("|")
+        times[module.strip()] = int(cumulative) / 1_000_000
+    return times
+
+
+@pytest.fixture(scope="module")
+def cold_import(tmp_path_factory):
+    """Холодный импорт main в отдельном процессе с файлом БД во временной папке"""
+    path = tmp_path_factory.mktemp("startup") / "app.db"
+    env = {**os.environ, "DATABASE_URL": f"sqlite:///{path}"}
+    env.pop("APP_SCHEMA_READY", None)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=project_root,
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    return result, import_times(result.stderr), path
+
+
+class TestStartup:
+    """Импорт main без побочных эффектов и в пределах бюджета времени"""
+
+    def test_import_is_silent(self, cold_import):
+        result, _, _ = cold_import
+        assert result.stdout == ""
+
+    def test_import_does_not_touch_database(self, cold_import):
+        _, _, path = cold_import
+        assert not path.exists()
+
+    def test_heavy_modules_are_lazy(self, cold_import):
+        _, times, _ = cold_import
+        assert [module for module in LAZY_MODULES if module in times] == []
+
+    def test_import_time_budget(self, cold_import):
+        _, times, _ = cold_import
+        assert times["main"] < IMPORT_BUDGET_SECONDS
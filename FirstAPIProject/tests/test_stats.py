@@ -0,0 +1,128 @@
+import asyncio
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import crud
+from database import Base
+
+
+def aggregate_stats(engine):
+    async def run():
+        async with AsyncSession(engine) as db:
+            return await crud._aggregate_stats(db)
+
+    return asyncio.run(run())
+
+
+def fill(test_client):
+    students = test_client.post(
+        "/api/students/bulk",
+        json=[
+            {"first_name": "Ivan", "last_name": "Smith", "age": 20},
+            {"first_name": "Anna", "last_name": "Smith", "age": 30},
+            {"first_name": "Olga", "last_name": "Smith", "age": 41, "is_active": False},
+        ],
+    ).json()["ids"]
+    courses = [
+        test_client.post(
+            "/api/courses/", json={"title": title, "duration_hours": 10, "price": price}
+        ).json()["id"]
+        for title, price in (("Math", 100), ("Art", 50))
+    ]
+    test_client.post(
+        "/api/enroll/bulk",
+        json=[
+            {"student_id": students[0], "course_id": courses[0]},
+            {"student_id": students[1], "course_id": courses[0]},
+            {"student_id": students[2], "course_id": courses[1]},
+        ],
+    )
+    return students, courses
+
+
+class TestStats:
+    """Сводная статистика /api/stats"""
+
+    def test_empty(self, test_client):
+        response = test_client.get("/api/stats")
+        assert response.status_code == 200
+        assert response.json() == {
+            "students": 0,
+            "active_students": 0,
+            "inactive_students": 0,
+            "courses": 0,
+            "enrollments": 0,
+            "revenue": 0.0,
+            "average_age": None,
+            "enrollments_per_course": [],
+        }
+
+    def test_counts(self, test_client):
+        _, courses = fill(test_client)
+
+        stats = test_client.get("/api/stats").json()
+        assert stats["students"] == 3
+        assert stats["active_students"] == 2
+        assert stats["inactive_students"] == 1
+        assert stats["courses"] == 2
+        assert stats["enrollments"] == 3
+        assert stats["revenue"] == 250.0
+        assert stats["average_age"] == 30.33
+        assert stats["enrollments_per_course"] == [
+            {"course_id": courses[0], "enrollments": 2},
+            {"course_id": courses[1], "enrollments": 1},
+        ]
+
+    def test_counters_follow_writes(self, test_client, test_engine):
+        students, courses = fill(test_client)
+        math = {"title": "Math", "duration_hours": 10, "price": 120}
+        test_client.put(f"/api/courses/{courses[0]}", json=math)
+        test_client.put(
+            f"/api/students/{students[0]}",
+            json={
+                "first_name": "Ivan",
+                "last_name": "Smith",
+                "age": 25,
+                "is_active": False,
+            },
+        )
+        enrollments = test_client.get("/api/enrollments/").json()["items"]
+        test_client.put(
+            f"/api/enrollments/{enrollments[0]['id']}/",
+            json={"student_id": students[0], "course_id": courses[1]},
+        )
+        test_client.delete(f"/api/enrollments/{enrollments[2]['id']}")
+        test_client.delete(f"/api/students/{students[2]}")
+        test_client.post("/api/courses/", json={"title": "Music", "duration_hours": 5})
+
+        # Триггеры видят и записи мимо crud; запись на удаленный курс остается
+        async def delete_course():
+            async with test_engine.begin() as conn:
+                await conn.execute(
+                    text("DELETE FROM course WHERE id = :id"), {"id": courses[0]}
+                )
+
+        asyncio.run(delete_course())
+
+        stats = test_client.get("/api/stats").json()
+        assert stats == aggregate_stats(test_engine)
+        assert stats["revenue"] == 50.0
+
+    def test_constant_number_of_queries(self, test_client, count_queries):
+        fill(test_client)
+        with count_queries() as queries:
+            test_client.get("/api/stats")
+        assert queries.count == 2
+
+    def test_counters_seeded_from_existing_rows(self, test_client, test_engine):
+        fill(test_client)
+
+        async def reseed():
+            async with test_engine.begin() as conn:
+                await conn.execute(text("DELETE FROM stats_totals"))
+                await conn.execute(text("DELETE FROM course_stats"))
+                await conn.run_sync(Base.metadata.create_all)
+
+        asyncio.run(reseed())
+        assert test_client.get("/api/stats").json() == aggregate_stats(test_engine)